@@ -0,0 +1,131 @@
+"""Benchmark for the SQLite checkpointer.
+
+Runs a report-shaped graph (a plan, then one step per section that appends
+section text and replaces a large source string) against the in-memory
+MemorySaver and the SQLite checkpointer with and without batched commits,
+and reports checkpoint write latency and on-disk size per report. The last
+run keeps the source text in a blob store and only references in state.
+
+Usage:
+    python benchmarks/bench_checkpoint.py --reports 20 --sections 8 --source-chars 50000
+"""
+
+import argparse
+import operator
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from typing import Annotated, TypedDict
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from open_deep_research.blobs import BlobStore, store_text
+from open_deep_research.checkpoint import SQLiteCheckpointer
+
+
+class BenchState(TypedDict):
+    """State of the benchmark graph, shaped like the report state."""
+
+    topic: str
+    plan: list
+    source_str: str
+    completed_sections: Annotated[list, operator.add]
+
+
+def build_graph(sections, source_chars, blob_store=None):
+    """Build a graph that writes one section per step, like a report run."""
+    text = ("lorem ipsum dolor sit amet consectetur adipiscing elit " * (source_chars // 56 + 1))[:source_chars]
+
+    def plan(state):
+        return {"plan": [f"Section {i}" for i in range(sections)]}
+
+    def write(state):
+        done = len(state["completed_sections"])
+        return {"source_str": store_text(f"{done}{text}", blob_store), "completed_sections": [f"## {state['plan'][done]}\n\n{text[:2000]}"]}
+
+    def route(state):
+        return "write" if len(state["completed_sections"]) < len(state["plan"]) else END
+
+    builder = StateGraph(BenchState)
+    builder.add_node("write_plan", plan)
+    builder.add_node("write", write)
+    builder.add_edge(START, "write_plan")
+    builder.add_edge("write_plan", "write")
+    builder.add_conditional_edges("write", route, ["write", END])
+    return builder
+
+
+class TimedSaver:
+    """Wrap a checkpointer's put and put_writes to record their latency."""
+
+    def __init__(self, saver):
+        """Wrap saver in place."""
+        self.saver = saver
+        self.latencies = []
+        for name in ("put", "put_writes"):
+            setattr(saver, name, self._timed(getattr(saver, name)))
+
+    def _timed(self, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.latencies.append(time.perf_counter() - start)
+        return wrapper
+
+
+def run(name, saver, args, path=None, blob_store=None):
+    """Run args.reports reports against saver and print latency and size figures."""
+    timed = TimedSaver(saver)
+    graph = build_graph(args.sections, args.source_chars, blob_store).compile(checkpointer=saver)
+
+    start = time.perf_counter()
+    for _ in range(args.reports):
+        graph.invoke({"topic": "benchmark"}, {"configurable": {"thread_id": str(uuid.uuid4())}})
+    elapsed = time.perf_counter() - start
+
+    size = ""
+    if path:
+        saver.flush()
+        saver.compact()
+        size = f"  {os.path.getsize(path) / args.reports / 1e3:8.1f} KB/report"
+    if blob_store:
+        size += f" + {blob_store.stats()['bytes_written'] / args.reports / 1e3:.1f} KB/report of blobs"
+
+    latencies = sorted(timed.latencies)
+    p50 = statistics.median(latencies) * 1e3
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1e3
+    print(f"  {name:<28} {elapsed / args.reports * 1e3:8.1f} ms/report  write p50 {p50:6.3f} ms  p99 {p99:6.3f} ms{size}")
+
+
+def main():
+    """Parse the command line, run the benchmark and print its results."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=20)
+    parser.add_argument("--sections", type=int, default=8)
+    parser.add_argument("--source-chars", type=int, default=50_000)
+    parser.add_argument("--keep", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{args.reports} reports x {args.sections} sections, {args.source_chars} source chars")
+    run("MemorySaver", MemorySaver(), args)
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, kwargs in (
+            ("sqlite, commit per write", {"max_batch": 1}),
+            ("sqlite, batched", {}),
+            ("sqlite, batched, keep all", {"keep_checkpoints": None}),
+        ):
+            path = os.path.join(tmp, f"{uuid.uuid4()}.sqlite")
+            run(name, SQLiteCheckpointer(path, **{"keep_checkpoints": args.keep, **kwargs}), args, path)
+
+        path = os.path.join(tmp, f"{uuid.uuid4()}.sqlite")
+        run("sqlite, batched, blob refs", SQLiteCheckpointer(path, keep_checkpoints=args.keep), args, path,
+            blob_store=BlobStore(os.path.join(tmp, "blobs")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Event-loop responsiveness while extracting document text.
+
+Extracts --documents HTML pages and PDFs concurrently while a ticker task on
+the same event loop wakes every --tick-ms milliseconds, and reports how late
+its wake-ups were (the event-loop lag) together with the total extraction
+time, for each way of running the extraction:
+  - inline:  parsing directly in the coroutines, on the event loop
+  - thread:  parsing in the default thread pool, as before the extraction service
+  - process: parsing in the worker processes of the extraction service
+
+Usage:
+    python benchmarks/bench_extraction.py --documents 50 --workers 4
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from open_deep_research.extraction import ExtractionService, extract_document
+
+WORDS = "deep research agents plan sections search the web and write reports from what they find ".split()
+
+
+def make_html(paragraphs):
+    """Build an HTML page with navigation, scripts and paragraphs of text."""
+    body = "".join(
+        f"<p>{' '.join(WORDS[(i + j) % len(WORDS)] for j in range(60))}</p>" for i in range(paragraphs)
+    )
+    return (f"<html><head><script>{'var x = 1;' * 200}</script><style>p {{ margin: 0 }}</style></head>"
+            f"<body><nav><a href='/'>Home</a></nav><article>{body}</article><footer>Footer</footer></body></html>").encode()
+
+
+def make_pdf(pages):
+    """Build a PDF with a running header and a page of text per page."""
+    import pymupdf
+
+    document = pymupdf.open()
+    for page_number in range(pages):
+        page = document.new_page()
+        page.insert_text((72, 40), "Benchmark paper, preprint")
+        for line in range(45):
+            page.insert_text((72, 72 + line * 15), f"{page_number}.{line} " + " ".join(WORDS[(line + j) % len(WORDS)] for j in range(12)))
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def make_documents(count, html_paragraphs, pdf_pages):
+    """Return count documents, alternating between HTML pages and PDFs."""
+    html = make_html(html_paragraphs)
+    pdf = make_pdf(pdf_pages)
+    return [(html, "text/html") if i % 2 == 0 else (pdf, "application/pdf") for i in range(count)]
+
+
+async def measure(extract_all, tick):
+    """Run extract_all while a ticker records how late each of its wake-ups is."""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        loop = asyncio.get_running_loop()
+        while not done.is_set():
+            expected = loop.time() + tick
+            await asyncio.sleep(tick)
+            lags.append(max(0.0, loop.time() - expected))
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(tick)
+    start = time.perf_counter()
+    texts = await extract_all()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker_task
+
+    lags.sort()
+    return {
+        "seconds": elapsed,
+        "extracted": sum(1 for text in texts if text),
+        "lag_p50_ms": statistics.median(lags) * 1000 if lags else 0.0,
+        "lag_p99_ms": lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1000 if lags else 0.0,
+        "lag_max_ms": lags[-1] * 1000 if lags else 0.0,
+    }
+
+
+async def run(args):
+    """Measure every mode and return their results by name."""
+    documents = make_documents(args.documents, args.html_paragraphs, args.pdf_pages)
+    tick = args.tick_ms / 1000
+
+    async def inline():
+        async def one(data, content_type):
+            return extract_document(data, content_type)
+        return await asyncio.gather(*(one(data, content_type) for data, content_type in documents))
+
+    async def thread():
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(loop.run_in_executor(None, extract_document, data, content_type)
+                                      for data, content_type in documents))
+
+    service = ExtractionService(max_workers=args.workers)
+    # Start the worker processes before timing, as a long-running server would have
+    await service.extract_many(documents[:args.workers])
+
+    results = {}
+    for name, extract_all in (("inline", inline), ("thread", thread), ("process", lambda: service.extract_many(documents))):
+        results[name] = await measure(extract_all, tick)
+    service.shutdown()
+    return results
+
+
+def main():
+    """Parse the command line, run the benchmark and print its results."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--html-paragraphs", type=int, default=400)
+    parser.add_argument("--pdf-pages", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes, default one per CPU")
+    parser.add_argument("--tick-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{args.documents} documents ({args.html_paragraphs}-paragraph HTML and {args.pdf_pages}-page PDFs), "
+          f"ticker every {args.tick_ms:g} ms")
+    for name, result in results.items():
+        print(f"  {name:<8} {result['seconds'] * 1000:9.1f} ms total, {result['extracted']} extracted"
+              f"   loop lag p50 {result['lag_p50_ms']:7.1f} ms  p99 {result['lag_p99_ms']:7.1f} ms  max {result['lag_max_ms']:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
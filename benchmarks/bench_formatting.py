@@ -0,0 +1,123 @@
+"""Microbenchmark for the search source and section formatters.
+
+Compares the linear-time formatters in open_deep_research.utils against the
+previous string-concatenation implementation on many large sources.
+
+Usage:
+    python benchmarks/bench_formatting.py --sources 200 --raw-chars 200000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from open_deep_research.state import Section
+from open_deep_research.utils import (
+    duplicate_and_format_source,
+    format_sections,
+    iter_formatted_sources,
+)
+
+
+def concat_format_sources(search_response, max_tokens_per_source, include_raw_content=True):
+    """Run the previous implementation, kept here as the baseline."""
+    source_list = []
+    for response in search_response:
+        source_list.extend(response['results'])
+    unique_sources = {source['url']: source for source in source_list}
+
+    formatted_text = "Content from sources:\n"
+    for source in unique_sources.values():
+        formatted_text += f"{'=' * 80}\n"
+        formatted_text += f"Source: {source.get('title', 'Untitled')}\n"
+        formatted_text += f"{'-' * 80}\n"
+        formatted_text += f"URL: {source.get('url', 'No URL')}\n===\n"
+        formatted_text += f"Most relevant content from source: {source.get('content', '')}\n===\n"
+        if include_raw_content:
+            char_limit = max_tokens_per_source * 4
+            raw_content = source.get('raw_content') or ''
+            if len(raw_content) > char_limit:
+                raw_content = raw_content[:char_limit] + "... [truncated]"
+            formatted_text += f"Full source content limited to {max_tokens_per_source} tokens: {raw_content}\n\n"
+        formatted_text += f"{'=' * 80}\n\n"
+    return formatted_text.strip()
+
+
+def concat_format_sections(sections):
+    """Run the previous implementation, kept here as the baseline."""
+    formatted_str = ""
+    for idx, section in enumerate(sections, 1):
+        formatted_str += f"""
+{'='*60}
+Section {idx}: {section.name}
+{'='*60}
+Description:
+{section.description}
+Requires Research:
+{section.research}
+
+Content:
+{section.content if section.content else '[Not yet written]'}
+
+"""
+    return formatted_str
+
+
+def make_search_response(num_sources, raw_chars):
+    """Build one search response with num_sources distinct, large results."""
+    words = ("lorem ipsum dolor sit amet consectetur adipiscing elit " * (raw_chars // 56 + 1))[:raw_chars]
+    return [{
+        'query': 'benchmark',
+        'results': [{
+            'title': f"Source {i}",
+            'url': f"https://example.com/{i}",
+            'content': words[:500],
+            'score': 1.0 - i / num_sources,
+            'raw_content': words,
+        } for i in range(num_sources)],
+    }]
+
+
+def timed(fn, repeat):
+    """Return the best wall time of fn over repeat runs, and its peak traced memory in bytes."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    """Parse the command line, run the benchmark and print its results."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sources", type=int, default=200)
+    parser.add_argument("--raw-chars", type=int, default=200_000)
+    parser.add_argument("--max-tokens-per-source", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    response = make_search_response(args.sources, args.raw_chars)
+    sections = [Section(name=f"Section {i}", description="d" * 200, research=True, content="c" * (args.raw_chars // 10))
+                for i in range(args.sources)]
+
+    results = {
+        "sources (concat)": timed(lambda: concat_format_sources(response, args.max_tokens_per_source), args.repeat),
+        "sources (join)": timed(lambda: duplicate_and_format_source(response, args.max_tokens_per_source), args.repeat),
+        "sources (stream)": timed(lambda: sum(len(chunk) for chunk in iter_formatted_sources(response, args.max_tokens_per_source)), args.repeat),
+        "sections (concat)": timed(lambda: concat_format_sections(sections), args.repeat),
+        "sections (join)": timed(lambda: format_sections(sections), args.repeat),
+    }
+
+    print(f"{args.sources} sources x {args.raw_chars} chars, best of {args.repeat}")
+    for name, (seconds, peak) in results.items():
+        print(f"  {name:<20} {seconds * 1000:9.1f} ms  peak {peak / 1e6:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
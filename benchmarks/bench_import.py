@@ -0,0 +1,122 @@
+"""Import-time and startup benchmark.
+
+Measures, each in a fresh interpreter (best of --repeat):
+  - the cumulative import time of each module, from `python -X importtime`
+  - the time until the report graph is compiled and ready to serve
+  - which search backend client libraries were loaded along the way
+
+Only the selected backend's libraries should be loaded, and only once a
+search actually runs, so importing the package loads none of them.
+
+Each run is appended to benchmarks/results/bench_import.jsonl together with
+the commit it ran on, so later runs can be compared against it.
+
+Usage:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --compare HEAD~1
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+from bench_report import BENCHMARKS_DIR, find_baseline, git_commit, load_results
+
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, "results", "bench_import.jsonl")
+SRC_DIR = os.path.join(os.path.dirname(BENCHMARKS_DIR), "src")
+
+MODULES = ["open_deep_research.utils", "open_deep_research.graph"]
+BACKEND_LIBRARIES = ["tavily", "duckduckgo_search", "bs4", "aiohttp", "langchain_community.retrievers", "arxiv"]
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from open_deep_research.graph import graph
+graph.get_graph()
+print(json.dumps({"startup_s": time.perf_counter() - start,
+                  "loaded": [name for name in %r if name in sys.modules]}))
+"""
+
+
+def run_python(args):
+    """Run a fresh interpreter with the package on its path and return the completed process."""
+    env = {**os.environ, "PYTHONPATH": SRC_DIR + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    return subprocess.run([sys.executable, "-W", "ignore", *args], capture_output=True, text=True, env=env, check=True)
+
+
+def import_time(module):
+    """Return the cumulative import time of a module in seconds, and the slowest modules it pulled in."""
+    stderr = run_python(["-X", "importtime", "-c", f"import {module}"]).stderr
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        timings[name] = (int(self_us), int(cumulative_us))
+    slowest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:5]
+    return timings[module][1] / 1e6, [{"module": name, "self_ms": round(us / 1000, 1)} for name, (us, _) in slowest]
+
+
+def benchmark(args):
+    """Run the configured benchmark and return its result record."""
+    modules = {}
+    for module in MODULES:
+        best, slowest = min(import_time(module) for _ in range(args.repeat))
+        modules[module] = {"import_s": round(best, 4), "slowest": slowest}
+
+    startups = [json.loads(run_python(["-c", STARTUP_SCRIPT % BACKEND_LIBRARIES]).stdout.strip().splitlines()[-1])
+                for _ in range(args.repeat)]
+    startup = min(startups, key=lambda s: s["startup_s"])
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "params": {"python": sys.version.split()[0]},
+        "modules": modules,
+        "startup_s": round(startup["startup_s"], 4),
+        "backend_libraries_loaded": startup["loaded"],
+    }
+
+
+def print_result(result, baseline=None):
+    """Print a result, with the change against a baseline record if one is given."""
+    def change(new, old):
+        return f"  ({(new - old) / old * 100:+.1f}%)" if old else ""
+
+    print(f"commit {result['commit']}" + (f", compared with {baseline['commit']}" if baseline else ""))
+    for module, timing in result["modules"].items():
+        old = baseline["modules"].get(module) if baseline else None
+        print(f"  import {module:<28} {timing['import_s'] * 1000:9.1f} ms{change(timing['import_s'], old['import_s']) if old else ''}")
+        for entry in timing["slowest"]:
+            print(f"      {entry['self_ms']:9.1f} ms self  {entry['module']}")
+    print(f"  graph ready                         {result['startup_s'] * 1000:9.1f} ms"
+          f"{change(result['startup_s'], baseline['startup_s']) if baseline else ''}")
+    print(f"  backend libraries loaded: {', '.join(result['backend_libraries_loaded']) or 'none'}")
+
+
+def main():
+    """Parse the command line, run the benchmark and print its results."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--results", default=RESULTS_PATH, help="JSONL file results are appended to")
+    parser.add_argument("--no-save", action="store_true", help="Do not store this run's result")
+    parser.add_argument("--compare", metavar="REF", help="Compare with the stored result for this git ref")
+    args = parser.parse_args()
+
+    result = benchmark(args)
+    baseline = find_baseline(load_results(args.results), args.compare, result["params"]) if args.compare else None
+    if args.compare and baseline is None:
+        print(f"No stored result for {args.compare} with these parameters")
+    print_result(result, baseline)
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""End-to-end benchmark of the report graph, offline.
+
+Runs the full report graph with the deterministic stand-in models and search
+APIs from fakes.py, approving the plan automatically, and reports:
+  - wall-clock time per report (best of --repeat)
+  - per-node latency, from the graph's debug stream
+  - the critical path: the slowest task of each step, expanded into subgraphs
+  - peak traced memory (from one extra run under tracemalloc)
+  - the share of prompt tokens read from the (simulated) provider prompt cache,
+    when the writers use a provider with cache breakpoints, e.g.
+    --config '{"writer_provider": "anthropic", "final_writer_provider": "anthropic"}'
+
+Each run is appended to benchmarks/results/bench_report.jsonl together with
+the commit it ran on, so later runs can be compared against it.
+
+Usage:
+    python benchmarks/bench_report.py --sections 6 --number-of-queries 3 --max-search-depth 2
+    python benchmarks/bench_report.py --compare HEAD~1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from dataclasses import asdict
+from datetime import datetime
+
+import fakes
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.types import Command
+
+from open_deep_research.cache import search_flight
+from open_deep_research.metrics import track_usage
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, "results", "bench_report.jsonl")
+
+
+def git_commit():
+    """Return the short hash of HEAD, suffixed with "-dirty" when there are uncommitted changes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=BENCHMARKS_DIR).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, cwd=BENCHMARKS_DIR).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run_report(graph, configurable):
+    """Run one report, auto-approving the plan, and return the debug events as (namespace, event) pairs."""
+    config = {"configurable": {**configurable, "thread_id": str(uuid.uuid4())}}
+    events = []
+    for graph_input in ({"topic": "Benchmarking deep research agents"}, Command(resume=True)):
+        async for namespace, event in graph.astream(graph_input, config, stream_mode="debug", subgraphs=True):
+            events.append((namespace, event))
+    return events
+
+
+def collect_tasks(events):
+    """Pair task start and result events into {(namespace, task id): task} records."""
+    tasks = {}
+    for namespace, event in events:
+        if event["type"] not in ("task", "task_result"):
+            continue
+        payload = event["payload"]
+        key = ("|".join(namespace), payload["id"])
+        timestamp = datetime.fromisoformat(event["timestamp"]).timestamp()
+        task = tasks.setdefault(key, {"name": payload["name"], "step": event["step"], "namespace": key[0], "id": payload["id"]})
+        if event["type"] == "task":
+            task["start"] = timestamp
+        else:
+            task["end"] = timestamp
+    # A task interrupted and later resumed appears twice; keep the run that finished last
+    return {key: task for key, task in tasks.items() if "start" in task and "end" in task}
+
+
+def node_latencies(tasks):
+    """Aggregate task durations per node name, in milliseconds."""
+    durations = defaultdict(list)
+    for task in tasks.values():
+        durations[task["name"]].append((task["end"] - task["start"]) * 1000)
+    return {
+        name: {"count": len(values), "mean_ms": round(sum(values) / len(values), 2), "max_ms": round(max(values), 2)}
+        for name, values in sorted(durations.items())
+    }
+
+
+def critical_path(tasks, namespace=""):
+    """Return the slowest task of each step in a namespace, with subgraph tasks expanded into their own critical path."""
+    steps = defaultdict(list)
+    for task in tasks.values():
+        if task["namespace"] == namespace:
+            steps[task["step"]].append(task)
+
+    path = []
+    for step in sorted(steps):
+        slowest = max(steps[step], key=lambda task: task["end"] - task["start"])
+        path.append({"node": slowest["name"], "ms": round((slowest["end"] - slowest["start"]) * 1000, 2)})
+        child = f"{namespace}|{slowest['name']}:{slowest['id']}" if namespace else f"{slowest['name']}:{slowest['id']}"
+        path.extend({**entry, "node": f"{slowest['name']}/{entry['node']}"} for entry in critical_path(tasks, child))
+    return path
+
+
+def benchmark(args):
+    """Run the configured benchmark and return its result record."""
+    settings = fakes.FakeSettings(
+        sections=args.sections,
+        number_of_queries=args.number_of_queries,
+        model_latency=args.model_latency,
+        seconds_per_token=args.seconds_per_token,
+        output_tokens=args.output_tokens,
+        pass_rate=args.pass_rate,
+        search_latency=args.search_latency,
+        results_per_query=args.results_per_query,
+        raw_content_chars=args.raw_content_chars,
+    )
+    stats = fakes.install(settings)
+
+    # Import after the fakes are installed, so nothing holds the real clients
+    from open_deep_research.graph import builder
+
+    graph = builder.compile(checkpointer=MemorySaver())
+    configurable = {
+        "search_api": args.search_api,
+        "number_of_queries": args.number_of_queries,
+        "max_search_depth": args.max_search_depth,
+        "search_cache": False,
+        "blob_store_dir": "",
+        **json.loads(args.config),
+    }
+
+    best, best_events, best_usage, best_searches = float("inf"), None, None, None
+    for _ in range(args.repeat):
+        # Each run starts with a cold prompt cache
+        stats["prompt_cache"].clear()
+        start = time.perf_counter()
+        with track_usage() as usage, search_flight.track() as searches:
+            events = asyncio.run(run_report(graph, configurable))
+        elapsed = time.perf_counter() - start
+        if elapsed < best:
+            best, best_events, best_usage, best_searches = elapsed, events, usage, searches
+
+    tracemalloc.start()
+    asyncio.run(run_report(graph, configurable))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tasks = collect_tasks(best_events)
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "params": {**asdict(settings), "search_api": args.search_api, "max_search_depth": args.max_search_depth, "config": args.config},
+        "wall_s": round(best, 4),
+        "peak_mb": round(peak / 1e6, 2),
+        "model_calls": stats["calls"] // (args.repeat + 1),
+        "search_queries": stats["searches"] // (args.repeat + 1),
+        "coalesced_searches": best_searches["coalesced"],
+        "prompt_tokens": best_usage["prompt_tokens"],
+        "cached_ratio": best_usage.get("cached_ratio", 0.0),
+        "nodes": node_latencies(tasks),
+        "critical_path": critical_path(tasks),
+    }
+
+
+def load_results(path):
+    """Read every stored result record."""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_baseline(records, ref, params):
+    """Return the latest stored record with the same parameters for the commit ref resolves to."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", ref], capture_output=True, text=True, check=True, cwd=BENCHMARKS_DIR).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ref
+    matches = [r for r in records if r["params"] == params and r["commit"].split("-")[0] == commit]
+    return matches[-1] if matches else None
+
+
+def print_result(result, baseline=None):
+    """Print a result, with the change against a baseline record if one is given."""
+    def change(new, old):
+        return f"  ({(new - old) / old * 100:+.1f}%)" if old else ""
+
+    def against(key):
+        return change(result[key], baseline[key]) if baseline else ""
+
+    print(f"commit {result['commit']}" + (f", compared with {baseline['commit']}" if baseline else ""))
+    print(f"  wall clock      {result['wall_s'] * 1000:9.1f} ms{against('wall_s')}")
+    print(f"  peak memory     {result['peak_mb']:9.1f} MB{against('peak_mb')}")
+    print(f"  model calls     {result['model_calls']:9d}{against('model_calls')}")
+    print(f"  search queries  {result['search_queries']:9d}{against('search_queries')}")
+    if "coalesced_searches" in result:
+        print(f"  coalesced       {result['coalesced_searches']:9d}")
+    if "prompt_tokens" in result:
+        print(f"  prompt tokens   {result['prompt_tokens']:9d}  ({result['cached_ratio'] * 100:.1f}% from cache)")
+    print("  per node (mean / max ms):")
+    for name, latency in result["nodes"].items():
+        old = baseline["nodes"].get(name) if baseline else None
+        delta = change(latency["mean_ms"], old["mean_ms"]) if old else ""
+        print(f"    {name:<34} x{latency['count']:<3} {latency['mean_ms']:9.1f} / {latency['max_ms']:9.1f}{delta}")
+    print("  critical path:")
+    for entry in result["critical_path"]:
+        print(f"    {entry['ms']:9.1f} ms  {entry['node']}")
+
+
+def main():
+    """Parse the command line, run the benchmark and print its results."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, default=5)
+    parser.add_argument("--number-of-queries", type=int, default=2)
+    parser.add_argument("--max-search-depth", type=int, default=2)
+    parser.add_argument("--search-api", default="tavily", choices=["tavily", "arxiv", "duckduckgo"])
+    parser.add_argument("--model-latency", type=float, default=0.05, help="Seconds per model call")
+    parser.add_argument("--seconds-per-token", type=float, default=0.0005, help="Extra seconds per generated token")
+    parser.add_argument("--output-tokens", type=int, default=400, help="Words per written section")
+    parser.add_argument("--pass-rate", type=float, default=0.0, help="Fraction of section gradings that pass")
+    parser.add_argument("--search-latency", type=float, default=0.1, help="Seconds per search request")
+    parser.add_argument("--results-per-query", type=int, default=3)
+    parser.add_argument("--raw-content-chars", type=int, default=20_000)
+    parser.add_argument("--config", default="{}", help="JSON object of extra configurable values")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--results", default=RESULTS_PATH, help="JSONL file results are appended to")
+    parser.add_argument("--no-save", action="store_true", help="Do not store this run's result")
+    parser.add_argument("--compare", metavar="REF", help="Compare with the stored result for this git ref")
+    args = parser.parse_args()
+
+    result = benchmark(args)
+    baseline = find_baseline(load_results(args.results), args.compare, result["params"]) if args.compare else None
+    if args.compare and baseline is None:
+        print(f"No stored result for {args.compare} with these parameters")
+    print_result(result, baseline)
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
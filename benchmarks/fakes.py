@@ -0,0 +1,188 @@
+"""Deterministic stand-ins for the chat models and search APIs, for offline benchmarks.
+
+Everything a fake returns is derived from a hash of its input, so two runs
+with the same settings do the same work. Latencies are simulated with
+asyncio.sleep and can be tuned per call and per output token.
+"""
+
+import asyncio
+import hashlib
+import random
+from dataclasses import dataclass
+
+from langchain_core.messages import AIMessage
+
+import open_deep_research.models as models
+import open_deep_research.utils as utils
+from open_deep_research.state import Feedback, Queries, SearchQuery, Section, Sections
+
+WORDS = ("model", "research", "latency", "throughput", "graph", "section", "source", "cache",
+         "token", "query", "report", "evidence", "benchmark", "system", "memory", "network")
+
+
+def _rng(*parts) -> random.Random:
+    """Return a random generator seeded from the given parts."""
+    seed = hashlib.sha256("\x00".join(str(p) for p in parts).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(seed[:8], "little"))
+
+
+def _text(rng: random.Random, words: int) -> str:
+    """Return words pseudo-random words."""
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _blocks(messages) -> list:
+    """Flatten messages into text blocks, keeping any cache_control markers."""
+    blocks = []
+    for message in messages:
+        content = getattr(message, "content", message)
+        if isinstance(content, list):
+            blocks.extend(block if isinstance(block, dict) else {"text": str(block)} for block in content)
+        else:
+            blocks.append({"text": str(content)})
+    return blocks
+
+
+def _prompt(messages) -> str:
+    """Join the text of a list of messages."""
+    return "\n".join(block.get("text", "") for block in _blocks(messages))
+
+
+def _usage(messages, tokens: int, prompt_cache: set) -> dict:
+    """Return usage_metadata for a call, simulating a provider prompt cache.
+
+    Every prefix ending at a cache_control breakpoint is written to the cache;
+    the longest such prefix already in it counts as read from cache.
+    """
+    prefix, cached, written = "", 0, 0
+    for block in _blocks(messages):
+        prefix += block.get("text", "")
+        if block.get("cache_control"):
+            key = hashlib.sha256(prefix.encode("utf-8")).digest()
+            if key in prompt_cache:
+                cached = len(prefix) // 4
+            else:
+                prompt_cache.add(key)
+                written = len(prefix) // 4 - cached
+    prompt_tokens = len(prefix) // 4
+    return {"input_tokens": prompt_tokens, "output_tokens": tokens, "total_tokens": prompt_tokens + tokens,
+            "input_token_details": {"cache_read": cached, "cache_creation": max(written, 0)}}
+
+
+@dataclass
+class FakeSettings:
+    """Knobs for the fake models and search APIs."""
+    sections: int = 5  # Sections in each plan, of which all but the first and last need research
+    number_of_queries: int = 2  # Queries returned per query-writing call
+    model_latency: float = 0.05  # Seconds per model call
+    seconds_per_token: float = 0.0005  # Extra seconds per generated token
+    output_tokens: int = 400  # Words per written section
+    pass_rate: float = 0.0  # Fraction of gradings that pass, so 0 always runs to max_search_depth
+    search_latency: float = 0.1  # Seconds per search request
+    results_per_query: int = 3  # Results per search query
+    raw_content_chars: int = 20_000  # Length of each result's raw content
+
+
+class FakeStructuredModel:
+    """Stand-in for a model bound to an output schema."""
+
+    def __init__(self, schema, settings: FakeSettings, stats: dict, include_raw: bool = False):
+        """Bind the fake to a schema, returning the raw message too if include_raw is set."""
+        self.schema = schema
+        self.settings = settings
+        self.stats = stats
+        self.include_raw = include_raw
+
+    async def ainvoke(self, messages, config=None):
+        """Return a deterministic answer in the bound schema."""
+        parsed = await self._answer(messages)
+        if not self.include_raw:
+            return parsed
+        raw = AIMessage(content="", usage_metadata=_usage(messages, 20, self.stats["prompt_cache"]))
+        return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+    async def _answer(self, messages):
+        """Build the answer after the simulated latency."""
+        prompt = _prompt(messages)
+        rng = _rng(self.schema.__name__, prompt)
+        self.stats["calls"] += 1
+        await asyncio.sleep(self.settings.model_latency + 20 * self.settings.seconds_per_token)
+
+        if self.schema is Queries:
+            return Queries(queries=[SearchQuery(search_query=_text(rng, 6)) for _ in range(self.settings.number_of_queries)])
+        if self.schema is Sections:
+            n = self.settings.sections
+            return Sections(sections=[
+                Section(name=f"Section {i}: {_text(rng, 2)}", description=_text(rng, 12), research=0 < i < n - 1, content="")
+                for i in range(n)
+            ])
+        if self.schema is Feedback:
+            passed = rng.random() < self.settings.pass_rate
+            return Feedback(grade="pass" if passed else "fail",
+                            follow_up_queries=[] if passed else [SearchQuery(search_query=_text(rng, 6))
+                                                                 for _ in range(self.settings.number_of_queries)])
+        raise ValueError(f"Fake model has no output for schema {self.schema.__name__}")
+
+
+class FakeChatModel:
+    """Stand-in chat model whose latency and output length are set by FakeSettings."""
+
+    def __init__(self, settings: FakeSettings, stats: dict):
+        """Create a fake model that counts its calls in stats."""
+        self.settings = settings
+        self.stats = stats
+
+    def with_structured_output(self, schema, include_raw=False, **kwargs):
+        """Return a fake bound to an output schema."""
+        return FakeStructuredModel(schema, self.settings, self.stats, include_raw)
+
+    async def ainvoke(self, messages, config=None):
+        """Return a section-like message with simulated usage."""
+        prompt = _prompt(messages)
+        rng = _rng("text", prompt)
+        tokens = self.settings.output_tokens
+        self.stats["calls"] += 1
+        await asyncio.sleep(self.settings.model_latency + tokens * self.settings.seconds_per_token)
+        return AIMessage(
+            content=f"## {_text(rng, 4)}\n\n{_text(rng, tokens)}\n\n### Sources\n[1] https://example.com/{rng.randrange(10**6)}",
+            usage_metadata=_usage(messages, tokens, self.stats["prompt_cache"]),
+        )
+
+
+def _fake_results(query: str, settings: FakeSettings):
+    """Return deterministic search results for a query."""
+    rng = _rng("search", query)
+    results = []
+    for _ in range(settings.results_per_query):
+        page = rng.randrange(10**6)
+        results.append({
+            "title": _text(rng, 5),
+            "url": f"https://example.com/{page}",
+            "content": _text(rng, 60),
+            "score": round(rng.random(), 3),
+            "raw_content": _text(_rng("page", page), settings.raw_content_chars // 7),
+        })
+    return {"query": query, "follow_up_questions": None, "answer": None, "images": [], "results": results}
+
+
+def install(settings: FakeSettings) -> dict:
+    """Replace the chat model factory and every search API with the fakes.
+
+    Args:
+        settings (FakeSettings): Behaviour of the fakes.
+
+    Returns:
+        dict: Counters the fakes update: model calls and search queries, and the simulated prompt cache.
+    """
+    stats = {"calls": 0, "searches": 0, "prompt_cache": set()}
+
+    async def fake_search(query_list, **kwargs):
+        stats["searches"] += len(query_list)
+        await asyncio.sleep(settings.search_latency)
+        return [_fake_results(query, settings) for query in query_list]
+
+    models.clear_chat_models()
+    models.init_chat_model = lambda **kwargs: FakeChatModel(settings, stats)
+    for name in ("tavily", "arxiv", "duckduckgo"):
+        utils.register_search_backend(name, fake_search)
+    return stats
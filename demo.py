@@ -1,9 +1,9 @@
 from IPython.display import Image, display
 from langgraph.types import Command
-from langgraph.checkpoint.memory import MemorySaver
-from open_deep_research.graph import builder
+from open_deep_research.graph import compile_graph
 
 
-memory = MemorySaver()
-graph = builder.compile(checkpointer=memory)
-display(Image(graph.get_graph(xray=1).draw_mermaid_png()))
\ No newline at end of file
+# Checkpoints go to CHECKPOINT_PATH (default ~/.cache/open_deep_research/checkpoints.sqlite),
+# so an interrupted report can be resumed after a restart with the same thread_id
+graph = compile_graph()
+display(Image(graph.get_graph(xray=1).draw_mermaid_png()))
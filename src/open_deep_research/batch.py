@@ -0,0 +1,242 @@
+"""Generate reports for many topics at once.
+
+Reads topics from a JSONL file, one object per line:
+
+    {"topic": "...", "id": "optional-stable-id", "feedback": ["optional plan feedback", ...], "config": {...}}
+
+Each topic runs through the report graph under a global concurrency cap.
+Plans are approved automatically, after the scripted feedback (if any) has
+been given. Every run's result, timings, token usage and search counts are appended to the output JSONL
+as soon as it finishes, and a "feedback" line is written each time a scripted
+feedback entry is given. Rerunning with the same output file skips topics that
+already succeeded, and failed topics continue from their last checkpoint and
+from the first feedback entry they had not used yet.
+
+Usage:
+    python -m open_deep_research.batch topics.jsonl --output reports.jsonl --concurrency 8
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from langgraph.types import Command
+
+from open_deep_research.cache import search_flight
+from open_deep_research.graph import compile_graph
+from open_deep_research.metrics import track_usage
+from open_deep_research.stream import astream_report
+
+logger = logging.getLogger(__name__)
+
+
+def topic_id(item: Dict[str, Any]) -> str:
+    """Return a topic's id, derived from the topic text if the line does not give one."""
+    if item.get("id") is not None:
+        return str(item["id"])
+    return hashlib.sha256(item["topic"].encode("utf-8")).hexdigest()[:16]
+
+
+def read_topics(path: str) -> List[Dict[str, Any]]:
+    """Read topics from a JSONL file, skipping blank lines.
+
+    Args:
+        path (str): The JSONL file.
+
+    Returns:
+        List[Dict[str, Any]]: One dict per topic, each with at least a "topic" key.
+    """
+    topics = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if not isinstance(item, dict) or not item.get("topic"):
+                raise ValueError(f"{path}:{line_number}: expected an object with a 'topic'")
+            topics.append(item)
+    return topics
+
+
+def read_progress(path: str) -> Tuple[Set[str], Dict[str, Tuple[int, Optional[str]]]]:
+    """Collect which topics already have a successful result, and how far the others got with their feedback.
+
+    Args:
+        path (str): The output JSONL file, which may not exist yet.
+
+    Returns:
+        Tuple[Set[str], Dict[str, Tuple[int, Optional[str]]]]: Ids whose latest result has status "ok",
+            and per id the number of feedback entries given with the checkpoint the last one was given at.
+    """
+    finished: Set[str] = set()
+    feedback: Dict[str, Tuple[int, Optional[str]]] = {}
+    if not os.path.exists(path):
+        return finished, feedback
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a crash; that topic simply runs again
+                continue
+            if result.get("status") == "ok":
+                finished.add(result["id"])
+                continue
+            finished.discard(result.get("id"))
+            if result.get("status") == "feedback":
+                feedback[result["id"]] = (result["feedback_given"], result.get("checkpoint_id"))
+    return finished, feedback
+
+
+class BatchRunner:
+    """Run the report graph for many topics under one concurrency cap.
+
+    All runs share one compiled graph, so they also share its checkpointer
+    and the process-wide search cache, in-flight search coalescing, model
+    clients and provider rate limits.
+    """
+
+    def __init__(self, output_path: str, concurrency: int = 4, configurable: Optional[Dict[str, Any]] = None, graph: Any = None):
+        """Set up a batch.
+
+        Args:
+            output_path (str): JSONL file results are appended to.
+            concurrency (int): Maximum number of reports generated at once.
+            configurable (Optional[Dict[str, Any]]): Configuration shared by every run, overridden per topic by its "config".
+            graph (Any): The compiled graph, by default one compiled with the configured durable checkpointer.
+        """
+        self.output_path = output_path
+        self.configurable = configurable or {}
+        self.graph = graph or compile_graph({"configurable": self.configurable})
+        self.concurrency = concurrency
+        # Feedback entries each topic has used, from the output of earlier attempts
+        self._feedback_progress: Dict[str, Tuple[int, Optional[str]]] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+
+    def _ensure_primitives(self) -> None:
+        """Create the semaphore and lock on first use, inside the running event loop."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._write_lock = asyncio.Lock()
+
+    async def _write(self, result: Dict[str, Any]) -> None:
+        """Append one result line and flush it, so finished work survives a crash."""
+        async with self._write_lock:
+            with open(self.output_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    async def _run_stage(self, input: Any, config: Dict[str, Any], start: float, timings: Dict[str, Any]) -> None:
+        """Stream one leg of a run (up to an interrupt or the end), recording when plans and sections arrive."""
+        async for kind, value in astream_report(self.graph, input, config):
+            elapsed = round(time.perf_counter() - start, 3)
+            if kind == "plan":
+                timings.setdefault("plans", []).append(elapsed)
+            elif kind == "section":
+                timings.setdefault("sections", {})[value.name] = elapsed
+
+    async def run_topic(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate the report for one topic and record the result.
+
+        Args:
+            item (Dict[str, Any]): A line from the topics file.
+
+        Returns:
+            Dict[str, Any]: The result written to the output file.
+        """
+        run_id = topic_id(item)
+        feedback = list(item.get("feedback") or [])
+        config = {"configurable": {**self.configurable, **(item.get("config") or {}), "thread_id": f"batch-{run_id}"}}
+        timings: Dict[str, Any] = {}
+        result: Dict[str, Any] = {"id": run_id, "topic": item["topic"]}
+
+        self._ensure_primitives()
+        async with self._semaphore:
+            start = time.perf_counter()
+            with track_usage() as usage, search_flight.track() as searches:
+                try:
+                    # Continue from the last checkpoint if an earlier attempt got partway
+                    state = await self.graph.aget_state(config)
+                    used, given_at = self._feedback_progress.get(run_id, (0, None)) if state.values else (0, None)
+                    if state.next and not any(task.interrupts for task in state.tasks):
+                        result["resumed"] = True
+                        await self._run_stage(None, config, start, timings)
+                    elif not state.next and not state.values.get("final_report"):
+                        await self._run_stage({"topic": item["topic"]}, config, start, timings)
+                    elif state.config["configurable"].get("checkpoint_id") == given_at:
+                        # The last feedback was recorded, but the attempt stopped before the graph took it
+                        result["resumed"] = True
+                        used -= 1
+
+                    # Give the unused scripted feedback, then approve, each time the plan is up for review
+                    for _ in range(len(feedback) - used + 2):
+                        state = await self.graph.aget_state(config)
+                        if not any(task.interrupts for task in state.tasks):
+                            break
+                        if used < len(feedback):
+                            used += 1
+                            # Recorded first, so a crash cannot make a retry give the same feedback twice
+                            await self._write({"id": run_id, "status": "feedback", "feedback_given": used,
+                                               "checkpoint_id": state.config["configurable"].get("checkpoint_id")})
+                            resume = feedback[used - 1]
+                        else:
+                            resume = True
+                        await self._run_stage(Command(resume=resume), config, start, timings)
+                    else:
+                        raise RuntimeError("Report plan was still awaiting feedback after it was approved")
+
+                    state = await self.graph.aget_state(config)
+                    result.update(status="ok", final_report=state.values.get("final_report", ""))
+                except Exception as e:
+                    logger.warning("Report for topic %s failed: %s", run_id, e)
+                    result.update(status="error", error=f"{type(e).__name__}: {e}")
+
+            timings["total"] = round(time.perf_counter() - start, 3)
+            result["timings"] = timings
+            # Token totals of this attempt, with the share of prompt tokens read from the provider's cache
+            result["usage"] = usage
+            # Searches this attempt sent, and duplicate calls it saved by joining searches already in flight
+            result["searches"] = searches
+            await self._write(result)
+            return result
+
+    async def run(self, topics: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Generate reports for every topic that does not already have one.
+
+        Args:
+            topics (List[Dict[str, Any]]): Lines from the topics file.
+
+        Returns:
+            Dict[str, int]: Numbers of topics skipped, succeeded and failed.
+        """
+        finished, self._feedback_progress = read_progress(self.output_path)
+        pending = [item for item in topics if topic_id(item) not in finished]
+        results = await asyncio.gather(*(self.run_topic(item) for item in pending))
+        succeeded = sum(result["status"] == "ok" for result in results)
+        return {"skipped": len(topics) - len(pending), "succeeded": succeeded, "failed": len(results) - succeeded}
+
+
+def main():
+    """Run the batch described by the command line and log a summary."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("topics", help="JSONL file with one topic per line")
+    parser.add_argument("--output", "-o", default="reports.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", "-c", type=int, default=4, help="Maximum number of reports generated at once")
+    parser.add_argument("--config", default="{}", help="JSON object of configuration shared by every run")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    runner = BatchRunner(args.output, args.concurrency, json.loads(args.config))
+    summary = asyncio.run(runner.run(read_topics(args.topics)))
+    logger.info("%d succeeded, %d failed, %d already done", summary["succeeded"], summary["failed"], summary["skipped"])
+
+
+if __name__ == "__main__":
+    main()
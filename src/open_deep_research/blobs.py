@@ -0,0 +1,229 @@
+"""Content-addressed storage for large source text kept out of graph state."""
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BLOB_STORE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "open_deep_research", "blobs"
+)
+# Blobs neither written nor re-stored for this long are deleted when the store is opened
+DEFAULT_BLOB_MAX_AGE = 30 * 24 * 60 * 60
+
+# References look like "blob:sha256:<hex digest>"
+BLOB_REF_PREFIX = "blob:sha256:"
+# The digest becomes a file path, so nothing but 64 lowercase hex digits is accepted
+BLOB_REF_PATTERN = re.compile(r"blob:sha256:[0-9a-f]{64}")
+
+
+def is_blob_ref(value: Any) -> bool:
+    """Return True if value is a reference into a blob store."""
+    return isinstance(value, str) and BLOB_REF_PATTERN.fullmatch(value) is not None
+
+
+class BlobStore:
+    """Content-addressed store for large text kept out of graph state.
+
+    Each text is written once to a file named by its SHA-256 digest, and graph
+    state carries only the short reference returned by put(). Identical text,
+    such as the same source found by two sections or the same context sent to
+    every final section writer, is stored a single time. Files are written
+    atomically, so concurrent writers of the same text are harmless. Opening
+    the store prunes blobs unused for max_age in a background thread.
+    """
+
+    def __init__(self, root: str = DEFAULT_BLOB_STORE_DIR, max_age: Optional[float] = DEFAULT_BLOB_MAX_AGE):
+        """Open the store, creating its directory if needed.
+
+        Args:
+            root (str): Directory the blobs are written to.
+            max_age (Optional[float]): Seconds an unused blob is kept; longer than any checkpoint you may still resume. None keeps every blob.
+        """
+        self.root = root
+        self.max_age = max_age
+        self.writes = 0
+        self.reads = 0
+        self.bytes_written = 0
+        self.pruned = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        if max_age is not None:
+            # Walking a large store takes a while; graph nodes should not wait for it
+            threading.Thread(target=self._prune_on_open, daemon=True).start()
+
+    def _prune_on_open(self) -> None:
+        """Prune blobs older than max_age, logging instead of raising."""
+        try:
+            deleted = self.prune(self.max_age)
+        except OSError as e:
+            logger.warning("Pruning blob store %s failed: %s", self.root, e)
+            return
+        if deleted:
+            logger.info("Pruned %d unused blobs from %s", deleted, self.root)
+
+    def _path(self, digest: str) -> str:
+        """Return the file holding a digest, fanned out over 256 subdirectories."""
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def put(self, text: str) -> str:
+        """Store text, unless it is already stored.
+
+        Args:
+            text (str): The text to store.
+
+        Returns:
+            str: A reference to pass to get().
+        """
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+
+        if os.path.exists(path):
+            # Refresh the modification time so prune() sees the blob as in use
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            with self._lock:
+                self.writes += 1
+                self.bytes_written += len(data)
+
+        return BLOB_REF_PREFIX + digest
+
+    def get(self, ref: str) -> str:
+        """Read the text behind a reference.
+
+        Args:
+            ref (str): A reference returned by put().
+
+        Returns:
+            str: The stored text.
+
+        Raises:
+            KeyError: If the reference is malformed or its blob is not in this store.
+        """
+        if not is_blob_ref(ref):
+            raise KeyError(f"Not a blob reference: {ref[:80]!r}")
+        try:
+            with open(self._path(ref[len(BLOB_REF_PREFIX):]), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            raise KeyError(f"Blob {ref} not found in {self.root}") from None
+        with self._lock:
+            self.reads += 1
+        return data.decode("utf-8")
+
+    def resolve(self, value: Any) -> Any:
+        """Return the text behind value if it is a reference, else value unchanged."""
+        return self.get(value) if is_blob_ref(value) else value
+
+    def prune(self, max_age: float) -> int:
+        """Delete blobs that were neither written nor re-stored for max_age seconds.
+
+        Only run this with a max_age longer than any checkpoint you may still resume.
+
+        Args:
+            max_age (float): Age in seconds after which an unused blob is deleted.
+
+        Returns:
+            int: The number of blobs deleted.
+        """
+        cutoff = time.time() - max_age
+        deleted = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.unlink(path)
+                        deleted += 1
+                except FileNotFoundError:
+                    continue
+        with self._lock:
+            self.pruned += deleted
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        """Report blob store counters.
+
+        Returns:
+            Dict[str, int]: Blobs written, bytes written, blobs read and blobs pruned by this process.
+        """
+        with self._lock:
+            return {"writes": self.writes, "bytes_written": self.bytes_written, "reads": self.reads, "pruned": self.pruned}
+
+
+_blob_stores: Dict[str, BlobStore] = {}
+_blob_stores_lock = threading.Lock()
+
+
+def get_blob_store(root: Optional[str] = DEFAULT_BLOB_STORE_DIR,
+                   max_age: Optional[float] = DEFAULT_BLOB_MAX_AGE) -> Optional[BlobStore]:
+    """Return the process-wide blob store for a directory, creating it on first use.
+
+    Args:
+        root (Optional[str]): The store's directory. An empty string or None disables the store.
+        max_age (Optional[float]): Seconds an unused blob is kept, applied when the store is first opened. None keeps every blob.
+
+    Returns:
+        Optional[BlobStore]: The shared store, or None when disabled.
+    """
+    if not root:
+        return None
+    root = os.path.abspath(os.path.expanduser(root))
+    with _blob_stores_lock:
+        store = _blob_stores.get(root)
+        if store is None:
+            store = _blob_stores[root] = BlobStore(root, max_age)
+        return store
+
+
+def store_text(text: str, blob_store: Optional[BlobStore]) -> str:
+    """Move text into the blob store, returning the reference to keep in state.
+
+    Args:
+        text (str): The text to store.
+        blob_store (Optional[BlobStore]): The store, or None to keep the text inline.
+
+    Returns:
+        str: The reference, or the text itself when there is no store or it is empty.
+    """
+    if blob_store is None or not text:
+        return text
+    return blob_store.put(text)
+
+
+def load_text(value: str, blob_store: Optional[BlobStore]) -> str:
+    """Resolve a value from state that may be a blob reference.
+
+    Args:
+        value (str): Inline text or a reference from store_text.
+        blob_store (Optional[BlobStore]): The store the reference was written to.
+
+    Returns:
+        str: The text.
+
+    Raises:
+        KeyError: If value is a reference but no store is configured.
+    """
+    if not is_blob_ref(value):
+        return value
+    if blob_store is None:
+        raise KeyError(f"State holds blob reference {value} but no blob store is configured")
+    return blob_store.get(value)
@@ -0,0 +1,448 @@
+"""Persistent search response cache, and coalescing of identical in-flight searches."""
+
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional
+
+from open_deep_research.metrics import registry
+
+DEFAULT_SEARCH_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "open_deep_research", "search_cache.sqlite"
+)
+
+# How long a cached response stays valid for each search API, in seconds.
+# Web results go stale quickly, arXiv papers do not.
+DEFAULT_SEARCH_CACHE_TTLS = {
+    "tavily": 6 * 60 * 60,
+    "duckduckgo": 6 * 60 * 60,
+    "arxiv": 7 * 24 * 60 * 60,
+}
+DEFAULT_SEARCH_CACHE_TTL = 60 * 60
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so trivially different spellings share a cache entry.
+
+    Args:
+        query (str): The raw search query.
+
+    Returns:
+        str: The query lower-cased with whitespace collapsed.
+    """
+    return " ".join(query.lower().split())
+
+
+def make_cache_key(search_api: str, query: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Build a stable cache key for a single search query.
+
+    Args:
+        search_api (str): The name of the search API (e.g., "tavily", "arxiv").
+        query (str): The search query.
+        params (Optional[Dict[str, Any]]): The filtered parameters from get_search_params.
+
+    Returns:
+        str: A hex digest identifying the (search_api, normalized query, params) triple.
+    """
+    payload = json.dumps([search_api, normalize_query(query), params or {}], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SearchCache:
+    """Two-level cache for search API responses.
+
+    Responses are cached per query. The first level is a bounded in-memory LRU,
+    the second an optional SQLite file that survives restarts. Entries expire
+    after a per-search-API TTL, and the file is trimmed back under max_disk_bytes
+    by evicting the least recently used entries. Coroutines use aget() and
+    aset(), which do the SQLite work in a worker thread.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_SEARCH_CACHE_PATH,
+        max_memory_entries: int = 1024,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        ttls: Optional[Dict[str, float]] = None,
+    ):
+        """Open the cache, creating the SQLite file if needed.
+
+        Args:
+            path (Optional[str]): Location of the SQLite file. None keeps the cache in memory only.
+            max_memory_entries (int): Maximum number of responses held in the in-memory LRU.
+            max_disk_bytes (int): Approximate size budget for the responses stored on disk.
+            ttls (Optional[Dict[str, float]]): Per-search-API TTLs in seconds, merged over the defaults.
+        """
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttls = {**DEFAULT_SEARCH_CACHE_TTLS, **(ttls or {})}
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS search_cache (
+                    key TEXT PRIMARY KEY,
+                    search_api TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_access ON search_cache (last_access)")
+            self._conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (time.time(),))
+            self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM search_cache").fetchone()[0]
+
+    def ttl_for(self, search_api: str) -> float:
+        """Return the TTL in seconds used for responses from search_api."""
+        return self.ttls.get(search_api, DEFAULT_SEARCH_CACHE_TTL)
+
+    def get(self, search_api: str, query: str, params: Optional[Dict[str, Any]] = None) -> Optional[dict]:
+        """Look up the cached response for a query.
+
+        Args:
+            search_api (str): The name of the search API.
+            query (str): The search query.
+            params (Optional[Dict[str, Any]]): The filtered parameters for the search API.
+
+        Returns:
+            Optional[dict]: The cached search response, or None on a miss or expired entry.
+        """
+        key = make_cache_key(search_api, query, params)
+        now = time.time()
+
+        with self._lock:
+            response = self._get_memory(key, now)
+            if response is None:
+                response = self._get_disk(key, now)
+            return response
+
+    async def aget(self, search_api: str, query: str, params: Optional[Dict[str, Any]] = None) -> Optional[dict]:
+        """Look up the cached response for a query without blocking the event loop.
+
+        The in-memory LRU is checked directly; only a lookup that has to read
+        the SQLite file runs in a worker thread.
+
+        Args:
+            search_api (str): The name of the search API.
+            query (str): The search query.
+            params (Optional[Dict[str, Any]]): The filtered parameters for the search API.
+
+        Returns:
+            Optional[dict]: The cached search response, or None on a miss or expired entry.
+        """
+        key = make_cache_key(search_api, query, params)
+        now = time.time()
+
+        with self._lock:
+            response = self._get_memory(key, now)
+            if response is not None or self._conn is None:
+                if response is None:
+                    self.misses += 1
+                return response
+        return await asyncio.to_thread(self._get_disk_locked, key, now)
+
+    def _get_memory(self, key: str, now: float) -> Optional[dict]:
+        """Return a live entry from the in-memory LRU, counting it as a hit. Caller holds the lock."""
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= now:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def _get_disk(self, key: str, now: float) -> Optional[dict]:
+        """Return a live entry from the SQLite file, counting the lookup as a hit or a miss. Caller holds the lock."""
+        if self._conn is not None:
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] > now:
+                response = json.loads(row[0])
+                self._conn.execute("UPDATE search_cache SET last_access = ? WHERE key = ?", (now, key))
+                self._remember(key, row[1], response)
+                self.hits += 1
+                self.disk_hits += 1
+                return response
+
+        self.misses += 1
+        return None
+
+    def _get_disk_locked(self, key: str, now: float) -> Optional[dict]:
+        """Run _get_disk under the lock, for use from a worker thread."""
+        with self._lock:
+            return self._get_disk(key, now)
+
+    def set(self, search_api: str, query: str, params: Optional[Dict[str, Any]], response: dict) -> None:
+        """Store the response for a query in memory and, if configured, on disk.
+
+        Args:
+            search_api (str): The name of the search API.
+            query (str): The search query.
+            params (Optional[Dict[str, Any]]): The filtered parameters for the search API.
+            response (dict): The search response to cache.
+        """
+        key = make_cache_key(search_api, query, params)
+        now = time.time()
+        expires_at = now + self.ttl_for(search_api)
+
+        with self._lock:
+            self._remember(key, expires_at, response)
+
+            if self._conn is not None:
+                payload = json.dumps(response, default=str)
+                size = len(payload)
+                old = self._conn.execute("SELECT size FROM search_cache WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, search_api, normalize_query(query), payload, size, expires_at, now),
+                )
+                self._disk_bytes += size - (old[0] if old else 0)
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict_disk(now)
+
+    async def aset(self, search_api: str, query: str, params: Optional[Dict[str, Any]], response: dict) -> None:
+        """Store the response for a query like set(), writing the SQLite file in a worker thread.
+
+        Args:
+            search_api (str): The name of the search API.
+            query (str): The search query.
+            params (Optional[Dict[str, Any]]): The filtered parameters for the search API.
+            response (dict): The search response to cache.
+        """
+        if self._conn is None:
+            self.set(search_api, query, params, response)
+        else:
+            await asyncio.to_thread(self.set, search_api, query, params, response)
+
+    def _remember(self, key: str, expires_at: float, response: dict) -> None:
+        """Insert into the in-memory LRU, dropping the least recently used entries. Caller holds the lock."""
+        self._memory[key] = (expires_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _evict_disk(self, now: float) -> None:
+        """Trim the SQLite store to 90% of max_disk_bytes. Caller holds the lock."""
+        self._conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,))
+        self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM search_cache").fetchone()[0]
+
+        target = int(self.max_disk_bytes * 0.9)
+        if self._disk_bytes <= target:
+            return
+
+        freed = 0
+        stale_keys = []
+        for key, size in self._conn.execute("SELECT key, size FROM search_cache ORDER BY last_access"):
+            if self._disk_bytes - freed <= target:
+                break
+            stale_keys.append((key,))
+            freed += size
+
+        self._conn.executemany("DELETE FROM search_cache WHERE key = ?", stale_keys)
+        self._disk_bytes -= freed
+        self.evictions += len(stale_keys)
+
+    def clear(self) -> None:
+        """Drop every cached response from memory and disk."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM search_cache")
+                self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Report cache counters.
+
+        Returns:
+            Dict[str, Any]: Hits, misses, disk hits, evictions, hit rate and current sizes.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+_search_caches: Dict[Optional[str], SearchCache] = {}
+_search_caches_lock = threading.Lock()
+
+
+def get_search_cache(path: Optional[str] = DEFAULT_SEARCH_CACHE_PATH) -> SearchCache:
+    """Return the process-wide search cache for a given file, creating it on first use.
+
+    Args:
+        path (Optional[str]): Location of the SQLite file, or None for a memory-only cache.
+
+    Returns:
+        SearchCache: The shared cache instance for that location.
+    """
+    with _search_caches_lock:
+        cache = _search_caches.get(path)
+        if cache is None:
+            cache = _search_caches[path] = SearchCache(path)
+        return cache
+
+
+class FlightAbandoned(Exception):
+    """Raised to callers waiting on an in-flight search whose leader was cancelled."""
+
+
+class SingleFlight:
+    """Coalesce concurrent identical searches onto one shared future.
+
+    The first caller to claim a key becomes its leader and runs the search; any
+    caller claiming the same key before the leader resolves it awaits the
+    leader's result instead of issuing a duplicate request. Counts are kept
+    for the whole process and, inside track(), for each run.
+    """
+
+    def __init__(self):
+        """Create an empty coalescer with zeroed counters."""
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls: Dict[tuple, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._run_counts: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar(
+            f"odr_search_flight_{id(self)}", default=None
+        )
+
+    @contextlib.contextmanager
+    def track(self) -> Iterator[Dict[str, int]]:
+        """Count the searches led and the calls coalesced inside the block, e.g. one report run.
+
+        As with metrics.track_usage, tasks started inside the block inherit the
+        counts through their context, so concurrent runs are counted apart.
+
+        Yields:
+            Dict[str, int]: Searches led and calls coalesced onto them so far.
+        """
+        counts = {"searches": 0, "coalesced": 0}
+        token = self._run_counts.set(counts)
+        try:
+            yield counts
+        finally:
+            self._run_counts.reset(token)
+
+    def claim(self, key: str) -> "tuple[asyncio.Future, bool]":
+        """Join the in-flight call for a key, or start a new one.
+
+        Args:
+            key (str): The cache key of the search.
+
+        Returns:
+            tuple[asyncio.Future, bool]: The shared future, and whether the caller is its leader
+                and must resolve it with resolve() or abandon().
+        """
+        loop = asyncio.get_running_loop()
+        run_counts = self._run_counts.get()
+        with self._lock:
+            future = self._calls.get((id(loop), key))
+            if future is not None:
+                self.coalesced += 1
+                if run_counts is not None:
+                    run_counts["coalesced"] += 1
+                return future, False
+            future = self._calls[(id(loop), key)] = loop.create_future()
+            self.leaders += 1
+            if run_counts is not None:
+                run_counts["searches"] += 1
+            return future, True
+
+    def _pop(self, key: str) -> "Optional[asyncio.Future]":
+        """Remove and return the in-flight future for a key on the running loop."""
+        with self._lock:
+            return self._calls.pop((id(asyncio.get_running_loop()), key), None)
+
+    def resolve(self, key: str, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Hand the leader's result, or exception, to every caller waiting on a key.
+
+        Args:
+            key (str): The cache key of the search.
+            result (Any): The search response.
+            error (Optional[BaseException]): The exception raised by the search, if it failed.
+        """
+        future = self._pop(key)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+            future.exception()  # Mark as retrieved so an unawaited failure is not logged
+        else:
+            future.set_result(result)
+
+    def abandon(self, key: str) -> None:
+        """Release waiters on a key whose leader was cancelled, so they can search themselves."""
+        self.resolve(key, error=FlightAbandoned(key))
+
+    async def wait(self, future: "asyncio.Future") -> Any:
+        """Await a shared future without letting this caller's cancellation cancel it for the others.
+
+        Raises:
+            FlightAbandoned: If the leader was cancelled before producing a result.
+        """
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report how many searches ran and how many duplicate calls were saved, over the whole process.
+
+        Use track() for the counts of a single run.
+
+        Returns:
+            Dict[str, Any]: Searches led, calls coalesced onto them, and calls currently in flight.
+        """
+        with self._lock:
+            return {"searches": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+# Shared by every graph branch in the process
+search_flight = SingleFlight()
+
+
+def search_cache_stats() -> Dict[str, float]:
+    """Sum the counters of every search cache opened in this process."""
+    totals: Dict[str, float] = {}
+    for cache in list(_search_caches.values()):
+        for key, value in cache.stats().items():
+            if key != "hit_rate":
+                totals[key] = totals.get(key, 0) + value
+    lookups = totals.get("hits", 0) + totals.get("misses", 0)
+    totals["hit_rate"] = totals.get("hits", 0) / lookups if lookups else 0.0
+    return totals
+
+
+registry.register_collector("odr_search_cache", search_cache_stats)
+registry.register_collector("odr_search_flight", search_flight.stats)
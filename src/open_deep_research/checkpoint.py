@@ -0,0 +1,598 @@
+"""Durable SQLite checkpointer with batched writes and per-thread retention."""
+
+import asyncio
+import atexit
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "open_deep_research", "checkpoints.sqlite"
+)
+DEFAULT_CHECKPOINTS_TO_KEEP = 10
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    """File-backed LangGraph checkpointer, so interrupted reports survive a restart.
+
+    Checkpoints are stored in a SQLite file in WAL mode. Channel values are
+    stored once per channel version and shared by every checkpoint that
+    references them, so a checkpoint that only changes one channel only
+    writes that channel.
+
+    Writes are batched: they go into an open transaction that is committed
+    once commit_interval seconds have passed since the first uncommitted write,
+    or when max_batch writes are pending, flush() is called or the
+    checkpointer is closed. A crash can lose at most that window; readers in
+    this process always see their own uncommitted writes.
+
+    Channel versions are unique strings, a step counter with a random suffix,
+    so a branch forked from an older checkpoint writes new channel values
+    instead of overwriting those the original branch still references.
+
+    Only the newest keep_checkpoints checkpoints of each thread and namespace
+    are retained. Older ones are compacted away together with their pending
+    writes and any channel values no retained checkpoint references, which
+    keeps the file from growing with every step of a long report. History
+    before the retained window is no longer available for time travel.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CHECKPOINT_PATH,
+        keep_checkpoints: Optional[int] = DEFAULT_CHECKPOINTS_TO_KEEP,
+        commit_interval: float = 0.05,
+        max_batch: int = 256,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        """Open the checkpointer, creating the SQLite file if needed.
+
+        Args:
+            path (str): Location of the SQLite file. ":memory:" keeps everything in memory.
+            keep_checkpoints (Optional[int]): Checkpoints retained per thread and namespace, None to keep all.
+            commit_interval (float): Longest time in seconds a write may stay uncommitted.
+            max_batch (int): Number of pending writes that forces a commit.
+            serde (Optional[SerializerProtocol]): Serializer for checkpoints and channel values.
+        """
+        super().__init__(serde=serde)
+        self.path = path
+        self.keep_checkpoints = keep_checkpoints
+        self.commit_interval = commit_interval
+        self.max_batch = max_batch
+
+        self.commits = 0
+        self.compactions = 0
+
+        self._lock = threading.RLock()
+        self._pending = 0
+        self._timer: Optional[threading.Timer] = None
+        self._puts_since_compaction: Dict[Tuple[str, str], int] = {}
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT NOT NULL,
+                checkpoint BLOB NOT NULL,
+                metadata_type TEXT NOT NULL,
+                metadata BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS checkpoint_channels (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, channel)
+            );
+            CREATE INDEX IF NOT EXISTS idx_checkpoint_channels_version
+                ON checkpoint_channels (thread_id, checkpoint_ns, channel, version);
+            CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT NOT NULL,
+                blob BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS checkpoint_writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            """
+        )
+
+    # Transactions --
+
+    def _begin_write(self) -> None:
+        """Open the batch transaction if none is open. Caller holds the lock."""
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN")
+            self._timer = threading.Timer(self.commit_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _end_write(self, count: int = 1) -> None:
+        """Count writes into the batch and commit it once it is full. Caller holds the lock."""
+        self._pending += count
+        if self._pending >= self.max_batch:
+            self._commit()
+
+    def _commit(self) -> None:
+        """Commit the open batch. Caller holds the lock."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._conn.in_transaction:
+            self._conn.execute("COMMIT")
+            self.commits += 1
+        self._pending = 0
+
+    def flush(self) -> None:
+        """Commit every pending write to disk."""
+        with self._lock:
+            self._commit()
+
+    def close(self) -> None:
+        """Commit pending writes and close the database."""
+        with self._lock:
+            self._commit()
+            self._conn.close()
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        """Return a new version for a channel, unique even when forking from an older checkpoint.
+
+        Args:
+            current (Optional[str]): The channel's current version.
+            channel (None): Unused, kept for the BaseCheckpointSaver signature.
+
+        Returns:
+            str: A zero-padded step counter followed by a random fraction, so versions still sort by step.
+        """
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # Reads --
+
+    def _load_tuple(self, thread_id: str, checkpoint_ns: str, row: tuple) -> CheckpointTuple:
+        """Rebuild a CheckpointTuple from a checkpoints row. Caller holds the lock."""
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint_blob, metadata_type, metadata_blob = row
+        checkpoint = self.serde.loads_typed((type_, checkpoint_blob))
+
+        channel_values = {}
+        for channel, blob_type, blob in self._conn.execute(
+            """SELECT b.channel, b.type, b.blob
+               FROM checkpoint_channels c
+               JOIN checkpoint_blobs b
+                 ON b.thread_id = c.thread_id AND b.checkpoint_ns = c.checkpoint_ns
+                AND b.channel = c.channel AND b.version = c.version
+               WHERE c.thread_id = ? AND c.checkpoint_ns = ? AND c.checkpoint_id = ?""",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ):
+            if blob_type != "empty":
+                channel_values[channel] = self.serde.loads_typed((blob_type, blob))
+
+        pending_writes = [
+            (task_id, channel, self.serde.loads_typed((value_type, value)))
+            for task_id, channel, value_type, value in self._conn.execute(
+                """SELECT task_id, channel, type, value FROM checkpoint_writes
+                   WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+                   ORDER BY task_id, idx""",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+        ]
+
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_checkpoint_id}}
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=pending_writes,
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get the checkpoint named by config, or the thread's latest if it names none.
+
+        Args:
+            config (RunnableConfig): Config with a thread_id and optionally a checkpoint_ns and checkpoint_id.
+
+        Returns:
+            Optional[CheckpointTuple]: The checkpoint, or None if there is none.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    f"""SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+                        ORDER BY checkpoint_id DESC LIMIT 1""",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            return self._load_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first.
+
+        Args:
+            config (Optional[RunnableConfig]): Restrict to a thread, and optionally a namespace and checkpoint.
+            filter (Optional[Dict[str, Any]]): Metadata fields the checkpoints must match.
+            before (Optional[RunnableConfig]): Only list checkpoints older than this one.
+            limit (Optional[int]): Maximum number of checkpoints to list.
+
+        Yields:
+            CheckpointTuple: The matching checkpoints.
+        """
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        # Materialize under the lock so callers can interleave writes while iterating
+        with self._lock:
+            rows = self._conn.execute(
+                f"""SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata
+                    FROM checkpoints {where} ORDER BY checkpoint_id DESC""",
+                params,
+            ).fetchall()
+
+            results = []
+            for thread_id, checkpoint_ns, *row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                if filter:
+                    metadata = self.serde.loads_typed((row[4], row[5]))
+                    if not all(metadata.get(key) == value for key, value in filter.items()):
+                        continue
+                results.append(self._load_tuple(thread_id, checkpoint_ns, tuple(row)))
+
+        yield from results
+
+    # Writes --
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint and the channel values that changed with it.
+
+        Args:
+            config (RunnableConfig): Config of the parent checkpoint.
+            checkpoint (Checkpoint): The checkpoint to save.
+            metadata (CheckpointMetadata): Metadata for the checkpoint.
+            new_versions (ChannelVersions): Channels whose values changed in this checkpoint.
+
+        Returns:
+            RunnableConfig: Config pointing at the saved checkpoint.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = checkpoint["id"]
+
+        saved = checkpoint.copy()
+        values = saved.pop("channel_values")
+        blobs = [
+            (thread_id, checkpoint_ns, channel, str(version), *(
+                self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)
+            ))
+            for channel, version in new_versions.items()
+        ]
+        channels = [
+            (thread_id, checkpoint_ns, checkpoint_id, channel, str(version))
+            for channel, version in checkpoint["channel_versions"].items()
+        ]
+        type_, checkpoint_blob = self.serde.dumps_typed(saved)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self._lock:
+            self._begin_write()
+            # Versions are unique, so an existing row already holds this value; never overwrite it
+            self._conn.executemany("INSERT OR IGNORE INTO checkpoint_blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+            self._conn.executemany("INSERT OR REPLACE INTO checkpoint_channels VALUES (?, ?, ?, ?, ?)", channels)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint_id, config["configurable"].get("checkpoint_id"),
+                 type_, checkpoint_blob, metadata_type, metadata_blob, time.time()),
+            )
+            self._maybe_compact(thread_id, checkpoint_ns)
+            self._end_write()
+
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save the writes a task produced against a checkpoint.
+
+        Args:
+            config (RunnableConfig): Config of the checkpoint the writes belong to.
+            writes (Sequence[Tuple[str, Any]]): (channel, value) pairs.
+            task_id (str): The task that produced the writes.
+            task_path (str): Path of the task that produced the writes.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        # Special channels (errors, interrupts, ...) are replaced, regular writes are kept as first written
+        replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        rows = [
+            (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel,
+             *self.serde.dumps_typed(value), task_path)
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        with self._lock:
+            self._begin_write()
+            self._conn.executemany(
+                f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO checkpoint_writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._end_write(len(rows))
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint and write of a thread.
+
+        Args:
+            thread_id (str): The thread to delete.
+        """
+        with self._lock:
+            self._begin_write()
+            for table in ("checkpoints", "checkpoint_channels", "checkpoint_blobs", "checkpoint_writes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._puts_since_compaction = {key: n for key, n in self._puts_since_compaction.items() if key[0] != thread_id}
+            self._end_write()
+
+    # Retention --
+
+    def _maybe_compact(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Compact a namespace once it has grown by keep_checkpoints since the last compaction. Caller holds the lock."""
+        if self.keep_checkpoints is None:
+            return
+        key = (thread_id, checkpoint_ns)
+        self._puts_since_compaction[key] = self._puts_since_compaction.get(key, 0) + 1
+        if self._puts_since_compaction[key] >= max(self.keep_checkpoints, 1):
+            self._puts_since_compaction[key] = 0
+            self._compact(thread_id, checkpoint_ns, self.keep_checkpoints)
+
+    def _compact(self, thread_id: str, checkpoint_ns: str, keep: int) -> None:
+        """Drop all but the newest keep checkpoints of a namespace. Caller holds the lock and an open transaction."""
+        cutoff = self._conn.execute(
+            """SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+               ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?""",
+            (thread_id, checkpoint_ns, max(keep, 1) - 1),
+        ).fetchone()
+        if cutoff is None:
+            return
+
+        params = (thread_id, checkpoint_ns, cutoff[0])
+        for table in ("checkpoints", "checkpoint_channels", "checkpoint_writes"):
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?", params
+            )
+        # Channel values written after the cutoff may belong to a checkpoint not saved yet
+        self._conn.execute(
+            """DELETE FROM checkpoint_blobs
+               WHERE thread_id = ? AND checkpoint_ns = ?
+                 AND NOT EXISTS (
+                     SELECT 1 FROM checkpoint_channels c
+                     WHERE c.thread_id = checkpoint_blobs.thread_id AND c.checkpoint_ns = checkpoint_blobs.checkpoint_ns
+                       AND c.channel = checkpoint_blobs.channel AND c.version = checkpoint_blobs.version
+                 )""",
+            params[:2],
+        )
+        self.compactions += 1
+
+    def compact(self, keep: Optional[int] = None) -> None:
+        """Compact every thread now and return freed pages to the file system.
+
+        Args:
+            keep (Optional[int]): Checkpoints to retain per thread and namespace, defaults to keep_checkpoints.
+        """
+        keep = keep if keep is not None else self.keep_checkpoints
+        with self._lock:
+            if keep is not None:
+                self._begin_write()
+                for thread_id, checkpoint_ns in self._conn.execute(
+                    "SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints"
+                ).fetchall():
+                    self._compact(thread_id, checkpoint_ns, keep)
+            self._commit()
+            self._conn.execute("PRAGMA incremental_vacuum")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def prune_threads(self, max_age: float) -> int:
+        """Delete threads whose newest checkpoint is older than max_age seconds.
+
+        Args:
+            max_age (float): Age in seconds after which an idle thread is deleted.
+
+        Returns:
+            int: The number of threads deleted.
+        """
+        cutoff = time.time() - max_age
+        with self._lock:
+            stale = [row[0] for row in self._conn.execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(created_at) < ?", (cutoff,)
+            ).fetchall()]
+            for thread_id in stale:
+                self.delete_thread(thread_id)
+        return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report what the checkpointer holds and how often it committed and compacted.
+
+        Returns:
+            Dict[str, Any]: Row counts, file size in bytes, and commit and compaction counters.
+        """
+        with self._lock:
+            counts = {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("checkpoints", "checkpoint_blobs", "checkpoint_writes")
+            }
+            threads = self._conn.execute("SELECT COUNT(DISTINCT thread_id) FROM checkpoints").fetchone()[0]
+        size = 0
+        if self.path != ":memory:":
+            size = sum(os.path.getsize(p) for p in (self.path, f"{self.path}-wal") if os.path.exists(p))
+        return {"threads": threads, **counts, "bytes": size, "commits": self.commits, "compactions": self.compactions}
+
+    # Async --
+    # SQLite calls are short, so the async methods run the sync ones in a worker thread
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Async version of get_tuple."""
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Async version of list."""
+        results: List[CheckpointTuple] = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for result in results:
+            yield result
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Async version of put."""
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Async version of put_writes."""
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Async version of delete_thread."""
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+_checkpointers: Dict[str, SQLiteCheckpointer] = {}
+_checkpointers_lock = threading.Lock()
+_memory_checkpointer: Optional[MemorySaver] = None
+
+
+def get_checkpointer(path: str = DEFAULT_CHECKPOINT_PATH, keep_checkpoints: Optional[int] = DEFAULT_CHECKPOINTS_TO_KEEP) -> BaseCheckpointSaver:
+    """Return the process-wide checkpointer for a path, opening it on first use.
+
+    Args:
+        path (str): Location of the SQLite file. An empty string returns the process-wide in-memory MemorySaver.
+        keep_checkpoints (Optional[int]): Checkpoints retained per thread and namespace, None to keep all.
+
+    Returns:
+        BaseCheckpointSaver: The checkpointer for that path.
+    """
+    global _memory_checkpointer
+    with _checkpointers_lock:
+        if not path:
+            # One per process, so threads persist across calls and the compiled graph cache stays bounded
+            if _memory_checkpointer is None:
+                _memory_checkpointer = MemorySaver()
+            return _memory_checkpointer
+        path = os.path.abspath(os.path.expanduser(path))
+        checkpointer = _checkpointers.get(path)
+        if checkpointer is None:
+            checkpointer = _checkpointers[path] = SQLiteCheckpointer(path, keep_checkpoints=keep_checkpoints)
+        return checkpointer
+
+
+@atexit.register
+def _flush_checkpointers() -> None:
+    """Commit any batched checkpoint writes before the interpreter exits."""
+    for checkpointer in _checkpointers.values():
+        try:
+            checkpointer.flush()
+        except sqlite3.ProgrammingError:
+            pass
@@ -1,11 +1,17 @@
 import os
+import json
 from enum import Enum
 from dataclasses import dataclass, fields 
-from typing import Any, Optional, Dict 
+from typing import Any, Optional, Dict, Tuple, Union, get_args, get_origin
 
-from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.runnables import RunnableConfig
 
+from open_deep_research.blobs import DEFAULT_BLOB_MAX_AGE
+from open_deep_research.cache import DEFAULT_SEARCH_CACHE_PATH
+from open_deep_research.fetch import DEFAULT_PAGE_CACHE_PATH, PageFetch
+from open_deep_research.checkpoint import DEFAULT_CHECKPOINT_PATH, DEFAULT_CHECKPOINTS_TO_KEEP
+from open_deep_research.utils import SearchHedge, get_search_params
+
 
 DEFAULT_REPORT_STRUCTURE = """Use this structure to create a report on the user-provided topic:
 
@@ -20,8 +26,55 @@ DEFAULT_REPORT_STRUCTURE = """Use this structure to create a report on the user-
    - Provide a concise summary of the report"""
 
 
-class search_API(Enum):
-    Tavily = "tavily"
+# The model slot each role uses when it has no model of its own
+MODEL_ROLE_FALLBACKS = {
+    "planner": "planner",
+    "writer": "writer",
+    "query_writer": "writer",
+    "grader": "planner",
+    "final_writer": "writer",
+}
+
+
+def _enum_value(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+def _from_env(value: str, field_type: Any) -> Any:
+    """Convert an environment variable to the type of the configuration field it sets.
+
+    Args:
+        value (str): The variable's value.
+        field_type (Any): The field's annotation, e.g. bool, int or Optional[float].
+
+    Returns:
+        Any: The converted value, or None for an empty or "none" value of an Optional field.
+
+    Raises:
+        ValueError: If the value cannot be converted.
+    """
+    if get_origin(field_type) is Union:
+        if value.strip().lower() in ("", "none", "null"):
+            return None
+        field_type = next(arg for arg in get_args(field_type) if arg is not type(None))
+    if field_type is bool:
+        lowered = value.strip().lower()
+        if lowered in ("1", "true", "yes", "on"):
+            return True
+        if lowered in ("0", "false", "no", "off", ""):
+            return False
+        raise ValueError(f"Expected a boolean, got {value!r}")
+    if field_type in (int, float):
+        return field_type(value)
+    if field_type is dict or get_origin(field_type) is dict:
+        return json.loads(value)
+    return value
+
+
+class SearchAPI(Enum):
+    TAVILY = "tavily"
+    ARXIV = "arxiv"
+    DUCKDUCKGO = "duckduckgo"
 
 @dataclass(kw_only=True)
 class Configuration:
@@ -33,18 +86,86 @@ class Configuration:
     planner_model: str = "meta/llama-3.1-70b-instruct" 
     writer_provider: str = "nvidia"
     writer_model: str = "meta/llama-3.1-70b-instruct" 
+    query_writer_provider: Optional[str] = None  # Model for search query writing, defaults to the writer
+    query_writer_model: Optional[str] = None
+    grader_provider: Optional[str] = None  # Model for grading sections, defaults to the planner
+    grader_model: Optional[str] = None
+    final_writer_provider: Optional[str] = None  # Model for sections written from the others, defaults to the writer
+    final_writer_model: Optional[str] = None
+    fast_provider: Optional[str] = None  # Cheaper model tried first for query writing and grading, escalating to the role's model when its answer is unusable
+    fast_model: Optional[str] = None
+    pregrade_sections: bool = True  # Pass obviously complete sections with local checks instead of the grader model
+    pregrade_min_words: int = 150  # Words a section needs before the pre-grader can pass it
+    pregrade_min_sources: int = 2  # Gathered sources a section must cite before the pre-grader can pass it
+    pregrade_min_term_coverage: float = 0.8  # Fraction of the section description's key terms the section must mention
+    provider_rate_limits: Optional[Dict[str, Dict[str, Any]]] = None  # e.g. {"anthropic": {"requests_per_minute": 50, "tokens_per_minute": 40_000, "max_concurrency": 8}}
     search_api: SearchAPI = SearchAPI.TAVILY 
     search_api_config: Optional[Dict[str, Any]] = None 
+    search_timeout: Optional[float] = None  # Seconds each search query may take before it is given up, None to wait indefinitely
+    hedge_search_api: Optional[SearchAPI] = None  # Second backend a slow query is also sent to, the first usable response winning
+    hedge_search_api_config: Optional[Dict[str, Any]] = None
+    hedge_delay: float = 1.0  # Seconds to wait for search_api before sending the hedge request
+    fetch_pages: bool = False  # Fetch the full page behind results that only carry a search snippet, e.g. from DuckDuckGo
+    fetch_max_bytes: int = 2_000_000  # Bytes read from each fetched page before it is cut off
+    fetch_timeout: float = 10.0  # Seconds each page fetch may take
+    fetch_per_host_limit: int = 4  # Concurrent page fetches from one host
+    page_cache_path: str = DEFAULT_PAGE_CACHE_PATH  # SQLite file caching fetched page text, an empty string keeps it in memory only
+    extraction_workers: Optional[int] = None  # Processes extracting text from fetched pages, None for one per CPU (arXiv searches set it in search_api_config)
+    extraction_cpu_seconds: float = 10.0  # CPU time allowed to extract each document, 0 for no limit
+    max_context_tokens: Optional[int] = None  # Token budget for the search results in each prompt, None for no limit
+    speculative_research: bool = False  # Research proposed sections while the plan awaits approval
+    search_cache: bool = True  # Cache search responses per query across sections and runs
+    search_cache_path: str = DEFAULT_SEARCH_CACHE_PATH  # An empty string keeps the cache in memory only
+    blob_store_dir: str = ""  # Directory large source text is kept in, with state holding references, e.g. ~/.cache/open_deep_research/blobs; an empty string keeps it inline
+    blob_max_age: Optional[float] = DEFAULT_BLOB_MAX_AGE  # Seconds an unused blob is kept, pruned when the store is opened; keep it longer than any checkpoint you may resume, None to keep all
+    checkpoint_path: str = DEFAULT_CHECKPOINT_PATH  # SQLite file for graph checkpoints, an empty string keeps them in memory only
+    checkpoints_to_keep: Optional[int] = DEFAULT_CHECKPOINTS_TO_KEEP  # Checkpoints retained per thread, None to keep all
+
+
+    def model_for(self, role: str) -> Tuple[str, str]:
+        """Return the (provider, model) for a role: planner, writer, query_writer, grader or final_writer."""
+        fallback = MODEL_ROLE_FALLBACKS[role]
+        provider = getattr(self, f"{role}_provider", None) or getattr(self, f"{fallback}_provider")
+        model = getattr(self, f"{role}_model", None) or getattr(self, f"{fallback}_model")
+        return _enum_value(provider), _enum_value(model)
+
+    def search_hedge(self) -> Optional[SearchHedge]:
+        """Return the per-query deadline and hedging settings, or None if neither is configured."""
+        if not self.search_timeout and not self.hedge_search_api:
+            return None
+        hedge_api = _enum_value(self.hedge_search_api)
+        return SearchHedge(timeout=float(self.search_timeout) if self.search_timeout else None,
+                           search_api=hedge_api,
+                           params=get_search_params(hedge_api, self.hedge_search_api_config) if hedge_api else None,
+                           delay=float(self.hedge_delay))
 
+    def page_fetch(self) -> Optional[PageFetch]:
+        """Return the page fetch settings, or None if page fetching is off."""
+        if not self.fetch_pages:
+            return None
+        return PageFetch(max_bytes=int(self.fetch_max_bytes),
+                         timeout=float(self.fetch_timeout),
+                         per_host_limit=int(self.fetch_per_host_limit),
+                         cache_path=self.page_cache_path or None,
+                         extraction_workers=int(self.extraction_workers) if self.extraction_workers else None,
+                         extraction_cpu_seconds=float(self.extraction_cpu_seconds))
 
     @classmethod
     def from_runnable_config(cls, config: Optional[RunnableConfig] = None) -> "Configuration":
         configurable = (
             config['configurable'] if config and "configurable" in config else {} 
         )
-        values: dict[str: Any] = {
-            f.name: os.environ.get(f.name.upper(), configurable.get(f.name))
-            for f in fields(cls)
-            if f.int 
-        }
-        return cls(**{k: v for k, v in values.items() if v})
+        values: dict[str: Any] = {}
+        for f in fields(cls):
+            if not f.init:
+                continue
+            env_value = os.environ.get(f.name.upper())
+            if env_value is not None:
+                # Environment variables are strings; "false" must not turn a flag on
+                try:
+                    values[f.name] = _from_env(env_value, f.type)
+                except ValueError as e:
+                    raise ValueError(f"Invalid value for {f.name.upper()}: {e}") from None
+            else:
+                values[f.name] = configurable.get(f.name)
+        return cls(**{k: v for k, v in values.items() if v is not None})
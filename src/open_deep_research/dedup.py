@@ -0,0 +1,148 @@
+"""Canonical URLs and near-duplicate detection for search results."""
+
+import re
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from
+TRACKING_PARAM_PREFIXES = ("utm_", "mc_", "pk_", "hsa_")
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "_ga", "_gl",
+    "ref_src", "ref_url", "spm", "cmpid", "ncid", "ocid",
+}
+
+ARXIV_ID_PATTERN = re.compile(r"^/(?:abs|pdf|html)/(?P<id>[a-z\-]+(?:\.[A-Z]{2})?/\d{7}|\d{4}\.\d{4,5})(?:v\d+)?(?:\.pdf)?/?$")
+WORD_PATTERN = re.compile(r"\w+")
+
+SIMHASH_BITS = 64
+SIMHASH_MASK = (1 << SIMHASH_BITS) - 1
+
+# BIT_TABLES[bit] maps every byte value to that bit of it, for bytes.translate
+BIT_TABLES = [bytes((value >> bit) & 1 for value in range(256)) for bit in range(8)]
+
+
+def canonicalize_url(url: str) -> str:
+    """Reduce a URL to a canonical form so trivial variants of one page compare equal.
+
+    Lower-cases the scheme and host, drops "www.", default ports, fragments,
+    trailing slashes and tracking parameters, sorts the remaining query, and
+    maps arXiv abs/pdf/html links of any version to https://arxiv.org/abs/<id>.
+
+    Args:
+        url (str): The URL as returned by a search API.
+
+    Returns:
+        str: The canonical URL, or the input unchanged if it cannot be parsed.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+    if not parts.netloc:
+        return url
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    if host in ("arxiv.org", "export.arxiv.org"):
+        match = ARXIV_ID_PATTERN.match(parts.path)
+        if match:
+            return f"https://arxiv.org/abs/{match.group('id')}"
+
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    ))
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def simhash(text: str, shingle_size: int = 3, max_words: int = 1000) -> Optional[int]:
+    """Compute a 64-bit SimHash fingerprint over word shingles.
+
+    Similar texts get fingerprints that differ in few bits. Only the first
+    max_words words are used, which is plenty to tell copies apart and keeps
+    long documents cheap. Shingles are hashed with the built-in tuple hash,
+    so fingerprints are only comparable within one process.
+
+    Args:
+        text (str): The text to fingerprint.
+        shingle_size (int): Number of consecutive words per shingle.
+        max_words (int): Maximum number of leading words to use.
+
+    Returns:
+        Optional[int]: The fingerprint, or None if the text is too short to fingerprint reliably.
+    """
+    # Words average well under 16 characters, so this prefix holds max_words of them
+    words = WORD_PATTERN.findall(text[:max_words * 16].lower())[:max_words]
+    if len(words) < shingle_size * 4:
+        return None
+
+    hashes = {hash(shingle) & SIMHASH_MASK for shingle in zip(*(words[i:] for i in range(shingle_size)))}
+
+    # Count set bits per position with C-level byte operations: take every shingle's
+    # n-th byte, map each byte to one of its bits, and count the ones
+    packed = b"".join(h.to_bytes(SIMHASH_BITS // 8, "little") for h in hashes)
+    half = len(hashes) / 2
+    fingerprint = 0
+    for byte in range(SIMHASH_BITS // 8):
+        column = packed[byte::SIMHASH_BITS // 8]
+        for bit, table in enumerate(BIT_TABLES):
+            if column.translate(table).count(1) > half:
+                fingerprint |= 1 << (byte * 8 + bit)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Return the number of differing bits between two fingerprints."""
+    return bin(a ^ b).count("1")
+
+
+def deduplicate_sources(sources: List[Dict[str, Any]], max_distance: int = 3) -> List[Dict[str, Any]]:
+    """Remove duplicate and near-duplicate search results, keeping the highest-scoring copy.
+
+    Results are first grouped by canonical URL, then by content: a SimHash of
+    the raw content (or the snippet, if there is none) is split into
+    max_distance + 1 bands, so any two fingerprints within max_distance bits
+    share at least one band. Only results sharing a band are compared, which
+    keeps the whole pass close to linear in the number of results.
+
+    Args:
+        sources (List[Dict[str, Any]]): Search results with url, score, content and raw_content fields.
+        max_distance (int): Largest Hamming distance between fingerprints still treated as the same content.
+
+    Returns:
+        List[Dict[str, Any]]: The surviving results, in the order they first appeared.
+    """
+    bands = max_distance + 1
+    band_width = SIMHASH_BITS // bands
+    band_mask = (1 << band_width) - 1
+
+    # Visit the best results first so the copy that survives is the highest-scoring one
+    order = sorted(range(len(sources)), key=lambda i: sources[i].get("score") or 0, reverse=True)
+
+    seen_urls = set()
+    buckets: Dict[tuple, List[int]] = {}
+    kept = []
+    for i in order:
+        source = sources[i]
+        url = canonicalize_url(source.get("url") or "")
+        if url in seen_urls:
+            continue
+
+        fingerprint = simhash(source.get("raw_content") or source.get("content") or "")
+        if fingerprint is not None:
+            keys = [(band, (fingerprint >> (band * band_width)) & band_mask) for band in range(bands)]
+            if any(hamming_distance(fingerprint, other) <= max_distance
+                   for key in keys for other in buckets.get(key, ())):
+                continue
+            for key in keys:
+                buckets.setdefault(key, []).append(fingerprint)
+
+        seen_urls.add(url)
+        kept.append(i)
+
+    return [sources[i] for i in sorted(kept)]
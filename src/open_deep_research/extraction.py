@@ -0,0 +1,358 @@
+"""Extracting the text of HTML pages and PDFs in a pool of worker processes."""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import weakref
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from open_deep_research.metrics import (
+    EXTRACTION_BATCH_SIZE,
+    EXTRACTION_DOCUMENTS,
+    EXTRACTION_SECONDS,
+    registry,
+)
+
+# This module is imported by the extraction worker processes, so it keeps its
+# imports light; BeautifulSoup and PyMuPDF are imported where they are used.
+
+logger = logging.getLogger(__name__)
+
+
+# Elements that hold markup, scripts or navigation rather than page content
+BOILERPLATE_TAGS = ["script", "style", "noscript", "template", "svg", "iframe", "nav", "header", "footer", "aside", "form"]
+PDF_CONTENT_TYPE = "application/pdf"
+
+# A document is one (data, content_type, charset) triple
+Document = Tuple[bytes, str, Optional[str]]
+
+
+class ExtractionTimeout(Exception):
+    """Raised in a worker when a document uses up its CPU time allowance."""
+
+
+@contextmanager
+def cpu_limit(seconds: Optional[float]):
+    """Raise ExtractionTimeout if the enclosed code uses more than seconds of CPU time.
+
+    The limit is enforced with a profiling interval timer, so it only applies in
+    the main thread of a process on platforms with setitimer, and only takes
+    effect once control returns to Python code.
+
+    Args:
+        seconds (Optional[float]): The CPU time allowance, None or 0 for no limit.
+    """
+    if not seconds or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def on_timeout(signum, frame):
+        raise ExtractionTimeout(f"Extraction used more than {seconds}s of CPU time")
+
+    previous = signal.signal(signal.SIGPROF, on_timeout)
+    signal.setitimer(signal.ITIMER_PROF, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous)
+
+
+def clean_lines(text: str) -> str:
+    """Strip every line and drop the empty ones."""
+    return "\n".join(line for line in (line.strip() for line in text.splitlines()) if line)
+
+
+def extract_html(data: bytes, charset: Optional[str] = None) -> str:
+    """Extract the readable text of an HTML page.
+
+    Args:
+        data (bytes): The page as served.
+        charset (Optional[str]): The charset from the Content-Type header, None to detect it.
+
+    Returns:
+        str: The page text, one block per line, without scripts, styles and navigation.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(data, "html.parser", from_encoding=charset)
+    for element in soup(BOILERPLATE_TAGS):
+        element.decompose()
+    return clean_lines(soup.get_text("\n"))
+
+
+def extract_pdf(data: bytes) -> str:
+    """Extract the text of a PDF.
+
+    Lines repeated on most pages, such as running headers and footers, and
+    lines holding only a page number are dropped.
+
+    Args:
+        data (bytes): The PDF file.
+
+    Returns:
+        str: The document text, one block per line.
+    """
+    import pymupdf
+
+    with pymupdf.open(stream=data, filetype="pdf") as document:
+        pages = [clean_lines(page.get_text()).splitlines() for page in document]
+
+    repeated = set()
+    if len(pages) >= 3:
+        counts = Counter(line for lines in pages for line in set(lines))
+        repeated = {line for line, count in counts.items() if count > len(pages) / 2}
+    return "\n".join(
+        line for lines in pages for line in lines if line not in repeated and not line.isdigit()
+    )
+
+
+def extract_document(data: bytes, content_type: str, charset: Optional[str] = None) -> str:
+    """Extract the text of a document, choosing the extractor by content type.
+
+    Args:
+        data (bytes): The document as served.
+        content_type (str): Its content type; PDFs and HTML are parsed, anything else is decoded as text.
+        charset (Optional[str]): Its charset, if known.
+
+    Returns:
+        str: The cleaned document text.
+    """
+    if content_type == PDF_CONTENT_TYPE:
+        return extract_pdf(data)
+    if content_type in ("text/html", "application/xhtml+xml"):
+        return extract_html(data, charset)
+    return clean_lines(data.decode(charset or "utf-8", errors="replace"))
+
+
+def extract_batch(documents: List[Document], cpu_seconds: Optional[float]) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Extract a batch of documents in a worker process.
+
+    Args:
+        documents (List[Document]): The documents to extract.
+        cpu_seconds (Optional[float]): CPU time allowed per document.
+
+    Returns:
+        List[Tuple[Optional[str], Optional[str]]]: Per document, its text or None, and the error if it failed.
+    """
+    results = []
+    for data, content_type, charset in documents:
+        try:
+            with cpu_limit(cpu_seconds):
+                results.append((extract_document(data, content_type, charset), None))
+        except Exception as e:
+            results.append((None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+class ExtractionService:
+    """Extracts text from HTML and PDF documents in a pool of worker processes.
+
+    Parsing is CPU-bound, so doing it on the event loop, or in a thread that
+    holds the GIL, stalls every other graph branch. Documents smaller than
+    batch_bytes are collected for up to batch_window seconds and sent to a
+    worker together, so the cost of passing them between processes is shared;
+    larger documents are sent on their own. Each document may use at most
+    cpu_seconds of CPU time before it is given up.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        cpu_seconds: Optional[float] = 10.0,
+        batch_bytes: int = 256 * 1024,
+        max_batch: int = 16,
+        batch_window: float = 0.005,
+    ):
+        """Set up the service; worker processes are started on first use.
+
+        Args:
+            max_workers (Optional[int]): Worker processes, None for one per CPU.
+            cpu_seconds (Optional[float]): CPU time allowed per document, None for no limit.
+            batch_bytes (int): Documents at least this large are sent to a worker alone, and batches stop growing at this size.
+            max_batch (int): Most documents sent to a worker together.
+            batch_window (float): Seconds a small document waits for others to share its batch.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cpu_seconds = cpu_seconds
+        self.batch_bytes = batch_bytes
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Small documents waiting to be batched, per event loop
+        self._pending: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, list] = weakref.WeakKeyDictionary()
+        self._counts = {"documents": 0, "batches": 0, "failures": 0, "timeouts": 0}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Forking a process with event loops, sessions and threads running copies
+                # their state and locks into the workers; start them from a clean process
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context(method))
+            return self._pool
+
+    async def extract(self, data: bytes, content_type: str, charset: Optional[str] = None) -> Optional[str]:
+        """Extract the text of one document.
+
+        Args:
+            data (bytes): The document as served.
+            content_type (str): Its content type, e.g. "text/html" or "application/pdf".
+            charset (Optional[str]): Its charset, if known.
+
+        Returns:
+            Optional[str]: The cleaned text, or None if extraction failed or ran out of CPU time.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        document = (data, content_type, charset)
+
+        if len(data) >= self.batch_bytes:
+            self._submit(loop, [(document, future)])
+        else:
+            pending = self._pending.setdefault(loop, [])
+            pending.append((document, future))
+            if len(pending) == 1:
+                loop.call_later(self.batch_window, self._flush, loop)
+            if len(pending) >= self.max_batch or sum(len(item[0][0]) for item in pending) >= self.batch_bytes:
+                self._flush(loop)
+
+        return await future
+
+    async def extract_many(self, documents: List[Tuple[bytes, str]]) -> List[Optional[str]]:
+        """Extract the text of several documents.
+
+        Args:
+            documents (List[Tuple[bytes, str]]): (data, content_type) pairs.
+
+        Returns:
+            List[Optional[str]]: The text of each document, None where extraction failed.
+        """
+        return list(await asyncio.gather(*(self.extract(data, content_type) for data, content_type in documents)))
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Send the small documents waiting on a loop to a worker."""
+        pending = self._pending.pop(loop, None)
+        if pending:
+            self._submit(loop, pending)
+
+    def _submit(self, loop: asyncio.AbstractEventLoop, batch: list) -> None:
+        """Send a batch to a worker and resolve its futures when the worker is done."""
+        documents = [document for document, _ in batch]
+        futures = [future for _, future in batch]
+        with self._lock:
+            self._counts["documents"] += len(batch)
+            self._counts["batches"] += 1
+        EXTRACTION_BATCH_SIZE.observe(len(batch))
+        start = loop.time()
+
+        # This may run in a call_later callback, where an exception would leave the futures waiting forever
+        pool = None
+        try:
+            pool = self._get_pool()
+            task = asyncio.wrap_future(pool.submit(extract_batch, documents, self.cpu_seconds), loop=loop)
+        except Exception as e:
+            self._fail(pool, futures, e)
+            return
+
+        def done(task: "asyncio.Future") -> None:
+            EXTRACTION_SECONDS.observe(loop.time() - start)
+            if task.cancelled():
+                self._fail(pool, futures, asyncio.CancelledError("Extraction batch was cancelled"))
+            elif task.exception() is not None:
+                self._fail(pool, futures, task.exception())
+            else:
+                self._resolve(futures, task.result())
+
+        task.add_done_callback(done)
+
+    def _fail(self, pool: Optional[ProcessPoolExecutor], futures: list, error: BaseException) -> None:
+        """Resolve a batch that never ran to None, replacing the pool if a worker died."""
+        logger.warning("Text extraction failed for a batch of %d documents: %s: %s", len(futures), type(error).__name__, error)
+        if pool is not None and isinstance(error, (BrokenProcessPool, RuntimeError)):
+            # A worker was killed, e.g. out of memory, or the pool was shut down; it refuses all
+            # further work, so the next batch starts a new one
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            pool.shutdown(wait=False)
+        self._resolve(futures, [(None, f"{type(error).__name__}: {error}")] * len(futures))
+
+    def _resolve(self, futures: list, results: List[Tuple[Optional[str], Optional[str]]]) -> None:
+        """Hand each waiting caller its document's text, counting the outcomes."""
+        for future, (text, error) in zip(futures, results):
+            if error is not None and error.startswith(ExtractionTimeout.__name__):
+                outcome = "timeout"
+            elif error is not None:
+                outcome = "failed"
+            else:
+                outcome = "extracted"
+            if outcome != "extracted":
+                with self._lock:
+                    self._counts["timeouts" if outcome == "timeout" else "failures"] += 1
+            EXTRACTION_DOCUMENTS.inc(outcome=outcome)
+            if not future.done():
+                future.set_result(text)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes; they are started again on next use."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report service counters.
+
+        Returns:
+            Dict[str, Any]: Documents and batches sent to workers, failures, CPU time-outs and the pool size.
+        """
+        with self._lock:
+            return {**self._counts, "workers": self.max_workers}
+
+
+_extraction_services: Dict[Tuple[int, Optional[float]], ExtractionService] = {}
+_extraction_services_lock = threading.Lock()
+
+
+def get_extraction_service(max_workers: Optional[int] = None, cpu_seconds: Optional[float] = 10.0) -> ExtractionService:
+    """Return the process-wide extraction service for a pool size and CPU allowance, creating it on first use.
+
+    Callers with the same settings share one pool of worker processes; a pool
+    is never resized, so callers with different settings cannot disturb each
+    other's batches.
+
+    Args:
+        max_workers (Optional[int]): Worker processes, None for one per CPU.
+        cpu_seconds (Optional[float]): CPU time allowed per document, None or 0 for no limit.
+
+    Returns:
+        ExtractionService: The shared service.
+    """
+    key = (max_workers or os.cpu_count() or 1, cpu_seconds or None)
+    with _extraction_services_lock:
+        service = _extraction_services.get(key)
+        if service is None:
+            service = _extraction_services[key] = ExtractionService(*key)
+        return service
+
+
+def extraction_stats() -> Dict[str, float]:
+    """Sum the counters of every extraction service started in this process."""
+    totals: Dict[str, float] = {}
+    for service in list(_extraction_services.values()):
+        for key, value in service.stats().items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+registry.register_collector("odr_extraction", extraction_stats)
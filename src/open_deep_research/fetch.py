@@ -0,0 +1,540 @@
+"""Fetching the full pages behind search results, with a persistent cache of their text."""
+
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from open_deep_research.extraction import get_extraction_service
+from open_deep_research.metrics import (
+    PAGE_FETCH_BYTES,
+    PAGE_FETCH_SECONDS,
+    PAGE_FETCHES,
+    registry,
+)
+from open_deep_research.resilience import get_async_client
+
+# aiohttp is imported where it is used, so that configuring page fetching
+# does not load it until a page is fetched.
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_PAGE_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "open_deep_research", "page_cache.sqlite"
+)
+
+# Content types whose text is worth extracting; anything else keeps the search snippet
+FETCHABLE_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain", "application/pdf")
+USER_AGENT = "Mozilla/5.0 (compatible; open-deep-research/0.0; +https://github.com/langchain-ai/open_deep_research)"
+CHUNK_SIZE = 64 * 1024
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+# Sent with page fetches; lists the same types as FETCHABLE_CONTENT_TYPES
+ACCEPT = "text/html,application/xhtml+xml,application/pdf;q=0.9,text/plain;q=0.8"
+
+
+@dataclass
+class PageFetch:
+    """How to fetch the full pages behind search results."""
+    max_bytes: int = 2_000_000  # Bytes read from each page; longer pages are cut off
+    timeout: float = 10.0  # Seconds each page may take to fetch
+    per_host_limit: int = 4  # Concurrent connections to one host
+    max_connections: int = 64  # Concurrent connections overall
+    cache_path: Optional[str] = DEFAULT_PAGE_CACHE_PATH  # SQLite file for extracted text, None for memory only
+    max_age: float = 24 * 60 * 60  # Seconds cached text is used before it is revalidated with the server
+    extraction_workers: Optional[int] = None  # Processes extracting page text, None for one per CPU
+    extraction_cpu_seconds: Optional[float] = 10.0  # CPU time allowed to extract each page, None or 0 for no limit
+
+
+@dataclass
+class CachedPage:
+    """Extracted text of a fetched page, with the validators to revalidate it."""
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class PageCache:
+    """Persistent cache of the text extracted from fetched pages, keyed by URL.
+
+    Entries younger than the caller's max age are used as they are. Older ones
+    are revalidated with a conditional request using the stored ETag and
+    Last-Modified values, so an unchanged page costs a 304 response and no
+    extraction. Entries not fetched or revalidated for max_entry_age are
+    dropped, and the store is trimmed back under max_disk_bytes by evicting the
+    least recently used pages. Coroutines use aget(), aset() and atouch(),
+    which do the SQLite work in a worker thread.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_PAGE_CACHE_PATH,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+        max_entry_age: float = 30 * 24 * 60 * 60,
+    ):
+        """Open the cache, creating the SQLite file if needed.
+
+        Args:
+            path (Optional[str]): Location of the SQLite file. None keeps the cache in memory only.
+            max_disk_bytes (int): Approximate size budget for the stored text.
+            max_entry_age (float): Seconds after its last fetch or revalidation that a page is dropped.
+        """
+        self.path = path
+        self.max_disk_bytes = max_disk_bytes
+        self.max_entry_age = max_entry_age
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path or ":memory:", check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS page_cache (
+                url TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_page_cache_access ON page_cache (last_access)")
+        with self._lock:
+            self._disk_bytes = 0
+            self._evict(time.time())
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Look up the cached text of a page.
+
+        Args:
+            url (str): The page URL.
+
+        Returns:
+            Optional[CachedPage]: The cached page, fresh or not, or None if it was never fetched.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, etag, last_modified, fetched_at FROM page_cache WHERE url = ?", (url,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE page_cache SET last_access = ? WHERE url = ?", (time.time(), url))
+        return CachedPage(*row) if row else None
+
+    def set(self, url: str, text: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Store the text extracted from a page and the validators it was served with.
+
+        Args:
+            url (str): The page URL.
+            text (str): The extracted text.
+            etag (Optional[str]): The response's ETag header.
+            last_modified (Optional[str]): The response's Last-Modified header.
+        """
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM page_cache WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO page_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, text, etag, last_modified, now, size, now),
+            )
+            self._disk_bytes += size - (old[0] if old else 0)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict(now)
+
+    def touch(self, url: str) -> None:
+        """Mark a cached page as just revalidated."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE page_cache SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+            self.revalidated += 1
+
+    def count(self, counter: str) -> None:
+        """Add one to the "hits" or "misses" counter."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    async def aget(self, url: str) -> Optional[CachedPage]:
+        """Run get() in a worker thread, keeping SQLite off the event loop."""
+        return await asyncio.to_thread(self.get, url)
+
+    async def aset(self, url: str, text: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Run set() in a worker thread, keeping SQLite off the event loop."""
+        await asyncio.to_thread(self.set, url, text, etag, last_modified)
+
+    async def atouch(self, url: str) -> None:
+        """Run touch() in a worker thread, keeping SQLite off the event loop."""
+        await asyncio.to_thread(self.touch, url)
+
+    def _evict(self, now: float) -> None:
+        """Drop pages older than max_entry_age, then trim the store to 90% of max_disk_bytes. Caller holds the lock."""
+        expired = self._conn.execute("DELETE FROM page_cache WHERE fetched_at <= ?", (now - self.max_entry_age,)).rowcount
+        self.evictions += max(expired, 0)
+        self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM page_cache").fetchone()[0]
+
+        target = int(self.max_disk_bytes * 0.9)
+        if self._disk_bytes <= target:
+            return
+
+        freed = 0
+        stale_urls = []
+        for url, size in self._conn.execute("SELECT url, size FROM page_cache ORDER BY last_access"):
+            if self._disk_bytes - freed <= target:
+                break
+            stale_urls.append((url,))
+            freed += size
+
+        self._conn.executemany("DELETE FROM page_cache WHERE url = ?", stale_urls)
+        self._disk_bytes -= freed
+        self.evictions += len(stale_urls)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report cache counters.
+
+        Returns:
+            Dict[str, Any]: Fresh hits, revalidated entries, misses, evictions, and the number and size of stored pages.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM page_cache").fetchone()[0]
+            return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses,
+                    "evictions": self.evictions, "entries": entries, "disk_bytes": self._disk_bytes}
+
+
+_page_caches: Dict[Optional[str], PageCache] = {}
+_page_caches_lock = threading.Lock()
+
+
+def get_page_cache(path: Optional[str] = DEFAULT_PAGE_CACHE_PATH) -> PageCache:
+    """Return the process-wide page cache for a given file, creating it on first use.
+
+    Args:
+        path (Optional[str]): Location of the SQLite file, or None for a memory-only cache.
+
+    Returns:
+        PageCache: The shared cache instance for that location.
+    """
+    with _page_caches_lock:
+        cache = _page_caches.get(path)
+        if cache is None:
+            cache = _page_caches[path] = PageCache(path)
+        return cache
+
+
+def page_cache_stats() -> Dict[str, float]:
+    """Sum the counters of every page cache opened in this process."""
+    totals: Dict[str, float] = {}
+    for cache in list(_page_caches.values()):
+        for key, value in cache.stats().items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+registry.register_collector("odr_page_cache", page_cache_stats)
+
+
+async def read_capped(response: Any, max_bytes: int) -> Tuple[bytes, bool]:
+    """Read a response body in chunks, stopping once max_bytes have arrived.
+
+    Args:
+        response (aiohttp.ClientResponse): The response to read.
+        max_bytes (int): The most bytes to keep.
+
+    Returns:
+        Tuple[bytes, bool]: The body, and whether it was cut off.
+    """
+    chunks = []
+    size = 0
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_bytes:
+            # Stop reading; the rest of the body is never downloaded
+            return b"".join(chunks)[:max_bytes], True
+    return b"".join(chunks), False
+
+
+class BlockedURL(OSError):
+    """Raised instead of fetching a URL that is not http(s) or points at a non-public address."""
+
+
+def is_public_address(host: str) -> bool:
+    """Return True if an IP address is globally routable unicast.
+
+    Args:
+        host (str): An IPv4 or IPv6 address, optionally with an IPv6 zone.
+
+    Returns:
+        bool: False for loopback, private, link-local, multicast and other reserved addresses.
+    """
+    address = ipaddress.ip_address(host.split("%", 1)[0])
+    if getattr(address, "ipv4_mapped", None):
+        address = address.ipv4_mapped
+    return address.is_global and not address.is_multicast
+
+
+def check_public_url(url: str) -> None:
+    """Make sure a URL is http(s) and, if its host is an IP address, that the address is public.
+
+    Search results are untrusted input. Host names are checked when the
+    connection is made, by PublicResolver; an IP address is never passed to
+    the resolver, so it is checked here instead.
+
+    Args:
+        url (str): The URL to check.
+
+    Raises:
+        BlockedURL: If the scheme is not http(s) or the host is a non-public address.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise BlockedURL(f"Not an http(s) URL: {url}")
+    try:
+        public = is_public_address(parts.hostname)
+    except ValueError:
+        return  # A host name, checked by the resolver
+    if not public:
+        raise BlockedURL(f"Non-public address {parts.hostname}")
+
+
+class PublicResolver:
+    """An aiohttp resolver that refuses host names resolving to non-public addresses.
+
+    The check happens on the addresses the connector actually connects to, so
+    a host cannot pass it and then resolve to a private address (DNS rebinding).
+    Implements aiohttp's AbstractResolver interface by wrapping its default resolver.
+    """
+
+    def __init__(self) -> None:
+        """Create the wrapped default resolver."""
+        import aiohttp
+
+        self._resolver = aiohttp.DefaultResolver()
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> List[Dict[str, Any]]:
+        """Resolve a host name, failing if any of its addresses is not public.
+
+        Args:
+            host (str): The host name.
+            port (int): The port to connect to.
+            family (int): The address family to resolve.
+
+        Returns:
+            List[Dict[str, Any]]: The resolved addresses, as aiohttp's ResolveResult dicts.
+
+        Raises:
+            BlockedURL: If the host resolves to a non-public address.
+        """
+        results = await self._resolver.resolve(host, port, family)
+        for result in results:
+            if not is_public_address(result["host"]):
+                raise BlockedURL(f"{host} resolves to non-public address {result['host']}")
+        return results
+
+    async def close(self) -> None:
+        """Close the wrapped resolver."""
+        await self._resolver.close()
+
+
+@asynccontextmanager
+async def _open(session: Any, url: str, settings: PageFetch, headers: Optional[Dict[str, str]] = None) -> AsyncIterator[Any]:
+    """Send a GET request, following redirects only to public http(s) URLs.
+
+    Args:
+        session (aiohttp.ClientSession): The pooled session.
+        url (str): The URL to fetch.
+        settings (PageFetch): The per-request timeout.
+        headers (Optional[Dict[str, str]]): Extra request headers.
+
+    Yields:
+        aiohttp.ClientResponse: The final response.
+    """
+    import aiohttp
+
+    for _ in range(MAX_REDIRECTS + 1):
+        check_public_url(url)
+        response = await session.get(url, headers=headers, allow_redirects=False,
+                                     timeout=aiohttp.ClientTimeout(total=settings.timeout))
+        location = response.headers.get("Location")
+        if response.status in REDIRECT_STATUSES and location:
+            response.release()
+            url = urljoin(url, location)
+            continue
+        try:
+            yield response
+        finally:
+            response.release()
+        return
+    raise aiohttp.ClientError(f"More than {MAX_REDIRECTS} redirects")
+
+
+def _new_session(settings: PageFetch) -> Any:
+    """Create the pooled aiohttp session page fetches share."""
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(limit=settings.max_connections, limit_per_host=settings.per_host_limit,
+                                     ttl_dns_cache=300, resolver=PublicResolver())
+    return aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT})
+
+
+async def fetch_page_text(url: str, settings: PageFetch) -> Optional[str]:
+    """Fetch a page and return its text, using and refreshing the page cache.
+
+    Args:
+        url (str): The page URL.
+        settings (PageFetch): Size, time and connection limits, and the cache location.
+
+    Returns:
+        Optional[str]: The page text, or None if the page could not be fetched or is not text.
+    """
+    import aiohttp
+
+    cache = get_page_cache(settings.cache_path)
+    cached = await cache.aget(url)
+    if cached is not None and time.time() - cached.fetched_at < settings.max_age:
+        cache.count("hits")
+        PAGE_FETCHES.inc(outcome="cache_hit")
+        return cached.text
+
+    headers = {"Accept": ACCEPT}
+    if cached is not None:
+        # Revalidate instead of downloading the page again if it has not changed
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+    session = get_async_client(f"page_fetch:{settings.max_connections}:{settings.per_host_limit}", lambda: _new_session(settings))
+    start = time.perf_counter()
+    try:
+        async with _open(session, url, settings, headers) as response:
+            if response.status == 304 and cached is not None:
+                await cache.atouch(url)
+                PAGE_FETCHES.inc(outcome="not_modified")
+                return cached.text
+            if response.status != 200:
+                PAGE_FETCHES.inc(outcome="failed")
+                return cached.text if cached is not None else None
+            content_type = response.content_type
+            if content_type not in FETCHABLE_CONTENT_TYPES:
+                PAGE_FETCHES.inc(outcome="skipped")
+                return None
+            body, truncated = await read_capped(response, settings.max_bytes)
+            charset = response.charset
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+        # The resolver's BlockedURL reaches here wrapped in a connector error
+        if isinstance(getattr(e, "os_error", e), BlockedURL):
+            logger.warning("Not fetching page: %s", getattr(e, "os_error", e))
+            PAGE_FETCHES.inc(outcome="blocked")
+            return None
+        logger.warning("Error fetching page %s: %s: %s", url, type(e).__name__, e)
+        PAGE_FETCHES.inc(outcome="failed")
+        return cached.text if cached is not None else None
+    finally:
+        PAGE_FETCH_SECONDS.observe(time.perf_counter() - start)
+
+    cache.count("misses")
+    PAGE_FETCHES.inc(outcome="truncated" if truncated else "fetched")
+    PAGE_FETCH_BYTES.observe(len(body))
+
+    # Parsing is CPU-bound; it runs in the extraction worker processes
+    extraction = get_extraction_service(settings.extraction_workers, settings.extraction_cpu_seconds)
+    text = await extraction.extract(body, content_type, charset)
+    if text is None:
+        return cached.text if cached is not None else None
+    await cache.aset(url, text, etag, last_modified)
+    return text
+
+
+async def fetch_document(url: str, settings: PageFetch) -> Optional[bytes]:
+    """Download a document through the shared session, without caching it.
+
+    Args:
+        url (str): The document URL.
+        settings (PageFetch): Size, time and connection limits.
+
+    Returns:
+        Optional[bytes]: The document, or None if it could not be downloaded or exceeds settings.max_bytes.
+    """
+    import aiohttp
+
+    session = get_async_client(f"page_fetch:{settings.max_connections}:{settings.per_host_limit}", lambda: _new_session(settings))
+    start = time.perf_counter()
+    try:
+        async with _open(session, url, settings) as response:
+            response.raise_for_status()
+            body, truncated = await read_capped(response, settings.max_bytes)
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+        # The resolver's BlockedURL reaches here wrapped in a connector error
+        if isinstance(getattr(e, "os_error", e), BlockedURL):
+            logger.warning("Not fetching document: %s", getattr(e, "os_error", e))
+            PAGE_FETCHES.inc(outcome="blocked")
+            return None
+        logger.warning("Error fetching document %s: %s: %s", url, type(e).__name__, e)
+        PAGE_FETCHES.inc(outcome="failed")
+        return None
+    finally:
+        PAGE_FETCH_SECONDS.observe(time.perf_counter() - start)
+
+    PAGE_FETCH_BYTES.observe(len(body))
+    if truncated:
+        # A cut-off document, such as a PDF, cannot be parsed
+        PAGE_FETCHES.inc(outcome="too_large")
+        return None
+    PAGE_FETCHES.inc(outcome="fetched")
+    return body
+
+
+def _needs_page(result: dict) -> bool:
+    """Return True if a search result only carries a snippet of its page."""
+    url = result.get('url') or ''
+    raw_content = result.get('raw_content')
+    return url.startswith(("http://", "https://")) and (not raw_content or raw_content == result.get('content'))
+
+
+async def fetch_full_pages(search_results: List[dict], settings: PageFetch) -> List[dict]:
+    """Replace the snippets of search results with the full text of their pages.
+
+    Results whose raw_content is missing or just repeats the snippet have their
+    page fetched, each URL once; the others, and results whose page could not
+    be fetched, are left as they are.
+
+    Args:
+        search_results (List[dict]): Search responses from any backend.
+        settings (PageFetch): How to fetch the pages.
+
+    Returns:
+        List[dict]: New search responses with the fetched text as raw_content.
+    """
+    urls = list(dict.fromkeys(
+        result['url'] for response in search_results for result in response['results'] if _needs_page(result)
+    ))
+    if not urls:
+        return search_results
+
+    texts = await asyncio.gather(*(fetch_page_text(url, settings) for url in urls))
+    pages = {url: text for url, text in zip(urls, texts) if text}
+
+    return [
+        {**response, 'results': [
+            {**result, 'raw_content': pages[result['url']]} if _needs_page(result) and result['url'] in pages else result
+            for result in response['results']
+        ]}
+        for response in search_results
+    ]
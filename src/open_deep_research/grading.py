@@ -0,0 +1,88 @@
+"""Local pre-grading of sections that are obviously complete."""
+
+import re
+from typing import Iterable, List, Optional
+
+from open_deep_research.dedup import canonicalize_url
+
+URL_PATTERN = re.compile(r"https?://[^\s<>()\[\]\"']+")
+CITATION_PATTERN = re.compile(r"\[\d+\]")
+TERM_PATTERN = re.compile(r"[a-z][a-z0-9\-]{3,}")
+SOURCES_HEADING_PATTERN = re.compile(r"^#+\s*sources\b", re.IGNORECASE | re.MULTILINE)
+
+# Words too common in section descriptions to say anything about coverage
+STOPWORDS = {
+    "about", "after", "also", "among", "analysis", "and", "approach", "approaches", "aspects",
+    "based", "been", "being", "between", "both", "cover", "covering", "covers", "describe",
+    "describes", "detail", "details", "different", "discuss", "discusses", "each", "examine",
+    "examines", "explain", "explains", "explore", "explores", "focus", "focuses", "from",
+    "have", "how", "including", "into", "its", "key", "like", "main", "more", "most", "other",
+    "overview", "section", "should", "some", "such", "than", "that", "their", "them", "then",
+    "there", "these", "they", "this", "those", "through", "topic", "under", "using", "various",
+    "were", "what", "when", "where", "which", "while", "with", "within", "will", "would", "your",
+}
+
+
+def key_terms(description: str) -> List[str]:
+    """Return the distinct content words of a section description, in order."""
+    terms = []
+    for term in TERM_PATTERN.findall(description.lower()):
+        term = term.strip("-")
+        if term not in STOPWORDS and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def _covers(term: str, text: str) -> bool:
+    """Return True if text contains term or a form of it sharing its first five letters."""
+    return term in text or (len(term) > 5 and term[:5] in text)
+
+
+def pregrade_section(content: str,
+                     description: str,
+                     source_urls: Iterable[str],
+                     min_words: int = 150,
+                     min_sources: int = 2,
+                     min_term_coverage: float = 0.8) -> Optional[str]:
+    """Check a written section against cheap local criteria before asking a model to grade it.
+
+    A section passes when its body is long enough, it cites at least
+    min_sources of the gathered sources inline and in its source list, every
+    URL it lists was actually among the gathered sources, and it mentions
+    enough of the key terms of the section description. The checks are only
+    meant to recognise sections that are obviously complete; anything else is
+    left to the model grader.
+
+    Args:
+        content (str): The written section, in Markdown.
+        description (str): The section description from the plan.
+        source_urls (Iterable[str]): Canonical URLs of the sources gathered for the section.
+        min_words (int): Minimum number of words before the source list.
+        min_sources (int): Minimum number of distinct gathered sources cited.
+        min_term_coverage (float): Minimum fraction of the description's key terms mentioned.
+
+    Returns:
+        Optional[str]: None if the section passes, else the first check it failed.
+    """
+    heading = SOURCES_HEADING_PATTERN.search(content)
+    body = content[:heading.start()] if heading else content
+    source_list = content[heading.start():] if heading else ""
+
+    if len(body.split()) < min_words:
+        return "too_short"
+
+    cited = {canonicalize_url(url.rstrip(".,;:")) for url in URL_PATTERN.findall(source_list)}
+    known = set(source_urls)
+    if not cited <= known:
+        return "unknown_source"
+    if len(cited) < min_sources or not CITATION_PATTERN.search(body):
+        return "few_citations"
+
+    terms = key_terms(description)
+    if terms:
+        text = body.lower()
+        covered = sum(_covers(term, text) for term in terms)
+        if covered / len(terms) < min_term_coverage:
+            return "low_coverage"
+
+    return None
@@ -1,6 +1,8 @@
+import threading
+
+from functools import cache
 from typing import Literal
 
-from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
 
@@ -10,6 +12,8 @@ from langgraph.types import interrupt, Command
 
 from open_deep_research.state import (
     ReportStateInput,
+    Section,
+    SearchQuery,
     ReportStateOutput,
     Sections,
     ReportState,
@@ -21,24 +25,49 @@ from open_deep_research.state import (
 
 from open_deep_research.prompts import (
     report_planner_query_writer_instructions,
+    report_planner_query_writer_inputs,
     report_planner_instructions,
-    query_writer_instructions
+    report_planner_context,
+    report_planner_inputs,
+    query_writer_instructions,
+    query_writer_inputs,
+    section_writer_instructions,
+    section_writer_context,
+    section_writer_inputs,
+    section_grader_instructions,
+    section_grader_inputs,
+    final_section_writer_instructions,
+    final_section_writer_context,
+    final_section_writer_inputs
 )
 
 
 from open_deep_research.utils import (
+    add_to_source_store,
+    carry_over_sections,
+    execute_search,
+    format_plan,
     format_sections, 
+    format_source_store,
     get_config_value, 
     get_search_params, 
     select_and_execute_search
 )
+from open_deep_research.blobs import get_blob_store, load_text, store_text
+from open_deep_research.cache import normalize_query
 
+from open_deep_research.checkpoint import get_checkpointer
 from open_deep_research.configuration import Configuration
+from open_deep_research.grading import pregrade_section
+from open_deep_research.metrics import PREGRADE_RESULTS, SECTION_GRADINGS, instrument_node
+from open_deep_research.models import ainvoke_model, ainvoke_routed, get_chat_model, get_model_kwargs
+from open_deep_research.speculation import speculative_research
+from open_deep_research.stream import section_stream_config
 
 
+@instrument_node
 async def generate_report_plan(state: ReportState, config: RunnableConfig):
-    """
-    Generate the initial report Plan with sections
+    """Generate the initial report Plan with sections
       
     This node:
     1. Gets configuration for the report structure and search parameters
@@ -46,20 +75,28 @@ async def generate_report_plan(state: ReportState, config: RunnableConfig):
     3. Performs web searches using those queries
     4. Uses an LLM to generate a structured plan with sections
     
+    When regenerating a plan after feedback, the planning searches of the first
+    pass are reused as context, the previous plan is shown to the planner, and
+    sections that come back unchanged keep their content and any speculative
+    research already done for them.
+    
     Args:
         state: Current graph state containing the report topic
         config: Configuration for models, search APIs, etc.
         
     Returns:
-        Dict containing the generated sections
+        Dict containing the generated sections and the planning context
     """
 
     topic = state['topic']
-    feedback = state.get('feedback_on_paper_plan', None)
+    feedback = state.get('feedback_on_report_plan', None)
+    previous_sections = state.get('sections') or []
+    planning_context = state.get('planning_context')
 
     #Configuration
     configurable = Configuration.from_runnable_config(config)
-    repost_structure  = configurable.report_structure
+    blob_store = get_blob_store(configurable.blob_store_dir, configurable.blob_max_age)
+    report_structure  = configurable.report_structure
     number_of_queries = configurable.number_of_queries
     search_api = get_config_value(configurable.search_api)
     search_api_config = configurable.search_api_config or {}
@@ -69,61 +106,76 @@ async def generate_report_plan(state: ReportState, config: RunnableConfig):
     if isinstance(report_structure, dict):
         report_structure = str(report_structure)
 
-      # Set writer model (model used for query writing)
-    writer_provider = get_config_value(configurable.writer_provider)
-    writer_model_name = get_config_value(configurable.writer_model)
-    writer_model = init_chat_model(model=writer_model_name, model_provider=writer_provider) 
-    structured_llm = writer_model.with_structured_output(Queries)
-
-    # Format system instructions
-    system_instructions_query = report_planner_query_writer_instructions.format(topic=topic, report_organization=report_structure, number_of_queries=number_of_queries)
-
-    # Generate queries  
-    results = structured_llm.invoke([SystemMessage(content=system_instructions_query),
-                                     HumanMessage(content="Generate search queries that will help with planning the sections of the report.")])
-
-    # Web search
-    query_list = [query.search_query for query in results.queries]
-
-    # Search the web with parameters
-    source_str = await select_and_execute_search(search_api, query_list, params_to_pass)
-
+    if feedback and planning_context:
+        # Replanning: the topic has not changed, so neither has the planning research
+        source_str = load_text(planning_context, blob_store)
+    else:
+        # Set query writer model
+        query_writer_provider, query_writer_model = configurable.model_for("query_writer")
+
+        # Format system instructions
+        system_instructions_query = report_planner_query_writer_instructions.format(number_of_queries=number_of_queries)
+        query_inputs = report_planner_query_writer_inputs.format(topic=topic, report_organization=report_structure)
+
+        # Generate queries, on the fast model if one is configured
+        results = await ainvoke_routed(Queries,
+                                       [SystemMessage(content=system_instructions_query),
+                                        HumanMessage(content=query_inputs)],
+                                       query_writer_model, query_writer_provider,
+                                       configurable.fast_model, configurable.fast_provider,
+                                       accept=lambda queries: bool(queries.queries),
+                                       rate_limits=configurable.provider_rate_limits, role="query_writer")
+
+        # Web search
+        query_list = [query.search_query for query in results.queries]
+
+        # Search the web with parameters
+        source_str = await select_and_execute_search(search_api, query_list, params_to_pass,
+                                                     use_cache=configurable.search_cache,
+                                                     cache_path=configurable.search_cache_path,
+                                                     token_budget=configurable.max_context_tokens,
+                                                     hedge=configurable.search_hedge(),
+                                                     fetch=configurable.page_fetch())
+
+    # Show the planner the plan the feedback refers to
+    if feedback and previous_sections:
+        feedback = f"{feedback}\n\nPrevious plan:\n\n{format_plan(previous_sections)}"
     
-    # Format system instructions
-    system_instructions_sections = report_planner_instructions.format(topic=topic, report_organization=report_structure, context=source_str, feedback=feedback)
+    # Format inputs, with the part that stays the same across plan revisions first
+    planner_context = report_planner_context.format(topic=topic, report_organization=report_structure, context=source_str)
+    planner_inputs = report_planner_inputs.format(feedback=feedback)
 
     # Set the planner
-    planner_provider = get_config_value(configurable.planner_provider)
-    planner_model = get_config_value(configurable.planner_model)
+    planner_provider, planner_model = configurable.model_for("planner")
 
-    # Report planner instructions
-    planner_message = """Generate the sections of the report. Your response must include a 'sections' field containing a list of sections. 
-                        Each section must have: name, description, plan, research, and content fields."""
-    
-        # Run the planner
-    if planner_model == "claude-3-7-sonnet-latest":
-        # Allocate a thinking budget for claude-3-7-sonnet-latest as the planner model
-        planner_llm = init_chat_model(model=planner_model, 
-                                      model_provider=planner_provider, 
-                                      max_tokens=20_000, 
-                                      thinking={"type": "enabled", "budget_tokens": 16_000})
+    # Run the planner (claude-3-7-sonnet-latest gets a thinking budget via get_model_kwargs)
+    structured_llm = get_chat_model(planner_model, planner_provider, Sections, **get_model_kwargs(planner_model))
 
-    else:
-        # With other models, thinking tokens are not specifically allocated
-        planner_llm = init_chat_model(model=planner_model, 
-                                      model_provider=planner_provider)
-    
     # Generate the report sections
-    structured_llm = planner_llm.with_structured_output(Sections)
-    report_sections = structured_llm.invoke([SystemMessage(content=system_instructions_sections),
-                                             HumanMessage(content=planner_message)])
+    report_sections = await ainvoke_model(structured_llm,
+                                          [SystemMessage(content=report_planner_instructions),
+                                           HumanMessage(content=planner_context),
+                                           HumanMessage(content=planner_inputs)],
+                                          planner_provider, configurable.provider_rate_limits)
 
-    # Get sections
+    # Get sections, keeping what was already done for sections the feedback did not change
     sections = report_sections.sections
+    thread_id = config.get("configurable", {}).get("thread_id")
+    if previous_sections:
+        sections, changed_sections = carry_over_sections(previous_sections, sections)
+        if thread_id:
+            speculative_research.cancel(thread_id, keep=[s for s in sections if s.name not in changed_sections])
 
-    return {"sections": sections}
+    # Research the proposed sections in the background while the plan awaits approval
+    if configurable.speculative_research and thread_id:
+        speculative_research.start(thread_id, 
+                                   [s for s in sections if s.research], 
+                                   lambda s: research_section_speculatively(topic, s, configurable))
 
+    return {"sections": sections, "planning_context": store_text(source_str, blob_store)}
 
+
+@instrument_node
 def human_feedback(state: ReportState, config: RunnableConfig) -> Command[Literal["generate_report_plan","build_section_with_web_research"]]:
     """Get human feedback on the report plan and route to next steps.
     
@@ -144,12 +196,7 @@ def human_feedback(state: ReportState, config: RunnableConfig) -> Command[Litera
      # Get sections
     topic = state["topic"]
     sections = state['sections']
-    sections_str = "\n\n".join(
-        f"Section: {section.name}\n"
-        f"Description: {section.description}\n"
-        f"Research needed: {'Yes' if section.research else 'No'}\n"
-        for section in sections
-    )
+    sections_str = format_plan(sections)
 
     # Get feedback on the report plan from interrupt
     interrupt_message = f"""Please provide feedback on the following report plan. 
@@ -169,18 +216,82 @@ def human_feedback(state: ReportState, config: RunnableConfig) -> Command[Litera
 
     # If the user provides feedback, regenerate the report plan 
     elif isinstance(feedback, str):
-        # Treat this as feedback
+        # Treat this as feedback; speculative research for sections that survive is kept
         return Command(goto="generate_report_plan", 
                        update={"feedback_on_report_plan": feedback})
     else:
         raise TypeError(f"Interrupt value of type {type(feedback)} is not supported.")
 
 
-def generate_queries(state: SectionState, config: RunnableConfig):
+async def generate_section_queries(topic: str, section: Section, configurable: Configuration) -> list[SearchQuery]:
+    """Use the query writer model to generate search queries for one section.
+    
+    Args:
+        topic: The report topic
+        section: The section to research
+        configurable: The run configuration
+        
+    Returns:
+        The generated search queries
+    """
+    number_of_queries = configurable.number_of_queries
+
+    # Set query writer model
+    query_writer_provider, query_writer_model = configurable.model_for("query_writer")
+
+    # Format system instructions
+    system_instructions = query_writer_instructions.format(number_of_queries=number_of_queries)
+    query_inputs = query_writer_inputs.format(topic=topic, section_topic=section.description)
+
+    # Generate queries, on the fast model if one is configured
+    queries = await ainvoke_routed(Queries,
+                                   [SystemMessage(content=system_instructions),
+                                    HumanMessage(content=query_inputs)],
+                                   query_writer_model, query_writer_provider,
+                                   configurable.fast_model, configurable.fast_provider,
+                                   accept=lambda queries: bool(queries.queries),
+                                   rate_limits=configurable.provider_rate_limits, role="query_writer")
+
+    return queries.queries
+
+
+async def research_section_speculatively(topic: str, section: Section, configurable: Configuration) -> dict:
+    """Generate queries for a proposed section and run them, while its plan awaits approval.
+    
+    Args:
+        topic: The report topic
+        section: The proposed section
+        configurable: The run configuration
+        
+    Returns:
+        A SectionState update with the queries, and a source store and answered queries
+        holding their results, so search_web only has to format them
+    """
+    search_queries = await generate_section_queries(topic, section, configurable)
+
+    search_api = get_config_value(configurable.search_api)
+    params_to_pass = get_search_params(search_api, configurable.search_api_config or {})
+    query_list = [query.search_query for query in search_queries if query.search_query]
+    search_results = await execute_search(search_api, query_list, params_to_pass,
+                                          use_cache=configurable.search_cache,
+                                          cache_path=configurable.search_cache_path,
+                                          hedge=configurable.search_hedge(),
+                                          fetch=configurable.page_fetch())
+    blob_store = get_blob_store(configurable.blob_store_dir, configurable.blob_max_age)
+
+    return {"search_queries": search_queries,
+            "source_store": add_to_source_store({}, search_results, blob_store=blob_store),
+            "answered_queries": list(dict.fromkeys(normalize_query(query) for query in query_list))}
+
+
+@instrument_node
+async def generate_queries(state: SectionState, config: RunnableConfig):
     """Generate search queries for researching a specific section.
     
     This node uses an LLM to generate targeted search queries based on the 
-    section topic and description.
+    section topic and description. With speculative research enabled, it
+    instead picks up the queries and search results produced in the background
+    while the plan was awaiting approval.
     
     Args:
         state: Current state containing section details
@@ -196,65 +307,103 @@ def generate_queries(state: SectionState, config: RunnableConfig):
 
     # Get configuration
     configurable = Configuration.from_runnable_config(config)
-    number_of_queries = configurable.number_of_queries
-
-    # Generate queries 
-    writer_provider = get_config_value(configurable.writer_provider)
-    writer_model_name = get_config_value(configurable.writer_model)
-    writer_model = init_chat_model(model=writer_model_name, model_provider=writer_provider) 
-    structured_llm = writer_model.with_structured_output(Queries)
 
-    # Format system instructions
-    system_instructions = query_writer_instructions.format(topic=topic, 
-                                                           section_topic=section.description, 
-                                                           number_of_queries=number_of_queries)
-
-    # Generate queries  
-    queries = structured_llm.invoke([SystemMessage(content=system_instructions),
-                                     HumanMessage(content="Generate search queries on the provided topic.")])
+    # Start from the speculative research for this section, if any
+    thread_id = config.get("configurable", {}).get("thread_id")
+    if configurable.speculative_research and thread_id:
+        warm_start = await speculative_research.claim(thread_id, section)
+        if warm_start is not None:
+            return warm_start
 
-    return {"search_queries": queries.queries}
+    return {"search_queries": await generate_section_queries(topic, section, configurable)}
 
 
+@instrument_node
 async def search_web(state: SectionState, config: RunnableConfig):
     """Execute web searches for the section queries.
     
     This node:
-    1. Takes the generated queries
+    1. Takes the generated queries, skipping any already searched for this section
     2. Executes searches using configured search API
-    3. Formats results into usable context
+    3. Adds the results to the section's source store
+    4. Formats the sources it added into a new part of the context
+    
+    Sources found in earlier iterations are kept, so a rewrite after a failed
+    grade sees the original evidence plus the follow-up results.
     
     Args:
         state: Current state with search queries
         config: Search API configuration
         
     Returns:
-        Dict with search results and updated iteration count
+        Dict with search results, the updated source store and updated iteration count
     """
 
     # Get state
     search_queries = state["search_queries"]
+    source_store = state.get("source_store") or {}
+    answered_queries = list(state.get("answered_queries") or [])
 
     # Get configuration
     configurable = Configuration.from_runnable_config(config)
     search_api = get_config_value(configurable.search_api)
     search_api_config = configurable.search_api_config or {}  # Get the config dict, default to empty
     params_to_pass = get_search_params(search_api, search_api_config)  # Filter parameters
+    blob_store = get_blob_store(configurable.blob_store_dir, configurable.blob_max_age)
 
-    # Web search
-    query_list = [query.search_query for query in search_queries]
+    # Web search, only for queries this section has not already answered
+    query_list = []
+    for query in search_queries:
+        normalized = normalize_query(query.search_query or "")
+        if normalized and normalized not in answered_queries:
+            answered_queries.append(normalized)
+            query_list.append(query.search_query)
 
     # Search the web with parameters
-    source_str = await select_and_execute_search(search_api, query_list, params_to_pass)
-
-    return {"source_str": source_str, "search_iterations": state["search_iterations"] + 1}
-
-def write_section(state: SectionState, config: RunnableConfig) -> Command[Literal[END, "search_web"]]:
+    if query_list:
+        search_results = await execute_search(search_api, query_list, params_to_pass,
+                                              use_cache=configurable.search_cache,
+                                              cache_path=configurable.search_cache_path,
+                                              hedge=configurable.search_hedge(),
+                                              fetch=configurable.page_fetch())
+        source_store = add_to_source_store(source_store, search_results, blob_store=blob_store)
+
+    # Format the sources this iteration added as a new context part, leaving the earlier parts
+    # untouched so they stay a prefix the provider can serve from its prompt cache. The part
+    # then holds their text, so the store keeps only what deduplication and pregrading use.
+    # With a token budget the sources compete for space and the whole store is refitted for
+    # every prompt, so the store keeps the text and write_section formats it.
+    source_parts = list(state.get("source_parts") or [])
+    if configurable.max_context_tokens is None:
+        sources_in_context = state.get("sources_in_context") or 0
+        new_sources = dict(list(source_store.items())[sources_in_context:])
+        if new_sources:
+            source_parts.append(store_text(format_source_store(search_api, new_sources, blob_store=blob_store), blob_store))
+            source_store = {**source_store, **{key: {k: v for k, v in source.items() if k != 'raw_content'}
+                                               for key, source in new_sources.items()}}
+
+    # State keeps references; the text is only read back when building the prompt
+    return {"source_parts": source_parts, 
+            "sources_in_context": len(source_store), 
+            "source_store": source_store, 
+            "answered_queries": answered_queries, 
+            "search_iterations": state["search_iterations"] + 1}
+
+def is_consistent_grade(feedback: Feedback) -> bool:
+    """Return False for a borderline grade: a pass that still asks for follow-up searches, or a fail that asks for none."""
+    has_follow_ups = any(query.search_query for query in feedback.follow_up_queries)
+    return has_follow_ups == (feedback.grade == "fail")
+
+
+@instrument_node
+async def write_section(state: SectionState, config: RunnableConfig) -> Command[Literal[END, "search_web"]]:
     """Write a section of the report and evaluate if more research is needed.
     
     This node:
     1. Writes section content using search results
-    2. Evaluates the quality of the section
+    2. Evaluates the quality of the section, unless the max search depth is
+       reached (the section is published whatever its grade) or the local
+       pre-grader already passes it
     3. Either:
        - Completes the section if quality passes
        - Triggers more research if quality fails
@@ -270,58 +419,81 @@ def write_section(state: SectionState, config: RunnableConfig) -> Command[Litera
     # Get state 
     topic = state["topic"]
     section = state["section"]
-    source_str = state["source_str"]
 
     # Get configuration
     configurable = Configuration.from_runnable_config(config)
-
-    # Format system instructions
-    section_writer_inputs_formatted = section_writer_inputs.format(topic=topic, 
-                                                             section_name=section.name, 
+    blob_store = get_blob_store(configurable.blob_store_dir, configurable.blob_max_age)
+    if configurable.max_context_tokens is None:
+        source_parts = [load_text(part, blob_store) for part in state["source_parts"]]
+    else:
+        # Fit all the sources found so far into the token budget as a single part
+        source_parts = [format_source_store(get_config_value(configurable.search_api), state["source_store"],
+                                            token_budget=configurable.max_context_tokens, blob_store=blob_store)]
+
+    # Format inputs: the topic and the sources of each iteration, which earlier writing calls
+    # already sent in the same order, then what is specific to this call
+    section_writer_context_formatted = section_writer_context.format(topic=topic)
+    section_writer_inputs_formatted = section_writer_inputs.format(section_name=section.name, 
                                                              section_topic=section.description, 
-                                                             context=source_str, 
                                                              section_content=section.content)
 
     # Generate section  
-    writer_provider = get_config_value(configurable.writer_provider)
-    writer_model_name = get_config_value(configurable.writer_model)
-    writer_model = init_chat_model(model=writer_model_name, model_provider=writer_provider) 
-
-    section_content = writer_model.invoke([SystemMessage(content=section_writer_instructions),
-                                           HumanMessage(content=section_writer_inputs_formatted)])
+    writer_provider, writer_model_name = configurable.model_for("writer")
+    writer_model = get_chat_model(writer_model_name, writer_provider)
+
+    # Tag the call so streamed tokens can be attributed to this section and iteration
+    section_content = await ainvoke_model(writer_model,
+                                          [SystemMessage(content=section_writer_instructions),
+                                           HumanMessage(content=section_writer_context_formatted),
+                                           *(HumanMessage(content=part) for part in source_parts),
+                                           HumanMessage(content=section_writer_inputs_formatted)],
+                                          writer_provider, configurable.provider_rate_limits,
+                                          config=section_stream_config(config, section.name, state["search_iterations"]))
     
     # Write content to the section object  
     section.content = section_content.content
 
+    # At the max search depth the section is published whatever its grade, so skip grading
+    if state["search_iterations"] >= configurable.max_search_depth:
+        SECTION_GRADINGS.inc(decided_by="terminal")
+        return Command(update={"completed_sections": [section]}, goto=END)
+
+    # Pass obviously complete sections without a grader call
+    if configurable.pregrade_sections:
+        failed_check = pregrade_section(section.content,
+                                        section.description,
+                                        state.get("source_store", {}).keys(),
+                                        min_words=configurable.pregrade_min_words,
+                                        min_sources=configurable.pregrade_min_sources,
+                                        min_term_coverage=configurable.pregrade_min_term_coverage)
+        PREGRADE_RESULTS.inc(result=failed_check or "pass")
+        if failed_check is None:
+            SECTION_GRADINGS.inc(decided_by="pregrade")
+            return Command(update={"completed_sections": [section]}, goto=END)
+
     # Grade prompt 
-    section_grader_message = ("Grade the report and consider follow-up questions for missing information. "
-                              "If the grade is 'pass', return empty strings for all follow-up queries. "
-                              "If the grade is 'fail', provide specific search queries to gather missing information.")
-    
-    section_grader_instructions_formatted = section_grader_instructions.format(topic=topic, 
-                                                                               section_topic=section.description,
-                                                                               section=section.content, 
-                                                                               number_of_follow_up_queries=configurable.number_of_queries)
-
-    # Use planner model for reflection
-    planner_provider = get_config_value(configurable.planner_provider)
-    planner_model = get_config_value(configurable.planner_model)
-
-    if planner_model == "claude-3-7-sonnet-latest":
-        # Allocate a thinking budget for claude-3-7-sonnet-latest as the planner model
-        reflection_model = init_chat_model(model=planner_model, 
-                                           model_provider=planner_provider, 
-                                           max_tokens=20_000, 
-                                           thinking={"type": "enabled", "budget_tokens": 16_000}).with_structured_output(Feedback)
-    else:
-        reflection_model = init_chat_model(model=planner_model, 
-                                           model_provider=planner_provider).with_structured_output(Feedback)
-    # Generate feedback
-    feedback = reflection_model.invoke([SystemMessage(content=section_grader_instructions_formatted),
-                                        HumanMessage(content=section_grader_message)])
-
-    # If the section is passing or the max search depth is reached, publish the section to completed sections 
-    if feedback.grade == "pass" or state["search_iterations"] >= configurable.max_search_depth:
+    section_grader_instructions_formatted = section_grader_instructions.format(number_of_follow_up_queries=configurable.number_of_queries)
+    section_grader_inputs_formatted = section_grader_inputs.format(topic=topic, 
+                                                                   section_topic=section.description,
+                                                                   section=section.content)
+
+    # Use the grader model for reflection (the planner unless configured)
+    grader_provider, grader_model = configurable.model_for("grader")
+
+    # Generate feedback, on the fast model if one is configured and its grade is clear-cut
+    feedback = await ainvoke_routed(Feedback,
+                                    [SystemMessage(content=section_grader_instructions_formatted),
+                                     HumanMessage(content=section_grader_inputs_formatted)],
+                                    grader_model, grader_provider,
+                                    configurable.fast_model, configurable.fast_provider,
+                                    accept=is_consistent_grade,
+                                    rate_limits=configurable.provider_rate_limits, role="grader",
+                                    model_kwargs=get_model_kwargs(grader_model))
+
+    SECTION_GRADINGS.inc(decided_by="llm")
+
+    # If the section is passing, publish the section to completed sections 
+    if feedback.grade == "pass":
         # Publish the section to completed sections 
         return  Command(
         update={"completed_sections": [section]},
@@ -335,7 +507,8 @@ def write_section(state: SectionState, config: RunnableConfig) -> Command[Litera
         goto="search_web"
         )
 
-def write_final_sections(state: SectionState, config: RunnableConfig):
+@instrument_node
+async def write_final_sections(state: SectionState, config: RunnableConfig):
     """Write sections that don't require research using completed sections as context.
     
     This node handles sections like conclusions or summaries that build on
@@ -355,18 +528,22 @@ def write_final_sections(state: SectionState, config: RunnableConfig):
     # Get state 
     topic = state["topic"]
     section = state["section"]
-    completed_report_sections = state["report_sections_from_research"]
+    completed_report_sections = load_text(state["report_sections_from_research"], get_blob_store(configurable.blob_store_dir, configurable.blob_max_age))
     
-    # Format system instructions
-    system_instructions = final_section_writer_instructions.format(topic=topic, section_name=section.name, section_topic=section.description, context=completed_report_sections)
+    # Format inputs, with the report content shared by every final section first
+    final_context = final_section_writer_context.format(topic=topic, context=completed_report_sections)
+    final_inputs = final_section_writer_inputs.format(section_name=section.name, section_topic=section.description)
 
     # Generate section  
-    writer_provider = get_config_value(configurable.writer_provider)
-    writer_model_name = get_config_value(configurable.writer_model)
-    writer_model = init_chat_model(model=writer_model_name, model_provider=writer_provider) 
+    writer_provider, writer_model_name = configurable.model_for("final_writer")
+    writer_model = get_chat_model(writer_model_name, writer_provider)
     
-    section_content = writer_model.invoke([SystemMessage(content=system_instructions),
-                                           HumanMessage(content="Generate a report section based on the provided sources.")])
+    section_content = await ainvoke_model(writer_model,
+                                          [SystemMessage(content=final_section_writer_instructions),
+                                           HumanMessage(content=final_context),
+                                           HumanMessage(content=final_inputs)],
+                                          writer_provider, configurable.provider_rate_limits,
+                                          config=section_stream_config(config, section.name, 0))
     
     # Write content to section 
     section.content = section_content.content
@@ -375,14 +552,18 @@ def write_final_sections(state: SectionState, config: RunnableConfig):
     return {"completed_sections": [section]}
 
 
-def gather_completed_sections(state: ReportState):
+@instrument_node
+def gather_completed_sections(state: ReportState, config: RunnableConfig):
     """Format completed sections as context for writing final sections.
     
     This node takes all completed research sections and formats them into
-    a single context string for writing summary sections.
+    a single context string for writing summary sections. With a blob store
+    configured, the string is stored once and every final section writer is
+    sent a reference to it.
     
     Args:
         state: Current state with completed sections
+        config: Configuration naming the blob store
         
     Returns:
         Dict with formatted sections as context
@@ -394,8 +575,12 @@ def gather_completed_sections(state: ReportState):
     # Format completed section to str to use as context for final sections
     completed_report_sections = format_sections(completed_sections)
 
-    return {"report_sections_from_research": completed_report_sections}
+    # Get configuration
+    configurable = Configuration.from_runnable_config(config)
+
+    return {"report_sections_from_research": store_text(completed_report_sections, get_blob_store(configurable.blob_store_dir, configurable.blob_max_age))}
 
+@instrument_node
 def compile_final_report(state: ReportState):
     """Compile all sections into the final report.
     
@@ -445,36 +630,85 @@ def initiate_final_section_writing(state: ReportState):
     ]
 
 
-# Report section sub-graph -- 
+# The graphs are built and compiled on first use, so importing this module stays cheap
+_compiled_graphs = {}
+_compiled_graphs_lock = threading.Lock()
 
-# Add nodes 
-section_builder = StateGraph(SectionState, output=SectionOutputState)
-section_builder.add_node("generate_queries", generate_queries)
-section_builder.add_node("search_web", search_web)
-section_builder.add_node("write_section", write_section)
 
-# Add edges
-section_builder.add_edge(START, "generate_queries")
-section_builder.add_edge("generate_queries", "search_web")
-section_builder.add_edge("search_web", "write_section")
+@cache
+def get_section_builder() -> StateGraph:
+    """Build the report section sub-graph."""
+    # Add nodes 
+    section_builder = StateGraph(SectionState, output=SectionOutputState)
+    section_builder.add_node("generate_queries", generate_queries)
+    section_builder.add_node("search_web", search_web)
+    section_builder.add_node("write_section", write_section)
 
-# Outer graph for initial report plan compiling results from each section -- 
+    # Add edges
+    section_builder.add_edge(START, "generate_queries")
+    section_builder.add_edge("generate_queries", "search_web")
+    section_builder.add_edge("search_web", "write_section")
+    return section_builder
 
-# Add nodes
-builder = StateGraph(ReportState, input=ReportStateInput, output=ReportStateOutput, config_schema=Configuration)
-builder.add_node("generate_report_plan", generate_report_plan)
-builder.add_node("human_feedback", human_feedback)
-builder.add_node("build_section_with_web_research", section_builder.compile())
-builder.add_node("gather_completed_sections", gather_completed_sections)
-builder.add_node("write_final_sections", write_final_sections)
-builder.add_node("compile_final_report", compile_final_report)
 
-# Add edges
-builder.add_edge(START, "generate_report_plan")
-builder.add_edge("generate_report_plan", "human_feedback")
-builder.add_edge("build_section_with_web_research", "gather_completed_sections")
-builder.add_conditional_edges("gather_completed_sections", initiate_final_section_writing, ["write_final_sections"])
-builder.add_edge("write_final_sections", "compile_final_report")
-builder.add_edge("compile_final_report", END)
+@cache
+def get_builder() -> StateGraph:
+    """Build the outer graph for initial report plan compiling results from each section."""
+    # Add nodes
+    builder = StateGraph(ReportState, input=ReportStateInput, output=ReportStateOutput, config_schema=Configuration)
+    builder.add_node("generate_report_plan", generate_report_plan)
+    builder.add_node("human_feedback", human_feedback)
+    builder.add_node("build_section_with_web_research", get_section_builder().compile())
+    builder.add_node("gather_completed_sections", gather_completed_sections)
+    builder.add_node("write_final_sections", write_final_sections)
+    builder.add_node("compile_final_report", compile_final_report)
 
-graph = builder.compile()
\ No newline at end of file
+    # Add edges
+    builder.add_edge(START, "generate_report_plan")
+    builder.add_edge("generate_report_plan", "human_feedback")
+    builder.add_edge("build_section_with_web_research", "gather_completed_sections")
+    builder.add_conditional_edges("gather_completed_sections", initiate_final_section_writing, ["write_final_sections"])
+    builder.add_edge("write_final_sections", "compile_final_report")
+    builder.add_edge("compile_final_report", END)
+    return builder
+
+
+def compile_graph(config: RunnableConfig = None, checkpointer=None):
+    """Compile the report graph with a durable checkpointer.
+
+    The compiled graph is cached per checkpointer, so callers sharing a
+    checkpointer also share one compiled graph.
+
+    Args:
+        config: Configuration naming the checkpoint_path and checkpoints_to_keep; CHECKPOINT_PATH and CHECKPOINTS_TO_KEEP environment variables take precedence
+        checkpointer: Checkpointer to use instead of the configured one
+
+    Returns:
+        The compiled graph
+    """
+    if checkpointer is None:
+        configurable = Configuration.from_runnable_config(config)
+        keep = configurable.checkpoints_to_keep
+        checkpointer = get_checkpointer(configurable.checkpoint_path, int(keep) if keep is not None else None)
+    return _compile(checkpointer)
+
+
+def _compile(checkpointer=None):
+    """Return the report graph compiled with a checkpointer, compiling it on first use."""
+    with _compiled_graphs_lock:
+        # Keyed by identity; the entry keeps the checkpointer alive so its id is not reused
+        entry = _compiled_graphs.get(id(checkpointer))
+        if entry is None:
+            entry = _compiled_graphs[id(checkpointer)] = (checkpointer, get_builder().compile(checkpointer=checkpointer))
+        return entry[1]
+
+
+def __getattr__(name: str):
+    # Served by LangGraph Platform, which supplies its own checkpointer
+    if name == "graph":
+        return _compile()
+    if name == "builder":
+        return get_builder()
+    if name == "section_builder":
+        return get_section_builder()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
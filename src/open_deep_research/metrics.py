@@ -0,0 +1,389 @@
+"""In-process counters, histograms and gauges, exported to Prometheus or OpenTelemetry."""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langgraph.errors import GraphBubbleUp
+
+try:
+    from opentelemetry import metrics as otel_metrics
+except ImportError:  # OpenTelemetry export is optional
+    otel_metrics = None
+
+logger = logging.getLogger(__name__)
+
+
+# Histogram buckets in seconds, from a cache hit to a slow section write
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+# Histogram buckets for sizes: prompt characters, tokens, source counts
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000)
+# Histogram buckets for fractions, such as the share of prompt tokens served from cache
+RATIO_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = [*key, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    """A monotonically increasing count, per label set."""
+
+    def __init__(self, name: str, description: str):
+        """Create an empty counter."""
+        self.name = name
+        self.description = description
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+        self._otel = None
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Add amount to the count for the given labels."""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+        if self._otel is not None:
+            self._otel.add(amount, dict(key))
+
+    def value(self, **labels: Any) -> float:
+        """Return the current count for the given labels."""
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        """Return the counter's lines in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            lines.extend(f"{self.name}{_format_labels(key)} {value}" for key, value in sorted(self._values.items()))
+        return lines
+
+
+class Histogram:
+    """A distribution of observed values in fixed buckets, per label set."""
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        """Create an empty histogram with the given bucket upper bounds."""
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelKey, List[float]] = {}  # bucket counts..., sum, count
+        self._lock = threading.Lock()
+        self._otel = None
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record one observation for the given labels."""
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+        if self._otel is not None:
+            self._otel.record(value, dict(key))
+
+    def summary(self, **labels: Any) -> Dict[str, float]:
+        """Return the count, sum and mean of the observations for the given labels."""
+        with self._lock:
+            state = self._values.get(_label_key(labels))
+            if state is None:
+                return {"count": 0, "sum": 0.0, "mean": 0.0}
+            return {"count": state[-1], "sum": state[-2], "mean": state[-2] / state[-1]}
+
+    def render(self) -> List[str]:
+        """Return the histogram's lines in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, state):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', repr(float(bound)))])} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {state[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {state[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-process metrics, exported in the Prometheus text format and optionally to OpenTelemetry.
+
+    Counters and histograms are recorded as they happen. Gauges are read from
+    collector callbacks at export time, which is how the caches and other
+    components that already keep their own counters are exposed.
+    """
+
+    def __init__(self):
+        """Create an empty registry, not yet bound to OpenTelemetry."""
+        self._metrics: Dict[str, Any] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+        self._meter = None
+
+    def counter(self, name: str, description: str) -> Counter:
+        """Return the counter with this name, creating it on first use."""
+        return self._get(name, lambda: Counter(name, description))
+
+    def histogram(self, name: str, description: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        """Return the histogram with this name, creating it on first use."""
+        return self._get(name, lambda: Histogram(name, description, buckets))
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+                if self._meter is not None:
+                    self._bind_otel(metric)
+            return metric
+
+    def register_collector(self, name: str, collect: Callable[[], Dict[str, float]]) -> None:
+        """Expose numbers another component keeps as gauges named <name>_<key>.
+
+        Args:
+            name (str): Metric name prefix, e.g. "odr_search_cache".
+            collect (Callable[[], Dict[str, float]]): Returns the current values; non-numeric values are skipped.
+        """
+        with self._lock:
+            self._collectors[name] = collect
+
+    def _collect_gauges(self) -> Dict[str, float]:
+        gauges = {}
+        with self._lock:
+            collectors = list(self._collectors.items())
+        for prefix, collect in collectors:
+            try:
+                values = collect()
+            except Exception as e:
+                logger.warning("Metrics collector %s failed: %s", prefix, e)
+                continue
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    gauges[f"{prefix}_{key}"] = float(value)
+        return gauges
+
+    def render(self) -> str:
+        """Export every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for name, value in sorted(self._collect_gauges().items()):
+            lines.extend([f"# TYPE {name} gauge", f"{name} {value}"])
+        return "\n".join(lines) + "\n"
+
+    def enable_opentelemetry(self, meter_provider: Any = None) -> None:
+        """Mirror every metric to OpenTelemetry instruments as well.
+
+        Args:
+            meter_provider (Any): The OpenTelemetry MeterProvider, or None for the global one.
+
+        Raises:
+            ImportError: If opentelemetry-api is not installed.
+        """
+        if otel_metrics is None:
+            raise ImportError("OpenTelemetry export requires the opentelemetry-api package")
+        provider = meter_provider or otel_metrics.get_meter_provider()
+        with self._lock:
+            self._meter = provider.get_meter("open_deep_research")
+            for metric in self._metrics.values():
+                self._bind_otel(metric)
+            self._meter.create_observable_gauge(
+                "odr_component_stats",
+                callbacks=[lambda options: [otel_metrics.Observation(v, {"stat": k}) for k, v in self._collect_gauges().items()]],
+                description="Counters kept by caches, search coalescing and speculative research",
+            )
+
+    def _bind_otel(self, metric: Any) -> None:
+        if isinstance(metric, Counter):
+            metric._otel = self._meter.create_counter(metric.name, description=metric.description)
+        else:
+            metric._otel = self._meter.create_histogram(metric.name, description=metric.description)
+
+    def serve(self, port: int = 9464, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """Serve the Prometheus exposition at /metrics from a background thread.
+
+        Args:
+            port (int): Port to listen on.
+            host (str): Interface to bind.
+
+        Returns:
+            ThreadingHTTPServer: The running server; call shutdown() to stop it.
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# Shared by everything in the process
+registry = MetricsRegistry()
+
+NODE_SECONDS = registry.histogram("odr_node_duration_seconds", "Wall time of graph node runs")
+NODE_ERRORS = registry.counter("odr_node_errors_total", "Graph node runs that raised")
+MODEL_SECONDS = registry.histogram("odr_model_call_duration_seconds", "Wall time of chat model calls, including rate-limit waits")
+MODEL_TOKENS = registry.counter("odr_model_tokens_total", "Tokens used by chat model calls, as reported by the provider")
+PROMPT_CHARS = registry.histogram("odr_prompt_chars", "Characters in each chat model prompt", SIZE_BUCKETS)
+RATE_LIMIT_WAIT = registry.histogram("odr_rate_limit_wait_seconds", "Time spent waiting for rate limits before a request")
+SEARCH_SECONDS = registry.histogram("odr_search_duration_seconds", "Wall time of search backend requests")
+SEARCH_QUERIES = registry.counter("odr_search_queries_total", "Queries sent to search backends")
+SEARCH_ERRORS = registry.counter("odr_search_errors_total", "Search backend requests that raised")
+SEARCH_HEDGES = registry.counter("odr_search_hedges_total", "Queries under a deadline or hedge by outcome: primary, hedge_won, primary_after_hedge, timeout or failed")
+SEARCH_QUERY_SECONDS = registry.histogram("odr_search_query_duration_seconds", "Wall time of each query under a deadline or hedge, until its first usable response")
+PAGE_FETCHES = registry.counter("odr_page_fetches_total", "Page and document fetches by outcome: cache_hit, not_modified, fetched, truncated, too_large, skipped, blocked or failed")
+PAGE_FETCH_SECONDS = registry.histogram("odr_page_fetch_duration_seconds", "Wall time of full-page fetch requests")
+PAGE_FETCH_BYTES = registry.histogram("odr_page_fetch_bytes", "Bytes read from each fetched page", SIZE_BUCKETS)
+EXTRACTION_DOCUMENTS = registry.counter("odr_extraction_documents_total", "Documents sent to the text extraction workers by outcome: extracted, timeout or failed")
+EXTRACTION_BATCH_SIZE = registry.histogram("odr_extraction_batch_size", "Documents in each batch sent to a text extraction worker", SIZE_BUCKETS)
+EXTRACTION_SECONDS = registry.histogram("odr_extraction_duration_seconds", "Wall time of each text extraction batch, including time queued for a worker")
+SEARCH_LOOKUPS = registry.counter("odr_search_lookups_total", "Search queries by how they were answered: cache, coalesced or backend")
+MODEL_ROUTES = registry.counter("odr_model_routes_total", "Routed structured calls by outcome: answered by the fast model, or escalated after an error or a rejected answer")
+SECTION_GRADINGS = registry.counter("odr_section_gradings_total", "Section gradings by who decided them: the llm, or skipped as the terminal iteration or passed by the local pre-grader")
+PREGRADE_RESULTS = registry.counter("odr_pregrade_results_total", "Local pre-grader results: pass, or the first check that failed")
+PROMPT_CACHE_RATIO = registry.histogram("odr_run_prompt_cache_ratio", "Share of each run's prompt tokens read from the provider's prompt cache", RATIO_BUCKETS)
+SOURCES = registry.histogram("odr_sources_per_context", "Sources per formatted context, before and after deduplication", SIZE_BUCKETS)
+CONTEXT_CHARS = registry.histogram("odr_context_chars", "Characters in each formatted search context", SIZE_BUCKETS)
+
+
+def instrument_node(func: Callable) -> Callable:
+    """Record the wall time and failures of a graph node.
+
+    The wrapper keeps the node's signature and annotations, so LangGraph still
+    passes it a config and reads its Command destinations. Interrupts and other
+    control flow LangGraph raises through nodes are not counted as failures.
+
+    Args:
+        func (Callable): The node function, sync or async.
+
+    Returns:
+        Callable: The instrumented node.
+    """
+    name = func.__name__
+
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_node(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except GraphBubbleUp:
+                raise
+            except Exception:
+                NODE_ERRORS.inc(node=name)
+                raise
+            finally:
+                NODE_SECONDS.observe(time.perf_counter() - start, node=name)
+        return async_node
+
+    @functools.wraps(func)
+    def node(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except GraphBubbleUp:
+            raise
+        except Exception:
+            NODE_ERRORS.inc(node=name)
+            raise
+        finally:
+            NODE_SECONDS.observe(time.perf_counter() - start, node=name)
+    return node
+
+
+# Token totals of the run the current task belongs to, set by track_usage
+_run_usage: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar("odr_run_usage", default=None)
+
+
+@contextlib.contextmanager
+def track_usage() -> Iterator[Dict[str, int]]:
+    """Total the token usage of every model call made inside the block, e.g. one report run.
+
+    Tasks started inside the block, such as graph nodes, inherit the totals
+    through their context, so concurrent runs in one process are kept apart.
+    On exit, the run's cached-token ratio is recorded in PROMPT_CACHE_RATIO and
+    added to the totals as "cached_ratio".
+
+    Yields:
+        Dict[str, int]: Model calls, prompt, cached prompt and completion tokens so far.
+    """
+    usage = {"calls": 0, "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0}
+    token = _run_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _run_usage.reset(token)
+        if usage["prompt_tokens"]:
+            usage["cached_ratio"] = round(usage["cached_prompt_tokens"] / usage["prompt_tokens"], 4)
+            PROMPT_CACHE_RATIO.observe(usage["cached_ratio"])
+
+
+def record_model_call(provider: str, seconds: float, prompt_chars: int, usage: Optional[Dict[str, Any]]) -> None:
+    """Record one chat model call.
+
+    Args:
+        provider (str): The model provider.
+        seconds (float): Wall time of the call, including rate-limit waits and retries.
+        prompt_chars (int): Characters in the prompt.
+        usage (Optional[Dict[str, Any]]): The response's usage_metadata, if the provider reported one.
+    """
+    MODEL_SECONDS.observe(seconds, provider=provider)
+    PROMPT_CHARS.observe(prompt_chars, provider=provider)
+    run_usage = _run_usage.get()
+    if run_usage is not None:
+        run_usage["calls"] += 1
+    if not usage:
+        return
+
+    details = usage.get("input_token_details") or {}
+    MODEL_TOKENS.inc(usage.get("input_tokens", 0), provider=provider, kind="prompt")
+    MODEL_TOKENS.inc(usage.get("output_tokens", 0), provider=provider, kind="completion")
+    if details.get("cache_read"):
+        MODEL_TOKENS.inc(details["cache_read"], provider=provider, kind="prompt_cached")
+    if details.get("cache_creation"):
+        MODEL_TOKENS.inc(details["cache_creation"], provider=provider, kind="prompt_cache_write")
+
+    if run_usage is not None:
+        run_usage["prompt_tokens"] += usage.get("input_tokens", 0)
+        run_usage["cached_prompt_tokens"] += details.get("cache_read") or 0
+        run_usage["completion_tokens"] += usage.get("output_tokens", 0)
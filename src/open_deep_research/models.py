@@ -0,0 +1,234 @@
+"""Shared chat models, prompt shaping for provider caches, and rate-limited model calls."""
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from langchain.chat_models import init_chat_model
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel
+
+from open_deep_research.metrics import MODEL_ROUTES, record_model_call
+from open_deep_research.rate_limit import (
+    get_provider_limiter,
+    message_chars,
+    response_usage,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Extra init kwargs for models that need them, e.g. a thinking budget for claude-3-7
+MODEL_KWARGS: Dict[str, Dict[str, Any]] = {
+    "claude-3-7-sonnet-latest": {
+        "max_tokens": 20_000,
+        "thinking": {"type": "enabled", "budget_tokens": 16_000},
+    },
+}
+
+# Providers that cache a prompt prefix only up to explicit cache_control breakpoints,
+# and how many breakpoints one request may carry
+CACHE_BREAKPOINT_PROVIDERS = {"anthropic": 4}
+
+_chat_models: Dict[Tuple[str, str, str], BaseChatModel] = {}
+_structured_models: Dict[Tuple[str, str, str, Type[BaseModel]], Runnable] = {}
+_lock = threading.Lock()
+
+
+def get_model_kwargs(model: str) -> Dict[str, Any]:
+    """Return the extra init kwargs a model needs, such as a thinking budget.
+
+    Args:
+        model (str): The model name.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for init_chat_model, empty if the model needs none.
+    """
+    return dict(MODEL_KWARGS.get(model, {}))
+
+
+def _freeze_kwargs(kwargs: Dict[str, Any]) -> str:
+    """Turn init kwargs into a hashable, order-independent key."""
+    return json.dumps(kwargs, sort_keys=True, default=repr)
+
+
+def get_chat_model(
+    model: str,
+    model_provider: str,
+    output_schema: Optional[Type[BaseModel]] = None,
+    **kwargs: Any,
+) -> Runnable:
+    """Return a shared, already-configured chat model.
+
+    Models are built once per (provider, model, kwargs) and reused for the life
+    of the process, so the HTTP clients they hold are pooled across every node,
+    section and report instead of being rebuilt on each call. Structured-output
+    wrappers are cached the same way, per output schema.
+
+    Args:
+        model (str): The model name.
+        model_provider (str): The provider passed to init_chat_model.
+        output_schema (Optional[Type[BaseModel]]): If given, return the model wrapped with
+            with_structured_output(output_schema, include_raw=True), whose raw message carries the usage.
+        **kwargs: Extra init kwargs passed to init_chat_model.
+
+    Returns:
+        Runnable: The shared chat model, or its structured-output wrapper.
+    """
+    frozen = _freeze_kwargs(kwargs)
+    base_key = (model_provider, model, frozen)
+
+    with _lock:
+        if output_schema is not None:
+            structured = _structured_models.get((*base_key, output_schema))
+            if structured is not None:
+                return structured
+
+        chat_model = _chat_models.get(base_key)
+        if chat_model is None:
+            chat_model = _chat_models[base_key] = init_chat_model(model=model, model_provider=model_provider, **kwargs)
+
+        if output_schema is None:
+            return chat_model
+
+        structured = _structured_models[(*base_key, output_schema)] = chat_model.with_structured_output(output_schema, include_raw=True)
+        return structured
+
+
+def clear_chat_models() -> None:
+    """Drop every cached chat model, e.g. after rotating API keys."""
+    with _lock:
+        _chat_models.clear()
+        _structured_models.clear()
+
+
+def prepare_messages(messages: Any, model_provider: str) -> Any:
+    """Shape a prompt for a provider's prompt cache.
+
+    Prompts are written as a system message followed by one or more human
+    messages that together form the user turn, ordered from the most widely
+    shared part to the most specific. For providers that need explicit cache
+    breakpoints, the parts are merged into one message of text blocks, with a
+    cache_control breakpoint after the system message and every part but the
+    last (keeping the latest ones if there are more than the provider allows).
+    For every other provider the parts are simply joined; those that cache
+    prompts automatically match the same stable prefix.
+
+    Args:
+        messages (Any): The messages to send.
+        model_provider (str): The provider the prompt goes to.
+
+    Returns:
+        Any: The messages to send, unchanged if there is nothing to merge or mark.
+    """
+    if not isinstance(messages, list) or len(messages) < 2 or not all(isinstance(m.content, str) for m in messages):
+        return messages
+
+    system, parts = messages[0], messages[1:]
+    if not isinstance(system, SystemMessage) or not all(isinstance(m, HumanMessage) for m in parts):
+        return messages
+
+    max_breakpoints = CACHE_BREAKPOINT_PROVIDERS.get(model_provider)
+    if not max_breakpoints:
+        if len(parts) == 1:
+            return messages
+        return [system, HumanMessage(content="\n".join(m.content for m in parts))]
+
+    # Breakpoints go after the system message and each part but the last
+    blocks: List[Dict[str, Any]] = [{"type": "text", "text": m.content} for m in messages]
+    for block in blocks[:-1][-max_breakpoints:]:
+        block["cache_control"] = {"type": "ephemeral"}
+    return [SystemMessage(content=blocks[:1]), HumanMessage(content=blocks[1:])]
+
+
+async def ainvoke_model(
+    llm: Runnable,
+    messages: Any,
+    model_provider: str,
+    rate_limits: Optional[Dict[str, Dict[str, Any]]] = None,
+    config: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """Call a chat model asynchronously within its provider's rate limits.
+
+    The prompt is first shaped for the provider's prompt cache with prepare_messages.
+    Structured-output runnables from get_chat_model return the raw message
+    alongside the parsed answer; its token usage is recorded and the parsed
+    answer returned.
+
+    Args:
+        llm (Runnable): The chat model or structured-output runnable to call.
+        messages (Any): The messages to send.
+        model_provider (str): The provider the model belongs to.
+        rate_limits (Optional[Dict[str, Dict[str, Any]]]): Per-provider limits from Configuration.provider_rate_limits.
+        config (Optional[Dict[str, Any]]): Optional runnable config passed to ainvoke.
+
+    Returns:
+        Any: The model response, or the parsed answer of a structured-output runnable.
+
+    Raises:
+        Exception: The parsing error, if a structured answer could not be parsed.
+    """
+    limiter = get_provider_limiter(model_provider, (rate_limits or {}).get(model_provider))
+    start = time.perf_counter()
+    result = await limiter.ainvoke(llm, prepare_messages(messages, model_provider), config)
+    record_model_call(model_provider, time.perf_counter() - start, message_chars(messages), response_usage(result))
+    if isinstance(result, dict) and "parsed" in result:
+        if result.get("parsing_error") is not None:
+            raise result["parsing_error"]
+        return result["parsed"]
+    return result
+
+
+async def ainvoke_routed(
+    output_schema: Type[BaseModel],
+    messages: Any,
+    model: str,
+    model_provider: str,
+    fast_model: Optional[str] = None,
+    fast_provider: Optional[str] = None,
+    accept: Optional[Callable[[Any], bool]] = None,
+    rate_limits: Optional[Dict[str, Dict[str, Any]]] = None,
+    role: str = "",
+    model_kwargs: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """Get a structured answer from a fast model, escalating to the full model when needed.
+
+    The fast model is tried first. Its answer is used unless the call fails
+    (including structured-output parsing errors), returns nothing, or is
+    rejected by accept, in which case the same messages go to the full model.
+    Without a fast model, or when it is the full model, only the full model is called.
+
+    Args:
+        output_schema (Type[BaseModel]): The schema of the answer.
+        messages (Any): The messages to send.
+        model (str): The full model for this role.
+        model_provider (str): The full model's provider.
+        fast_model (Optional[str]): The cheaper model to try first.
+        fast_provider (Optional[str]): The cheaper model's provider.
+        accept (Optional[Callable[[Any], bool]]): Returns False for a fast answer that should be escalated, e.g. a borderline grade.
+        rate_limits (Optional[Dict[str, Dict[str, Any]]]): Per-provider limits from Configuration.provider_rate_limits.
+        role (str): The role making the call, used to label the routing metric.
+        model_kwargs (Optional[Dict[str, Any]]): Extra init kwargs for the full model, e.g. from get_model_kwargs.
+
+    Returns:
+        Any: The structured answer.
+    """
+    if fast_model and fast_provider and (fast_model, fast_provider) != (model, model_provider):
+        fast_llm = get_chat_model(fast_model, fast_provider, output_schema)
+        try:
+            result = await ainvoke_model(fast_llm, messages, fast_provider, rate_limits)
+        except Exception as e:
+            logger.warning("Fast model %s failed for %s, escalating to %s: %s", fast_model, role or output_schema.__name__, model, e)
+            MODEL_ROUTES.inc(role=role, outcome="escalated_error")
+        else:
+            if result is not None and (accept is None or accept(result)):
+                MODEL_ROUTES.inc(role=role, outcome="fast")
+                return result
+            MODEL_ROUTES.inc(role=role, outcome="escalated_rejected")
+
+    llm = get_chat_model(model, model_provider, output_schema, **(model_kwargs or {}))
+    return await ainvoke_model(llm, messages, model_provider, rate_limits)
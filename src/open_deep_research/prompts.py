@@ -1,16 +1,13 @@
-reprt_planner_query_writer_instructions = """
-You are assisting with research for an upcoming report.
-
-<Report Topic>  
-{topic}  
-</Report Topic>
+# Each prompt is split into static instructions, sent as the system message, and
+# inputs that follow them. Inputs are ordered from the most widely shared to the
+# most specific, so the longest possible prefix of every prompt stays the same
+# across calls and can be served from the provider's prompt cache.
 
-<Report Structure>  
-{report_organization}  
-</Report Structure>
+report_planner_query_writer_instructions = """
+You are assisting with research for an upcoming report.
 
 <Task>  
-Your objective is to generate {number_of_queries} targeted web search queries to support the development of this report.
+Your objective is to generate {number_of_queries} targeted web search queries to support the development of the report described below.
 
 Each query should:  
 1. Be clearly related to the report topic.  
@@ -28,26 +25,23 @@ Call the Queries tool.
 
 """
 
-report_planner_instructions = """
-You are creating a clear, concise plan for a report.
-
-<Report Topic>
-The topic of the report is:
-{topic}
+report_planner_query_writer_inputs = """
+<Report Topic>  
+{topic}  
 </Report Topic>
 
-<Report Structure>
-The report should follow this organization:
-{report_organization}
+<Report Structure>  
+{report_organization}  
 </Report Structure>
 
-<Context>
-Use the following background to inform your section planning:
-{context}
-</Context>
+Generate search queries that will help with planning the sections of the report.
+"""
+
+report_planner_instructions = """
+You are creating a clear, concise plan for a report.
 
 <Task>
-Generate a list of well-structured report sections. The structure should be tight, purposeful, and free of redundancy or filler.
+Using the report topic, structure and background context provided, generate a list of well-structured report sections. The structure should be tight, purposeful, and free of redundancy or filler.
 
 Each section must include the following fields:
 - Name: A concise name for this section.
@@ -63,31 +57,47 @@ Guidelines:
 - Ensure the structure follows a logical narrative or analytical flow.
 
 Review the entire plan before submitting to confirm it is focused, efficient, and logically ordered.
+If feedback on the report structure from a previous review is given, address it.
 </Task>
 
-<Feedback>
-Here is feedback on the report structure from a previous review (if any):
-{feedback}
-</Feedback>
-
 <Format>
 Call the Sections tool
 </Format>
 """
 
-query_writer_instructions = """
-You are an expert technical writer developing targeted web search queries to support a specific section of a technical report.
-
+# Unchanged when the plan is revised after feedback
+report_planner_context = """
 <Report Topic>
+The topic of the report is:
 {topic}
 </Report Topic>
 
-<Section Topic>
-{section_topic}
-</Section Topic>
+<Report Structure>
+The report should follow this organization:
+{report_organization}
+</Report Structure>
+
+<Context>
+Use the following background to inform your section planning:
+{context}
+</Context>
+"""
+
+report_planner_inputs = """
+<Feedback>
+Here is feedback on the report structure from a previous review (if any):
+{feedback}
+</Feedback>
+
+Generate the sections of the report. Your response must include a 'sections' field containing a list of sections. 
+Each section must have: name, description, plan, research, and content fields.
+"""
+
+query_writer_instructions = """
+You are an expert technical writer developing targeted web search queries to support a specific section of a technical report.
 
 <Task>
-Your goal is to create {number_of_queries} web search queries to support research for the above section.
+Your goal is to create {number_of_queries} web search queries to support research for the section described below.
 
 Each query should:
 1. Be directly related to the section topic.
@@ -103,6 +113,19 @@ Avoid overly broad or vague queries—focus on actionable research prompts.
 Call the Queries tool
 </Format>
 """
+
+query_writer_inputs = """
+<Report Topic>
+{topic}
+</Report Topic>
+
+<Section Topic>
+{section_topic}
+</Section Topic>
+
+Generate search queries on the provided topic.
+"""
+
 section_writer_instructions = """Write one section of a research report.
 
 <Task>
@@ -138,11 +161,19 @@ section_writer_instructions = """Write one section of a research report.
 </Final Check>
 """
 
-section_writer_inputs=""" 
+# Followed by the source material, one part per search iteration, so the sources
+# of earlier iterations are a prefix shared with the previous writing call
+section_writer_context = """ 
 <Report topic>
 {topic}
 </Report topic>
 
+<Source material>
+"""
+
+section_writer_inputs = """
+</Source material>
+
 <Section name>
 {section_name}
 </Section name>
@@ -154,24 +185,8 @@ section_writer_inputs="""
 <Existing section content (if populated)>
 {section_content}
 </Existing section content>
-
-<Source material>
-{context}
-</Source material>
 """
-section_grader_instructions = """Review a report section relative to the specified topic:
-
-<Report topic>
-{topic}
-</Report topic>
-
-<section topic>
-{section_topic}
-</section topic>
-
-<section content>
-{section}
-</section content>
+section_grader_instructions = """Review a report section relative to the specified topic.
 
 <task>
 Evaluate whether the section content adequately addresses the section topic.
@@ -191,23 +206,25 @@ follow_up_queries: List[SearchQuery] = Field(
 </format>
 """
 
-final_section_writer_instructions="""You are an expert technical writer crafting a section that synthesizes information from the rest of the report.
-
+section_grader_inputs = """
 <Report topic>
 {topic}
 </Report topic>
 
-<Section name>
-{section_name}
-</Section name>
-
-<Section topic> 
+<section topic>
 {section_topic}
-</Section topic>
+</section topic>
 
-<Available report content>
-{context}
-</Available report content>
+<section content>
+{section}
+</section content>
+
+Grade the report and consider follow-up questions for missing information. 
+If the grade is 'pass', return empty strings for all follow-up queries. 
+If the grade is 'fail', provide specific search queries to gather missing information.
+"""
+
+final_section_writer_instructions="""You are an expert technical writer crafting a section that synthesizes information from the rest of the report.
 
 <Task>
 1. Section-Specific Approach:
@@ -249,4 +266,27 @@ For Conclusion/Summary:
 - For conclusion: 100-150 word limit, ## for section title, only ONE structural element at most, no sources section
 - Markdown format
 - Do not include word count or any preamble in your response
-</Quality Checks>"""
\ No newline at end of file
+</Quality Checks>"""
+
+# Shared by every section written from the others
+final_section_writer_context = """
+<Report topic>
+{topic}
+</Report topic>
+
+<Available report content>
+{context}
+</Available report content>
+"""
+
+final_section_writer_inputs = """
+<Section name>
+{section_name}
+</Section name>
+
+<Section topic> 
+{section_topic}
+</Section topic>
+
+Generate a report section based on the provided sources.
+"""
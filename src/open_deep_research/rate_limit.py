@@ -0,0 +1,312 @@
+"""Token buckets and per-provider limits for model and search calls."""
+
+import asyncio
+import json
+import random
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from open_deep_research.metrics import RATE_LIMIT_WAIT
+
+
+class TokenBucket:
+    """Thread-safe token bucket that hands out reservations in arrival order.
+
+    Each acquire takes its tokens immediately, letting the balance go negative,
+    and then sleeps until the bucket would have refilled. Later callers see the
+    debt left by earlier ones, so waiters are served first-in first-out across
+    every task, thread and event loop sharing the bucket.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """Create a full bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float): Maximum number of tokens the bucket holds, i.e. the burst size.
+        """
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, amount: float, burst: Optional[float] = None) -> "TokenBucket":
+        """Build a bucket allowing amount tokens per minute, bursting up to burst (default: amount)."""
+        return cls(rate=amount / 60.0, capacity=burst or amount)
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens earned since the last update. Caller holds the lock."""
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take tokens from the bucket without waiting.
+
+        Args:
+            amount (float): Number of tokens to take.
+
+        Returns:
+            float: Seconds the caller must wait before its reservation is honoured.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Take tokens from the bucket, sleeping until they are available.
+
+        Args:
+            amount (float): Number of tokens to take.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        delay = self.reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) tokens after the fact, e.g. once real usage is known."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+    def pause(self, seconds: float) -> None:
+        """Make every caller wait at least seconds from now, e.g. after the server returned 429."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+def message_chars(messages: Any) -> int:
+    """Count the characters of a list of chat messages.
+
+    Args:
+        messages (Any): Chat messages, or anything else that will be sent to a chat model.
+
+    Returns:
+        int: The total length of the message contents.
+    """
+    if not isinstance(messages, (list, tuple)):
+        messages = [messages]
+    chars = 0
+    for message in messages:
+        content = getattr(message, "content", message)
+        if isinstance(content, list):
+            # Content blocks, e.g. text marked with cache breakpoints
+            chars += sum(len(block.get("text", "")) if isinstance(block, dict) else len(str(block)) for block in content)
+        else:
+            chars += len(content) if isinstance(content, str) else len(str(content))
+    return chars
+
+
+def estimate_message_tokens(messages: Any) -> int:
+    """Roughly estimate the prompt tokens of a list of chat messages.
+
+    Args:
+        messages (Any): Chat messages, or anything else that will be sent to a chat model.
+
+    Returns:
+        int: The estimated token count, at about 4 characters per token.
+    """
+    return message_chars(messages) // 4 + 1
+
+
+def response_usage(result: Any) -> Optional[Dict[str, Any]]:
+    """Return the usage_metadata of a chat model response.
+
+    Args:
+        result (Any): A chat message, or the {"raw", "parsed", "parsing_error"} dict of a
+            structured-output runnable built with include_raw=True.
+
+    Returns:
+        Optional[Dict[str, Any]]: The usage the provider reported, or None.
+    """
+    if isinstance(result, dict) and "raw" in result:
+        result = result["raw"]
+    return getattr(result, "usage_metadata", None)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Return True if an exception from a provider SDK signals a rate limit (HTTP 429)."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or "RateLimit" in type(error).__name__
+
+
+class ProviderLimiter:
+    """Per-provider limits on chat model calls.
+
+    Calls are scheduled through optional requests-per-minute and tokens-per-minute
+    token buckets and an optional cap on concurrent requests. Rate-limit errors
+    are retried with jittered exponential backoff, and pause the buckets so
+    every other caller backs off too.
+    """
+
+    def __init__(
+        self,
+        name: str = "",
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: int = 5,
+    ):
+        """Create a limiter. Limits left as None are not enforced.
+
+        Args:
+            name (str): The provider name, used to label its wait-time metric.
+            requests_per_minute (Optional[float]): Maximum requests started per minute.
+            tokens_per_minute (Optional[float]): Maximum prompt plus completion tokens per minute.
+            max_concurrency (Optional[int]): Maximum requests in flight at once.
+            max_retries (int): How many times to retry a call that hit a rate limit.
+        """
+        self.name = name
+        self.requests = TokenBucket.per_minute(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket.per_minute(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = int(max_concurrency) if max_concurrency else None
+        self.max_retries = max_retries
+        self._semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = weakref.WeakKeyDictionary()
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one of max_concurrency slots on the running event loop."""
+        if not self.max_concurrency:
+            yield
+            return
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        async with semaphore:
+            yield
+
+    async def wait(self, estimated_tokens: int = 0) -> float:
+        """Wait for a request slot in the rate buckets.
+
+        Args:
+            estimated_tokens (int): Tokens to reserve up front in the tokens-per-minute bucket.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        if self.requests:
+            waited += await self.requests.acquire()
+        if self.tokens and estimated_tokens:
+            waited += await self.tokens.acquire(estimated_tokens)
+        RATE_LIMIT_WAIT.observe(waited, provider=self.name)
+        return waited
+
+    def backoff(self, attempt: int) -> float:
+        """Pause the buckets after a rate-limit error and return how long this caller should sleep."""
+        delay = min(60.0, 2.0 ** attempt) * random.uniform(0.5, 1.5)
+        for bucket in (self.requests, self.tokens):
+            if bucket:
+                bucket.pause(delay)
+        return delay
+
+    async def ainvoke(self, runnable: Any, messages: Any, config: Optional[Dict[str, Any]] = None) -> Any:
+        """Call runnable.ainvoke within the provider's limits.
+
+        Args:
+            runnable (Any): The chat model or structured-output runnable to call.
+            messages (Any): The input passed to ainvoke.
+            config (Optional[Dict[str, Any]]): Optional runnable config passed to ainvoke.
+
+        Returns:
+            Any: Whatever the runnable returns.
+        """
+        estimated = estimate_message_tokens(messages) if self.tokens else 0
+        attempt = 0
+        while True:
+            await self.wait(estimated)
+            try:
+                async with self._slot():
+                    result = await runnable.ainvoke(messages, config)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_rate_limit_error(e):
+                    raise
+                await asyncio.sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+
+            # Settle the token bucket against what the call really used, when the provider reports it
+            usage = response_usage(result)
+            if self.tokens and usage:
+                self.tokens.adjust(usage.get("total_tokens", estimated) - estimated)
+            return result
+
+
+_provider_limiters: Dict[Tuple[str, str], ProviderLimiter] = {}
+_provider_limiters_lock = threading.Lock()
+
+
+def get_provider_limiter(provider: str, limits: Optional[Dict[str, Any]] = None) -> ProviderLimiter:
+    """Return the process-wide limiter for a model provider.
+
+    Args:
+        provider (str): The model provider name, e.g. "anthropic".
+        limits (Optional[Dict[str, Any]]): ProviderLimiter kwargs such as requests_per_minute, tokens_per_minute and max_concurrency.
+
+    Returns:
+        ProviderLimiter: The limiter shared by every caller using the same provider and limits.
+    """
+    key = (provider, json.dumps(limits or {}, sort_keys=True))
+    with _provider_limiters_lock:
+        limiter = _provider_limiters.get(key)
+        if limiter is None:
+            limiter = _provider_limiters[key] = ProviderLimiter(provider, **(limits or {}))
+        return limiter
+
+
+# Published request limits for search backends: tokens (requests) per second and burst size.
+# arXiv asks for no more than one request every three seconds.
+SEARCH_RATE_LIMITS: Dict[str, Dict[str, float]] = {
+    "arxiv": {"rate": 1 / 3, "capacity": 1},
+}
+
+_backend_limiters: Dict[str, TokenBucket] = {}
+_backend_limiters_lock = threading.Lock()
+
+
+def register_backend_rate_limit(backend: str, rate: float, capacity: float = 1.0) -> TokenBucket:
+    """Declare (or replace) the request rate limit for a search backend.
+
+    Args:
+        backend (str): The search API name, e.g. "arxiv".
+        rate (float): Requests allowed per second.
+        capacity (float): Burst size, the number of requests that may start back to back.
+
+    Returns:
+        TokenBucket: The bucket now shared by every caller of that backend.
+    """
+    with _backend_limiters_lock:
+        SEARCH_RATE_LIMITS[backend] = {"rate": rate, "capacity": capacity}
+        bucket = _backend_limiters[backend] = TokenBucket(rate=rate, capacity=capacity)
+        return bucket
+
+
+def get_backend_limiter(backend: str) -> Optional[TokenBucket]:
+    """Return the process-wide rate limiter for a search backend.
+
+    Args:
+        backend (str): The search API name.
+
+    Returns:
+        Optional[TokenBucket]: The shared bucket, or None if the backend declares no limit.
+    """
+    with _backend_limiters_lock:
+        bucket = _backend_limiters.get(backend)
+        if bucket is None and backend in SEARCH_RATE_LIMITS:
+            bucket = _backend_limiters[backend] = TokenBucket(**SEARCH_RATE_LIMITS[backend])
+        return bucket
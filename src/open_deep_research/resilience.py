@@ -0,0 +1,336 @@
+"""Retries, circuit breakers and pooled clients for the search backends."""
+
+import asyncio
+import inspect
+import logging
+import random
+import threading
+import time
+import weakref
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    TypeVar,
+)
+
+from open_deep_research.metrics import registry
+from open_deep_research.rate_limit import is_rate_limit_error
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: timeouts, rate limits and server-side failures
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+# Exception class name fragments used by the search SDKs for transient failures
+RETRYABLE_ERROR_NAMES = ("Timeout", "Connect", "RateLimit", "Ratelimit", "Temporar", "Unavailable")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose circuit breaker is open."""
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Return True if an exception from a search SDK is likely to succeed when retried."""
+    if is_rate_limit_error(error) or isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return any(fragment in type(error).__name__ for fragment in RETRYABLE_ERROR_NAMES)
+
+
+class BackendHealth:
+    """Circuit breaker, retry policy and health statistics for one search backend.
+
+    Failed requests are retried with jittered exponential backoff when the
+    error is transient. After failure_threshold requests in a row have failed
+    (retries included), the circuit opens and requests fail fast with
+    CircuitOpenError for cooldown seconds. Then a single probe request is let
+    through: its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        max_retries: int = 2,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+    ):
+        """Create the health tracker for a backend, with its circuit closed.
+
+        Args:
+            name (str): The backend name.
+            failure_threshold (int): Consecutive failed requests that open the circuit.
+            cooldown (float): Seconds the circuit stays open before a probe request is allowed.
+            max_retries (int): Retries of a request that failed with a transient error.
+            base_delay (float): Backoff before the first retry, doubled for each further one.
+            max_delay (float): Upper bound on the backoff between retries.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._consecutive_failures = 0
+        self._counts = {"requests": 0, "successes": 0, "failures": 0, "retries": 0, "rejected": 0, "circuit_opens": 0}
+        self._latency_ewma: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        """Return "closed", "open" or "half_open"."""
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        """Return the circuit state. Caller holds the lock."""
+        if self._opened_at is None:
+            return "closed"
+        return "open" if now - self._opened_at < self.cooldown else "half_open"
+
+    def _admit(self) -> bool:
+        """Decide whether a request may go out, claiming the probe slot when half open."""
+        with self._lock:
+            self._counts["requests"] += 1
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            self._counts["rejected"] += 1
+            return False
+
+    def _record(self, succeeded: bool, seconds: float, error: Optional[BaseException] = None) -> None:
+        """Update the circuit and statistics after a request finished."""
+        with self._lock:
+            self._probing = False
+            if succeeded:
+                self._counts["successes"] += 1
+                self._consecutive_failures = 0
+                self._opened_at = None
+                # Exponentially weighted, so the figure follows the backend's current latency
+                self._latency_ewma = seconds if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * seconds
+                return
+            self._counts["failures"] += 1
+            self._consecutive_failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+            if self._opened_at is not None or self._consecutive_failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    self._counts["circuit_opens"] += 1
+                self._opened_at = time.monotonic()
+
+    def backoff(self, attempt: int) -> float:
+        """Return the jittered delay before retry number attempt (counting from 0)."""
+        return min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def call(self, request: Callable[[], Awaitable[T]]) -> T:
+        """Make a request through the circuit breaker, retrying transient failures.
+
+        Args:
+            request (Callable[[], Awaitable[T]]): Starts one attempt of the request.
+
+        Returns:
+            T: The request's result.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+            Exception: The last error, if every attempt failed.
+        """
+        if not self._admit():
+            raise CircuitOpenError(f"Search backend {self.name} is failing; not sending requests for up to {self.cooldown:.0f}s")
+
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                result = await request()
+            except asyncio.CancelledError:
+                # Cancelled by the caller, e.g. a hedged request that lost; says nothing about health
+                with self._lock:
+                    self._probing = False
+                raise
+            except Exception as e:
+                if attempt < self.max_retries and is_retryable_error(e):
+                    with self._lock:
+                        self._counts["retries"] += 1
+                    await asyncio.sleep(self.backoff(attempt))
+                    attempt += 1
+                    continue
+                self._record(False, time.perf_counter() - start, e)
+                raise
+            self._record(True, time.perf_counter() - start)
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Report the backend's health.
+
+        Returns:
+            Dict[str, Any]: Request counts, the circuit state (0 closed, 1 half open, 2 open),
+            consecutive failures, the smoothed latency of successful requests and the last error.
+        """
+        with self._lock:
+            state = self._state(time.monotonic())
+            return {
+                **self._counts,
+                "state": state,
+                "circuit_state": {"closed": 0, "half_open": 1, "open": 2}[state],
+                "consecutive_failures": self._consecutive_failures,
+                "latency_ewma_seconds": round(self._latency_ewma, 4) if self._latency_ewma is not None else None,
+                "last_error": self.last_error,
+            }
+
+
+_backend_health: Dict[str, BackendHealth] = {}
+_backend_health_lock = threading.Lock()
+
+
+def get_backend_health(backend: str, **settings: Any) -> BackendHealth:
+    """Return the process-wide health tracker for a search backend, creating it on first use.
+
+    Its statistics are exported as odr_backend_<backend>_* gauges.
+
+    Args:
+        backend (str): The search API name.
+        **settings: BackendHealth settings, used only when the tracker is created.
+
+    Returns:
+        BackendHealth: The tracker shared by every caller of the backend.
+    """
+    with _backend_health_lock:
+        health = _backend_health.get(backend)
+        if health is None:
+            health = _backend_health[backend] = BackendHealth(backend, **settings)
+            registry.register_collector(f"odr_backend_{backend}", health.stats)
+        return health
+
+
+def backend_health() -> Dict[str, Dict[str, Any]]:
+    """Report the health of every search backend used so far.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: BackendHealth.stats() per backend name.
+    """
+    with _backend_health_lock:
+        trackers = dict(_backend_health)
+    return {name: health.stats() for name, health in trackers.items()}
+
+
+_loop_clients: Dict[str, "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]"] = {}
+_loop_closers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+_thread_clients = threading.local()
+_clients_lock = threading.Lock()
+
+
+async def _close_at_shutdown(clients: List[Any]) -> AsyncIterator[None]:
+    """Close a loop's clients when the loop shuts down.
+
+    Once started, this async generator is tracked by its event loop, which
+    finalizes it in shutdown_asyncgens(), as asyncio.run() does before closing
+    the loop. The clients are then closed while the loop can still run their
+    cleanup, and forgotten so that a later call creates new ones.
+    """
+    try:
+        yield
+    finally:
+        loop = asyncio.get_running_loop()
+        with _clients_lock:
+            for clients_by_loop in _loop_clients.values():
+                clients_by_loop.pop(loop, None)
+            _loop_closers.pop(loop, None)
+        for client in clients:
+            try:
+                result = client.close() if hasattr(client, "close") else None
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning("Closing %s failed: %s", type(client).__name__, e)
+
+
+def get_async_client(backend: str, factory: Callable[[], T]) -> T:
+    """Return the running event loop's long-lived client for a backend, creating it on first use.
+
+    Async HTTP clients hold connection pools bound to the loop they were first
+    used on, so one client is kept per backend per event loop. The clients are
+    closed when their loop shuts down.
+
+    Args:
+        backend (str): The search API name.
+        factory (Callable[[], T]): Builds a new client.
+
+    Returns:
+        T: The shared client.
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _loop_clients.setdefault(backend, weakref.WeakKeyDictionary())
+        client = clients.get(loop)
+        if client is None:
+            client = clients[loop] = factory()
+            closer = _loop_closers.get(loop)
+            if closer is None:
+                loop_clients: List[Any] = []
+                closer = _loop_closers[loop] = (_close_at_shutdown(loop_clients), loop_clients)
+                # Run the generator to its yield, which registers it with the running loop
+                try:
+                    closer[0].asend(None).send(None)
+                except StopIteration:
+                    pass
+            closer[1].append(client)
+        return client
+
+
+def get_thread_client(backend: str, factory: Callable[[], T]) -> T:
+    """Return the current thread's long-lived client for a backend, creating it on first use.
+
+    Blocking SDK clients are not safe to share between threads, so each worker
+    thread keeps its own, reusing its connections across queries.
+
+    Args:
+        backend (str): The search API name.
+        factory (Callable[[], T]): Builds a new client.
+
+    Returns:
+        T: The thread's client.
+    """
+    clients = getattr(_thread_clients, "clients", None)
+    if clients is None:
+        clients = _thread_clients.clients = {}
+    client = clients.get(backend)
+    if client is None:
+        client = clients[backend] = factory()
+    return client
+
+
+def failed_search_response(query: str, error: BaseException) -> dict:
+    """Build the response reported for a query whose search failed.
+
+    Args:
+        query (str): The search query.
+        error (BaseException): Why the search failed.
+
+    Returns:
+        dict: A search response with no results and the error message.
+    """
+    return {
+        'query': query,
+        'follow_up_questions': None,
+        'answer': None,
+        'images': [],
+        'results': [],
+        'error': str(error)
+    }
@@ -0,0 +1,212 @@
+"""arXiv search, optionally with the full text of each paper."""
+
+import asyncio
+import logging
+import re
+
+import arxiv
+from langchain_community.retrievers import ArxivRetriever
+from langchain_core.documents import Document
+
+from open_deep_research.extraction import get_extraction_service
+from open_deep_research.fetch import PageFetch, fetch_document
+from open_deep_research.metrics import RATE_LIMIT_WAIT
+from open_deep_research.rate_limit import get_backend_limiter
+from open_deep_research.resilience import (
+    failed_search_response,
+    get_backend_health,
+    get_thread_client,
+)
+
+logger = logging.getLogger(__name__)
+
+
+ARXIV_ID_PATTERN = re.compile(r"\d{2}(0[1-9]|1[0-2])\.\d{4,5}(v\d+|)|\d{7}.*")
+ARXIV_MAX_QUERY_LENGTH = 300
+# Characters of each paper's text kept, as ArxivRetriever does by default
+DOC_CONTENT_CHARS_MAX = 4000
+# Papers are downloaded through the shared page-fetch session, two at a time from arxiv.org
+PDF_FETCH = PageFetch(max_bytes=50_000_000, timeout=60.0, per_host_limit=2, cache_path=None)
+
+
+def is_arxiv_identifier(query: str) -> bool:
+    """Return True if a query is a whitespace-separated list of arXiv IDs."""
+    items = query[:ARXIV_MAX_QUERY_LENGTH].split()
+    return bool(items) and all(ARXIV_ID_PATTERN.fullmatch(item) for item in items)
+
+
+def paper_metadata(result: "arxiv.Result", load_all_available_meta: bool) -> dict:
+    """Return the metadata ArxivRetriever attaches to a full paper."""
+    metadata = {
+        "Published": str(result.updated.date()),
+        "Title": result.title,
+        "Authors": ", ".join(a.name for a in result.authors),
+        "Summary": result.summary,
+    }
+    if load_all_available_meta:
+        metadata.update({
+            "entry_id": result.entry_id,
+            "published_first_time": str(result.published.date()),
+            "comment": result.comment,
+            "journal_ref": result.journal_ref,
+            "doi": result.doi,
+            "primary_category": result.primary_category,
+            "categories": result.categories,
+            "links": [link.href for link in result.links],
+        })
+    return metadata
+
+
+async def arvix_search_async(search_queries,
+                             load_max_docs=5, 
+                             get_full_documents=True,
+                             load_all_available_meta=True,
+                             extraction_workers=None):
+    """Perform concurrent searches on arXiv using the ArxivRetriever.
+
+    Queries are started through the process-wide arXiv rate limiter, which is
+    shared by every graph branch, so retrieval of one query overlaps the wait
+    for the next while the overall request rate stays within arXiv's limit.
+    Each worker thread reuses one retriever per set of options. Transient
+    failures are retried with backoff, each retry waiting for the limiter
+    again, and a query that still fails, or is refused because arXiv's circuit
+    breaker is open, gets a response with no results and an 'error'.
+
+    Full documents are not loaded through the retriever, which downloads and
+    parses each PDF in turn in the calling thread. Instead the papers' PDFs are
+    downloaded concurrently and their text is extracted in the extraction
+    worker processes, keeping the parsing off the event loop.
+
+    Args:
+        search_queries (List[str]): List of search queries or article IDs
+        load_max_docs (int, optional): Maximum number of documents to return per query. Default is 5.
+        get_full_documents (bool, optional): Whether to fetch full text of documents. Default is True.
+        load_all_available_meta (bool, optional): Whether to load all available metadata. Default is True.
+        extraction_workers (int, optional): Processes extracting the text of full documents. Default is one per CPU.
+
+    Returns:
+        List[dict]: List of search responses from arXiv, one per query. Each response has format:
+            {
+                'query': str,                    # The original search query
+                'follow_up_questions': None,      
+                'answer': None,
+                'images': [],
+                'results': [                     # List of search results
+                    {
+                        'title': str,            # Title of the paper
+                        'url': str,              # URL (Entry ID) of the paper
+                        'content': str,          # Formatted summary with metadata
+                        'score': float,          # Relevance score (approximated)
+                        'raw_content': str|None  # Full paper content if available
+                    },
+                    ...
+                ]
+            }
+    """
+    limiter = get_backend_limiter("arxiv")
+    health = get_backend_health("arxiv")
+    client_key = f"arxiv:{load_max_docs}:{get_full_documents}:{load_all_available_meta}"
+
+    def retrieve(query):
+        retriever = get_thread_client(client_key, lambda: ArxivRetriever(
+            load_max_docs=load_max_docs,
+            get_full_documents=get_full_documents,
+            load_all_available_meta=load_all_available_meta
+        ))
+        return retriever.invoke(query)
+
+    def search_papers(query):
+        client = get_thread_client("arxiv_client", arxiv.Client)
+        query = query[:ARXIV_MAX_QUERY_LENGTH]
+        if is_arxiv_identifier(query):
+            search = arxiv.Search(id_list=query.split(), max_results=load_max_docs)
+        else:
+            # Remove the ":" and "-" from the query, as they can cause search problems
+            search = arxiv.Search(query=query.replace(":", "").replace("-", ""), max_results=load_max_docs)
+        return list(client.results(search))
+
+    async def load_full_documents(papers):
+        pdfs = await asyncio.gather(*(fetch_document(paper.pdf_url, PDF_FETCH) for paper in papers))
+        downloaded = [(paper, pdf) for paper, pdf in zip(papers, pdfs) if pdf]
+        extraction = get_extraction_service(extraction_workers)
+        texts = await extraction.extract_many([(pdf, "application/pdf") for _, pdf in downloaded])
+        # Papers whose PDF could not be downloaded or parsed are left out, as the retriever does
+        return [
+            Document(page_content=text[:DOC_CONTENT_CHARS_MAX], metadata=paper_metadata(paper, load_all_available_meta))
+            for (paper, _), text in zip(downloaded, texts) if text is not None
+        ]
+
+    async def rate_limited_retrieve(query):
+        if limiter:
+            RATE_LIMIT_WAIT.observe(await limiter.acquire(), provider="arxiv")  # Respect arXiv's rate limit
+        loop = asyncio.get_event_loop()
+        if get_full_documents:
+            papers = await loop.run_in_executor(None, search_papers, query)
+            return await load_full_documents(papers)
+        return await loop.run_in_executor(None, retrieve, query)
+
+    async def process_single_query(query):
+        try:
+            docs = await health.call(lambda: rate_limited_retrieve(query))
+
+            results = []
+            base_score = 1.0
+            score_decrement = 1.0 / (len(docs) + 1) if docs else 0
+
+            for i, doc in enumerate(docs):
+                metadata = doc.metadata
+                url = metadata.get('entry_id', '')
+
+                content_parts = []
+                if 'Summary' in metadata:
+                    content_parts.append(f"Summary: {metadata['Summary']}")
+                if 'Authors' in metadata:
+                    content_parts.append(f"Authors: {metadata['Authors']}")
+                published = metadata.get('Published')
+                published_str = published.isoformat() if hasattr(published, 'isoformat') else str(published) if published else ''
+                if published_str:
+                    content_parts.append(f"Published: {published_str}")
+                if 'primary_category' in metadata:
+                    content_parts.append(f"Primary Category: {metadata['primary_category']}")
+                if 'categories' in metadata and metadata['categories']:
+                    content_parts.append(f"Categories: {', '.join(metadata['categories'])}")
+                if 'comment' in metadata and metadata['comment']:
+                    content_parts.append(f"Comment: {metadata['comment']}")
+                if 'journal_ref' in metadata and metadata['journal_ref']:
+                    content_parts.append(f"Journal Reference: {metadata['journal_ref']}")
+                if 'doi' in metadata and metadata['doi']:
+                    content_parts.append(f"DOI: {metadata['doi']}")
+                
+                pdf_link = ""
+                if 'links' in metadata and metadata['links']:
+                    for link in metadata['links']:
+                        if 'pdf' in link:
+                            pdf_link = link
+                            content_parts.append(f"PDF: {pdf_link}")
+                            break
+
+                content = "\n".join(content_parts)
+                
+                result = {
+                    'title': metadata.get('Title', ''),
+                    'url': url,
+                    'content': content,
+                    'score': base_score - (i * score_decrement),
+                    'raw_content': doc.page_content if get_full_documents else None
+                }
+                results.append(result)
+
+            return {
+                'query': query,
+                'follow_up_questions': None,
+                'answer': None,
+                'images': [],
+                'results': results
+            }
+        except Exception as e:
+            logger.warning("Error processing arXiv query %r: %s", query, e)
+            return failed_search_response(query, e)
+
+    # Process queries concurrently, each waiting for its turn in the shared rate limiter
+    search_docs = await asyncio.gather(*[process_single_query(query) for query in search_queries])
+    return list(search_docs)
@@ -0,0 +1,71 @@
+"""DuckDuckGo web search."""
+
+import asyncio
+import logging
+
+from duckduckgo_search import DDGS
+from langsmith import traceable
+
+from open_deep_research.resilience import (
+    failed_search_response,
+    get_backend_health,
+    get_thread_client,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@traceable
+async def duckduckgo_search(search_queries):
+    """Perform searches using DuckDuckGo.
+
+    Each worker thread keeps one DDGS client, so its HTTP connections are reused
+    across queries. Transient failures such as rate limiting are retried with
+    backoff, and a query that still fails, or is refused because DuckDuckGo's
+    circuit breaker is open, gets a response with no results and an 'error'.
+
+    Args:
+        search_queries (List[str]): List of search queries to process
+
+    Returns:
+        List[dict]: List of search results
+    """
+    health = get_backend_health("duckduckgo")
+
+    async def process_single_query(query):
+        loop = asyncio.get_event_loop()
+
+        def perform_search():
+            ddgs = get_thread_client("duckduckgo", DDGS)
+            ddg_results = list(ddgs.text(query, max_results=5))
+
+            results = []
+            for i, result in enumerate(ddg_results):
+                results.append({
+                    'title': result.get('title', ''),
+                    'url': result.get('href', result.get('link', '')),
+                    'content': result.get('body', ''),
+                    'score': 1.0 - (i * 0.1),  # Simple scoring mechanism
+                    'raw_content': result.get('body', '')
+                })
+            return results
+
+        try:
+            results = await health.call(lambda: loop.run_in_executor(None, perform_search))
+        except Exception as e:
+            logger.warning("Error performing DuckDuckGo search for query %r: %s", query, e)
+            return failed_search_response(query, e)
+
+        return {
+            'query': query,
+            'follow_up_questions': None,
+            'answer': None,
+            'images': [],
+            'results': results
+        }
+
+    # Execute all queries concurrently
+    tasks = [process_single_query(query) for query in search_queries]
+    search_docs = await asyncio.gather(*tasks)
+
+    return search_docs
@@ -0,0 +1,66 @@
+"""Tavily web search."""
+
+import asyncio
+import logging
+from typing import List
+
+from langsmith import traceable
+from tavily import AsyncTavilyClient
+
+from open_deep_research.resilience import (
+    failed_search_response,
+    get_async_client,
+    get_backend_health,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@traceable
+async def tavily_search_async(search_queries: List[str]) -> List[dict]:
+    """Perform concurrent web searches using the Tavily API.
+
+    Queries share one long-lived client per event loop, so its HTTP connections
+    are reused. Transient failures are retried with backoff, and a query that
+    still fails, or is refused because Tavily's circuit breaker is open, gets a
+    response with no results and an 'error' instead of failing the whole batch.
+
+    Args:
+        search_queries (List[SearchQuery]): List of search queries to process
+
+    Returns:
+            List[dict]: List of search responses from Tavily API, one per query. Each response has format:
+                {
+                    'query': str, # The original search query
+                    'follow_up_questions': None,      
+                    'answer': None,
+                    'images': list,
+                    'results': [                     # List of search results
+                        {
+                            'title': str,            # Title of the webpage
+                            'url': str,              # URL of the result
+                            'content': str,          # Summary/snippet of content
+                            'score': float,          # Relevance score
+                            'raw_content': str|None  # Full page content if available
+                        },
+                        ...
+                    ]
+                }
+    """
+    tavily_async_client = get_async_client("tavily", AsyncTavilyClient)
+    health = get_backend_health("tavily")
+
+    async def process_single_query(query):
+        try:
+            return await health.call(lambda: tavily_async_client.search(
+                query,
+                max_results=5,
+                include_raw_content=True,
+                topic="general"
+            ))
+        except Exception as e:
+            logger.warning("Error performing Tavily search for query %r: %s", query, e)
+            return failed_search_response(query, e)
+
+    search_docs = await asyncio.gather(*[process_single_query(query) for query in search_queries])
+    return list(search_docs)
@@ -0,0 +1,151 @@
+"""Speculative research of proposed sections while the plan awaits approval."""
+
+import asyncio
+import contextvars
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from open_deep_research.metrics import registry
+from open_deep_research.state import Section
+
+
+def section_key(section: Section) -> str:
+    """Identify a proposed section by its name and description."""
+    return hashlib.sha256(f"{section.name}\n{section.description}".encode()).hexdigest()
+
+
+@dataclass
+class _Speculation:
+    task: "asyncio.Task"
+    loop: asyncio.AbstractEventLoop
+    started_at: float
+
+
+class SpeculativeResearch:
+    """Background research for proposed report sections while a plan awaits approval.
+
+    Work is keyed by thread id and by each section's name and description, so a
+    section approved unchanged picks up its own warm results, and anything for
+    a rejected or edited section can be cancelled without touching the rest.
+    Unclaimed work is dropped after max_age seconds.
+    """
+
+    def __init__(self, max_age: float = 60 * 60):
+        """Create an empty registry.
+
+        Args:
+            max_age (float): Seconds after which unclaimed speculative work is cancelled and dropped.
+        """
+        self.max_age = max_age
+        self.started = 0
+        self.used = 0
+        self.cancelled = 0
+        self._speculations: Dict[Tuple[str, str], _Speculation] = {}
+        self._lock = threading.Lock()
+
+    def start(self, thread_id: str, sections: Iterable[Section], research: Callable[[Section], Awaitable[Any]]) -> None:
+        """Start background research for each section that has none running yet.
+
+        Tasks run in an empty context, so they are not attached to the trace or
+        stream of the node that started them.
+
+        Args:
+            thread_id (str): The graph thread the plan belongs to.
+            sections (Iterable[Section]): The proposed sections to research.
+            research (Callable[[Section], Awaitable[Any]]): Coroutine function doing the research for one section.
+        """
+        loop = asyncio.get_running_loop()
+        self._prune()
+        with self._lock:
+            for section in sections:
+                key = (thread_id, section_key(section))
+                if key in self._speculations:
+                    continue
+                task = contextvars.Context().run(loop.create_task, research(section))
+                task.add_done_callback(_consume_exception)
+                self._speculations[key] = _Speculation(task, loop, time.monotonic())
+                self.started += 1
+
+    async def claim(self, thread_id: str, section: Section) -> Optional[Any]:
+        """Take the speculative result for an approved section, waiting for it if still running.
+
+        Args:
+            thread_id (str): The graph thread the plan belongs to.
+            section (Section): The approved section.
+
+        Returns:
+            Optional[Any]: The research result, or None if there was none or it failed.
+        """
+        with self._lock:
+            speculation = self._speculations.pop((thread_id, section_key(section)), None)
+        if speculation is None:
+            return None
+
+        task = speculation.task
+        if not task.done():
+            # A task on another event loop cannot be awaited from here
+            if speculation.loop is not asyncio.get_running_loop():
+                task.get_loop().call_soon_threadsafe(task.cancel)
+                return None
+            try:
+                await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+            except Exception:
+                pass
+
+        if task.cancelled() or task.exception() is not None:
+            return None
+        self.used += 1
+        return task.result()
+
+    def cancel(self, thread_id: str, keep: Iterable[Section] = ()) -> None:
+        """Cancel and drop speculative work for a thread.
+
+        Args:
+            thread_id (str): The graph thread whose plan was rejected.
+            keep (Iterable[Section]): Sections whose work should survive, e.g. ones unchanged in the next plan.
+        """
+        keep_keys = {section_key(section) for section in keep}
+        with self._lock:
+            doomed = [key for key in self._speculations if key[0] == thread_id and key[1] not in keep_keys]
+            for key in doomed:
+                self._drop(self._speculations.pop(key))
+
+    def _prune(self) -> None:
+        """Cancel and drop work nobody claimed within max_age."""
+        cutoff = time.monotonic() - self.max_age
+        with self._lock:
+            stale = [key for key, speculation in self._speculations.items() if speculation.started_at < cutoff]
+            for key in stale:
+                self._drop(self._speculations.pop(key))
+
+    def _drop(self, speculation: _Speculation) -> None:
+        """Cancel a speculation's task if it is still running. Caller holds the lock."""
+        if not speculation.task.done():
+            speculation.loop.call_soon_threadsafe(speculation.task.cancel)
+            self.cancelled += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Report how much speculative work was started, used and cancelled.
+
+        Returns:
+            Dict[str, int]: Counters plus the number of speculations still pending.
+        """
+        with self._lock:
+            return {"started": self.started, "used": self.used, "cancelled": self.cancelled, "pending": len(self._speculations)}
+
+
+def _consume_exception(task: "asyncio.Task") -> None:
+    """Mark a failed speculative task's exception as retrieved; its section simply starts cold."""
+    if not task.cancelled():
+        task.exception()
+
+
+# Shared by every graph run in the process
+speculative_research = SpeculativeResearch()
+registry.register_collector("odr_speculative_research", speculative_research.stats)
@@ -42,9 +42,20 @@ class Feedback(BaseModel):
     )
 
 
+class ReportStateInput(TypedDict):
+    """What a report run is started with."""
+
+    topic: str # Report topic
+    
+class ReportStateOutput(TypedDict):
+    """What a report run returns."""
+
+    final_report: str # Final report
+
 class ReportState(TypedDict):
     topic: str    
     feedback_on_report_plan: str 
+    planning_context: str # Formatted planning search results, reused when the plan is regenerated
     sections: list[Section] 
     completed_sections: Annotated[list, operator.add] # Send() API key
     report_sections_from_research: str 
@@ -55,7 +66,10 @@ class SectionState(TypedDict):
     section: Section  
     search_iterations: int 
     search_queries: list[SearchQuery] 
-    source_str: str 
+    source_parts: list[str] # Formatted sources, one part per search iteration with the sources it added, so earlier parts stay a stable prompt prefix; empty with a token budget
+    sources_in_context: int # Number of source store entries already formatted into source_parts
+    source_store: dict # Sources gathered over all search iterations, keyed by canonical URL; raw content is dropped once formatted into source_parts
+    answered_queries: list[str] # Normalized queries already searched for this section
     report_sections_from_research: str 
     completed_sections: list[Section] 
 
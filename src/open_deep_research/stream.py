@@ -0,0 +1,165 @@
+"""Streaming section tokens and finished sections as a report is written."""
+
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import merge_configs
+
+from open_deep_research.state import Section
+
+# Metadata keys attached to section-writing model calls
+SECTION_KEY = "report_section"
+ITERATION_KEY = "section_iteration"
+
+
+def section_stream_config(config: Optional[RunnableConfig], section_name: str, iteration: int) -> RunnableConfig:
+    """Extend a node's config so a model call's streamed tokens carry the section they belong to.
+
+    Args:
+        config (Optional[RunnableConfig]): The config the node was called with.
+        section_name (str): The name of the section being written.
+        iteration (int): The search iteration the draft is written from.
+
+    Returns:
+        RunnableConfig: The node's config with section_writer tags and section metadata added.
+    """
+    return merge_configs(config, {
+        "tags": ["section_writer"],
+        "metadata": {SECTION_KEY: section_name, ITERATION_KEY: iteration},
+    })
+
+
+@dataclass
+class SectionToken:
+    """A piece of text streamed by a section writer."""
+    section: str
+    iteration: int
+    text: str
+
+
+@dataclass
+class LiveReport:
+    """Assemble a report from streamed section tokens, in plan order.
+
+    Sections show their latest draft while it is being written and graded, and
+    their final content once completed. A new search iteration replaces the
+    draft of the previous one.
+    """
+    plan: List[str] = field(default_factory=list)
+    drafts: Dict[str, Tuple[int, List[str]]] = field(default_factory=dict)
+    completed: Dict[str, str] = field(default_factory=dict)
+
+    def set_plan(self, sections: List[Section]) -> None:
+        """Record the section order of the (latest) report plan."""
+        self.plan = [section.name for section in sections]
+
+    def add_token(self, token: SectionToken) -> None:
+        """Append a streamed token to its section's draft, starting over on a new iteration."""
+        iteration, pieces = self.drafts.get(token.section, (token.iteration, []))
+        if token.iteration != iteration:
+            pieces = []
+        pieces.append(token.text)
+        self.drafts[token.section] = (token.iteration, pieces)
+
+    def complete(self, section: Section) -> None:
+        """Mark a section as finished with its final content."""
+        self.completed[section.name] = section.content
+
+    def render(self, placeholder: str = "") -> str:
+        """Return the report as it stands.
+
+        Args:
+            placeholder (str): Text shown for sections with nothing written yet.
+
+        Returns:
+            str: Completed sections and live drafts joined in plan order.
+        """
+        parts = []
+        for name in self.plan:
+            if name in self.completed:
+                parts.append(self.completed[name])
+            elif name in self.drafts:
+                parts.append("".join(self.drafts[name][1]))
+            elif placeholder:
+                parts.append(placeholder)
+        return "\n\n".join(parts)
+
+
+def _chunk_text(chunk: Any) -> str:
+    """Extract the text of a message chunk, whose content may be a string or a list of content blocks."""
+    content = getattr(chunk, "content", "")
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict) and block.get("type") == "text")
+
+
+async def astream_report(graph: Any, input: Any, config: Optional[RunnableConfig] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """Run the report graph and yield report events as they happen.
+
+    Events are (kind, value) pairs:
+    - ("plan", List[Section]): a report plan was generated
+    - ("interrupt", Any): the graph is waiting for feedback on the plan
+    - ("token", SectionToken): a section writer produced text
+    - ("section", Section): a section was completed
+    - ("report", str): the final report was compiled
+
+    Args:
+        graph (Any): The compiled report graph.
+        input (Any): The graph input, e.g. {"topic": ...} or a Command(resume=...).
+        config (Optional[RunnableConfig]): The run config, including the thread_id when a checkpointer is used.
+
+    Yields:
+        Tuple[str, Any]: Report events in the order they arrive.
+    """
+    async for namespace, mode, payload in graph.astream(input, config, stream_mode=["messages", "updates"], subgraphs=True):
+        if mode == "messages":
+            chunk, metadata = payload
+            if metadata.get(SECTION_KEY) is None:
+                continue
+            text = _chunk_text(chunk)
+            if text:
+                yield "token", SectionToken(metadata[SECTION_KEY], metadata.get(ITERATION_KEY, 0), text)
+            continue
+
+        # Only the outer graph's updates describe the report as a whole
+        if namespace:
+            continue
+        for node, update in payload.items():
+            if node == "__interrupt__":
+                for item in update:
+                    yield "interrupt", getattr(item, "value", item)
+            elif not isinstance(update, dict):
+                continue
+            elif node == "generate_report_plan" and "sections" in update:
+                yield "plan", update["sections"]
+            elif "completed_sections" in update:
+                for section in update["completed_sections"]:
+                    yield "section", section
+            elif "final_report" in update:
+                yield "report", update["final_report"]
+
+
+async def stream_live_report(graph: Any, input: Any, config: Optional[RunnableConfig] = None, report: Optional[LiveReport] = None) -> AsyncIterator[LiveReport]:
+    """Run the report graph, yielding the live report each time it changes.
+
+    Args:
+        graph (Any): The compiled report graph.
+        input (Any): The graph input, e.g. {"topic": ...} or a Command(resume=...).
+        config (Optional[RunnableConfig]): The run config.
+        report (Optional[LiveReport]): A report to keep filling, e.g. the one from before an interrupt.
+
+    Yields:
+        LiveReport: The report after each plan, token or completed section.
+    """
+    report = report or LiveReport()
+    async for kind, value in astream_report(graph, input, config):
+        if kind == "plan":
+            report.set_plan(value)
+        elif kind == "token":
+            report.add_token(value)
+        elif kind == "section":
+            report.complete(value)
+        else:
+            continue
+        yield report
@@ -1,29 +1,44 @@
-import os 
+"""Running searches and turning their responses into prompt context: search parameters, the search backends, caching and coalescing, and formatting."""
+
 import asyncio
-import requests 
-import random 
-import concurrent 
-import aiohttp
-import time 
+import hashlib
+import importlib
 import logging
-
-from typing import List, Optional, Dict, Any, Union
-from urllib.parse import unquote
-
-from tavily import AsyncTavilyClient
-from duckduckgo_search import DDGS
-from bs4 import BeautifulSoup
-
-from langchain_community.retrivers import ArvixRetriver
-from langsmith import traceable
-
+import threading
+import time
+from dataclasses import dataclass
+from functools import cache
+from itertools import chain
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from open_deep_research.blobs import BlobStore, load_text, store_text
+from open_deep_research.cache import (
+    DEFAULT_SEARCH_CACHE_PATH,
+    FlightAbandoned,
+    get_search_cache,
+    make_cache_key,
+    normalize_query,
+    search_flight,
+)
+from open_deep_research.dedup import canonicalize_url, deduplicate_sources
+from open_deep_research.fetch import PageFetch, fetch_full_pages
+from open_deep_research.metrics import (
+    CONTEXT_CHARS,
+    SEARCH_ERRORS,
+    SEARCH_HEDGES,
+    SEARCH_LOOKUPS,
+    SEARCH_QUERIES,
+    SEARCH_QUERY_SECONDS,
+    SEARCH_SECONDS,
+    SOURCES,
+)
 from open_deep_research.state import Section
 
+logger = logging.getLogger(__name__)
+
 
 def get_config_value(value):
-    """
-    Helper function to handle both string and enum cases of configuration values
-    """
+    """Return a configuration value as a string, whether it is given as a string or an enum."""
     if isinstance(value, str):
         return value
     return getattr(value, 'value', value)
@@ -32,11 +47,10 @@ def get_config_value(value):
 
 
 def get_search_params(search_api: str, search_api_config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
-    """
-    Filters and returns valid parameters for a specified search API based on a given configuration.
+    """Filter and return the valid parameters for a specified search API based on a given configuration.
 
     Args:
-        search_api (str): The name of the search API (e.g., "tavily", "arvix").
+        search_api (str): The name of the search API (e.g., "tavily", "arxiv").
         search_api_config (Optional[Dict[str, Any]]): A dictionary of parameters provided for the search API.
 
     Returns:
@@ -45,7 +59,7 @@ def get_search_params(search_api: str, search_api_config: Optional[Dict[str, Any
     """
     SEARCH_API_PARAMS = {
         "tavily": [],
-        "arvix": ["load_max_docs", "get_full_documents", "load_all_available_meta"]
+        "arxiv": ["load_max_docs", "get_full_documents", "load_all_available_meta", "extraction_workers"]
     }
 
     accepted_params = SEARCH_API_PARAMS.get(search_api, [])
@@ -58,14 +72,201 @@ def get_search_params(search_api: str, search_api_config: Optional[Dict[str, Any
 
 
 
+@cache
+def get_token_encoder(encoding_name: str = "cl100k_base"):
+    """Return a cached tiktoken encoder, or None if tiktoken or its encoding files are unavailable.
+
+    Args:
+        encoding_name (str): The tiktoken encoding to load.
+    """
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(encoding_name)
+    except Exception:
+        return None
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> tuple[str, int, bool]:
+    """Cut text down to at most max_tokens tokens.
+
+    Only a prefix of long texts is tokenized, so this stays cheap on full
+    documents. Falls back to 4 characters per token without a tokenizer.
+
+    Args:
+        text (str): The text to truncate.
+        max_tokens (int): The maximum number of tokens to keep.
+
+    Returns:
+        tuple[str, int, bool]: The kept text, its token count, and whether anything was cut.
+    """
+    encoder = get_token_encoder()
+    if encoder is None:
+        char_limit = max_tokens * 4
+        if len(text) <= char_limit:
+            return text, (len(text) + 3) // 4, False
+        return text[:char_limit], max_tokens, True
+
+    # A token is at least one character, so short texts cannot exceed the limit
+    if len(text) <= max_tokens:
+        return text, len(encoder.encode(text, disallowed_special=())), False
+
+    # Tokens average ~4 characters; a prefix of 8 per token nearly always covers the limit
+    prefix = text[:max_tokens * 8]
+    tokens = encoder.encode(prefix, disallowed_special=())
+    if len(tokens) <= max_tokens and len(prefix) < len(text):
+        tokens = encoder.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text, len(tokens), False
+    return encoder.decode(tokens[:max_tokens]), max_tokens, True
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in text with the cached encoder, or estimate at 4 characters per token."""
+    encoder = get_token_encoder()
+    if encoder is None:
+        return (len(text) + 3) // 4
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def allocate_token_budget(needs: List[int], budget: int) -> List[int]:
+    """Split a token budget across sources, max-min fairly.
+
+    Sources are visited from the smallest need up; each takes at most an even
+    share of what is left, and anything it does not use rolls over to the rest.
+
+    Args:
+        needs (List[int]): The number of tokens each source could use.
+        budget (int): The total number of tokens to hand out.
+
+    Returns:
+        List[int]: The tokens allocated to each source, in the same order as needs.
+    """
+    allocation = [0] * len(needs)
+    remaining = max(budget, 0)
+    order = sorted(range(len(needs)), key=needs.__getitem__)
+    for position, i in enumerate(order):
+        share = remaining // (len(needs) - position)
+        allocation[i] = min(needs[i], share)
+        remaining -= allocation[i]
+    return allocation
+
+
+SOURCES_PREAMBLE = "Content from sources:\n"
+MAX_TOKENS_PER_SOURCE = 4000
+
+
+def _format_source_header(source: Dict[str, Any]) -> str:
+    """Format the title, URL and snippet block that opens each source."""
+    return "".join((
+        f"{'=' * 80}\n",
+        f"Source: {source.get('title', 'Untitled')}\n",
+        f"{'-' * 80}\n",
+        f"URL: {source.get('url', 'No URL')}\n===\n",
+        f"Most relevant content from source: {source.get('content', '')}\n===\n",
+    ))
+
+
+def _raw_token_count(source: Dict[str, Any], max_tokens: int) -> int:
+    """Return how many tokens of a source's raw content would be kept, reusing a stored count if there is one."""
+    if source.get('raw_tokens') is not None:
+        return min(source['raw_tokens'], max_tokens)
+    return truncate_to_tokens(source.get('raw_content') or '', max_tokens)[1]
+
+
+def _plan_sources(
+    search_response: List[Dict[str, Any]],
+    max_tokens_per_source: int,
+    include_raw_content: bool,
+    token_budget: Optional[int]
+) -> List[tuple]:
+    """Deduplicate sources and decide which to include, with their headers and raw content token limits."""
+    # Deduplicate by canonical URL and near-identical content
+    sources = list(chain.from_iterable(response['results'] for response in search_response))
+    unique_sources = deduplicate_sources(sources)
+    SOURCES.observe(len(sources), stage="before_dedup")
+    SOURCES.observe(len(unique_sources), stage="after_dedup")
+    headers = [_format_source_header(source) for source in unique_sources]
+    limits = [max_tokens_per_source] * len(unique_sources)
+
+    if token_budget is not None:
+        # Keep the highest-scoring sources whose headers fit, then share the rest out as raw content
+        ranked = sorted(range(len(unique_sources)), key=lambda i: unique_sources[i].get('score') or 0, reverse=True)
+        remaining = token_budget - count_tokens(SOURCES_PREAMBLE)
+        kept = []
+        for i in ranked:
+            # Leave room for the raw content label and closing separator of each source
+            cost = count_tokens(headers[i]) + (40 if include_raw_content else 20)
+            if cost > remaining:
+                break
+            remaining -= cost
+            kept.append(i)
+
+        if include_raw_content:
+            needs = [_raw_token_count(unique_sources[i], max_tokens_per_source) for i in kept]
+            limits = allocate_token_budget(needs, remaining)
+        else:
+            limits = [max_tokens_per_source] * len(kept)
+        unique_sources = [unique_sources[i] for i in kept]
+        headers = [headers[i] for i in kept]
+
+    return list(zip(unique_sources, headers, limits))
+
+
+def iter_formatted_sources(
+    search_response: List[Dict[str, Any]],
+    max_tokens_per_source: int,
+    include_raw_content: bool = True,
+    token_budget: Optional[int] = None
+) -> Iterator[str]:
+    """Streaming variant of duplicate_and_format_source.
+
+    Yields the formatted text piece by piece, so a consumer can write it out or
+    forward it without ever holding one large string. Takes the same arguments
+    as duplicate_and_format_source; the concatenated chunks equal its output
+    plus trailing whitespace.
+
+    Yields:
+        str: Consecutive chunks of the formatted sources.
+    """
+    yield SOURCES_PREAMBLE
+    for source, header, limit in _plan_sources(search_response, max_tokens_per_source, include_raw_content, token_budget):
+        yield header
+
+        if include_raw_content:
+            raw_content = source.get('raw_content') or ''
+            if not raw_content:
+                logger.warning("No raw_content found for source %s", source.get('url', 'Unknown URL'))
+            if source.get('raw_tokens') is not None and source['raw_tokens'] <= limit:
+                # Already truncated and counted when it was added to a source store
+                truncated = source.get('raw_truncated', False)
+            else:
+                raw_content, _, truncated = truncate_to_tokens(raw_content, limit)
+            yield f"Full source content limited to {limit} tokens: "
+            yield raw_content
+            yield "... [truncated]\n\n" if truncated else "\n\n"
+
+        yield f"{'=' * 80}\n\n"
+
+
 def duplicate_and_format_source(
     search_response: List[Dict[str, Any]],
     max_tokens_per_source: int,
-    include_raw_content: bool = True
+    include_raw_content: bool = True,
+    token_budget: Optional[int] = None
 ) -> str:
-    """
-    Takes a list of search responses and formats them into a readable string.
-    Limits the raw_content to approximately max_tokens_per_source tokens.
+    """Take a list of search responses and format them into a readable string.
+
+    Limits the raw_content to max_tokens_per_source tokens.
+
+    Sources are deduplicated by canonical URL and by content fingerprint, keeping
+    the highest-scoring copy of mirrors, syndicated articles and arXiv abs/pdf pairs.
+
+    With a token_budget, sources are ranked by score and added until the budget
+    is spent on their titles, URLs and snippets; the rest of the budget is then
+    shared out across their raw content, so the whole string stays within it.
+
+    The pieces come from iter_formatted_sources and are joined once, so the cost
+    is linear in the size of the output.
 
     Args:
         search_response (List[Dict[str, Any]]): A list of search API responses, each containing a
@@ -78,46 +279,25 @@ def duplicate_and_format_source(
                 - raw_content: str|None 'results' list.
         max_tokens_per_source (int): The max number of tokens allowed from raw content (used to limit length).
         include_raw_content (bool): Whether to include the full raw content from each source (truncated if too long).
+        token_budget (Optional[int]): Total number of tokens the formatted string may use. None means no overall limit.
 
     Returns:
         str: A formatted string containing the cleaned and formatted content from all unique sources.
     """
+    return "".join(iter_formatted_sources(search_response, max_tokens_per_source, include_raw_content, token_budget)).strip()
 
-    source_list = []
-    for response in search_response:
-        source_list.extend(response['results'])
-
-    # Deduplicate by URL
-    unique_sources = {source['url']: source for source in source_list}
-
-    # Format output
-    formatted_text = "Content from sources:\n"
-    for i, source in enumerate(unique_sources.values(), 1):
-        formatted_text += f"{'=' * 80}\n"
-        formatted_text += f"Source: {source.get('title', 'Untitled')}\n"
-        formatted_text += f"{'-' * 80}\n"
-        formatted_text += f"URL: {source.get('url', 'No URL')}\n===\n"
-        formatted_text += f"Most relevant content from source: {source.get('content', '')}\n===\n"
-
-        if include_raw_content:
-            char_limit = max_tokens_per_source * 4  # Rough estimate: 4 characters per token
-            raw_content = source.get('raw_content') or ''
-            if not raw_content:
-                print(f"Warning: No raw_content found for source {source.get('url', 'Unknown URL')}")
-            if len(raw_content) > char_limit:
-                raw_content = raw_content[:char_limit] + "... [truncated]"
-            formatted_text += f"Full source content limited to {max_tokens_per_source} tokens: {raw_content}\n\n"
-
-        formatted_text += f"{'=' * 80}\n\n"
 
-    return formatted_text.strip()
+def iter_formatted_sections(sections: List[Section]) -> Iterator[str]:
+    """Yield a list of sections formatted as plain text, one chunk per section.
 
+    Args:
+        sections (List[Section]): A list of Section objects, each with name, description, research, and content fields.
 
-def format_sections(sections: list[Section]) -> str:
-    """ Format a list of sections into a string """
-    formatted_str = ""
+    Yields:
+        str: The formatted block for each section.
+    """
     for idx, section in enumerate(sections, 1):
-        formatted_str += f"""
+        yield f"""
 {'='*60}
 Section {idx}: {section.name}
 {'='*60}
@@ -130,13 +310,17 @@ Content:
 {section.content if section.content else '[Not yet written]'}
 
 """
-    return formatted_str
 
 
+def format_sections(sections: list[Section]) -> str:
+    """Format a list of sections into a string."""
+    return "".join(iter_formatted_sections(sections))
 
-def format_sections(sections: List['Section']) -> str:
-    """
-    Formats a list of Section objects into a readable, color-coded multi-section string.
+
+def format_sections_colored(sections: List['Section']) -> str:
+    """Format a list of Section objects into a readable, color-coded multi-section string.
+
+    Meant for terminals; use format_sections for text that goes into a prompt.
 
     Args:
         sections (List[Section]): A list of Section objects, each with name, description, research, and content fields.
@@ -144,7 +328,6 @@ def format_sections(sections: List['Section']) -> str:
     Returns:
         str: A formatted and color-coded string with clearly separated sections.
     """
-
     # ANSI color codes
     HEADER = '\033[95m'
     BLUE = '\033[94m'
@@ -153,9 +336,7 @@ def format_sections(sections: List['Section']) -> str:
     RED = '\033[91m'
     ENDC = '\033[0m'  # Reset to default
 
-    formatted_str = ""
-    for idx, section in enumerate(sections, 1):
-        formatted_str += f"""
+    return "".join(f"""
 {YELLOW}{'='*60}
 Section {idx}: {section.name}
 {'='*60}{ENDC}
@@ -167,241 +348,267 @@ Section {idx}: {section.name}
 
 {HEADER}Content:{ENDC}
 {section.content if section.content else RED + '[Not yet written]' + ENDC}
-"""
-    return formatted_str.strip() 
+""" for idx, section in enumerate(sections, 1)).strip()
 
 
 
-@tracable
-async def tavily_search_async(search_queries: List[str]) -> List[dict]:
-    """
-    Performs concurrent web searches using the Tavily API.
+def format_plan(sections: List[Section]) -> str:
+    """Format a report plan's section names, descriptions and research flags for review."""
+    return "\n\n".join(
+        f"Section: {section.name}\n"
+        f"Description: {section.description}\n"
+        f"Research needed: {'Yes' if section.research else 'No'}\n"
+        for section in sections
+    )
+
+
+def carry_over_sections(previous_sections: List[Section], sections: List[Section]) -> tuple[List[Section], List[str]]:
+    """Diff a regenerated plan against the previous one by section name and description.
+
+    Sections whose name, description and research flag are unchanged (ignoring
+    case and whitespace) are replaced by their previous version, so they keep
+    their content and identity. Everything else is new or changed.
 
     Args:
-        search_queries (List[SearchQuery]): List of search queries to process
+        previous_sections (List[Section]): The plan the feedback was given on.
+        sections (List[Section]): The regenerated plan.
 
     Returns:
-            List[dict]: List of search responses from Tavily API, one per query. Each response has format:
-                {
-                    'query': str, # The original search query
-                    'follow_up_questions': None,      
-                    'answer': None,
-                    'images': list,
-                    'results': [                     # List of search results
-                        {
-                            'title': str,            # Title of the webpage
-                            'url': str,              # URL of the result
-                            'content': str,          # Summary/snippet of content
-                            'score': float,          # Relevance score
-                            'raw_content': str|None  # Full page content if available
-                        },
-                        ...
-                    ]
-                }
+        tuple[List[Section], List[str]]: The regenerated plan with unchanged sections carried
+            over, and the names of the sections that are new or changed.
     """
-    tavily_async_client = AsyncTavilyClient()
-    search_tasks = [
-        tavily_async_client.search(
-            query,
-            max_results=5,
-            include_raw_content=True,
-            topic="general"
-        ) for query in search_queries
-    ]
-
-    search_docs = await asyncio.gather(*search_tasks)
-    return search_docs
-
-
-async def arvix_search_async(search_queries,
-                             load_max_docs=5, 
-                             get_full_documents=True,
-                             load_all_available_meta=True):
-    
-     """
-    Performs concurrent searches on arXiv using the ArxivRetriever.
+    def section_identity(section):
+        return normalize_query(section.name), normalize_query(section.description), section.research
+
+    previous = {section_identity(section): section for section in previous_sections}
+    merged = []
+    changed = []
+    for section in sections:
+        carried = previous.pop(section_identity(section), None)
+        if carried is not None:
+            merged.append(carried)
+        else:
+            merged.append(section)
+            changed.append(section.name)
+    return merged, changed
+
+
+# Search backends by name, as "module:function" imported the first time the backend is
+# selected, so a deployment only loads the client libraries of the backend it uses
+SEARCH_BACKENDS: Dict[str, Union[str, Callable]] = {
+    "tavily": "open_deep_research.search_tavily:tavily_search_async",
+    "arxiv": "open_deep_research.search_arxiv:arvix_search_async",
+    "duckduckgo": "open_deep_research.search_duckduckgo:duckduckgo_search",
+}
+_search_backends_lock = threading.Lock()
+
+# Search parameters that change how a backend works, not what it returns, so they are
+# left out of the cache and in-flight keys
+NON_KEY_SEARCH_PARAMS = ("extraction_workers",)
+
+
+def register_search_backend(name: str, backend: Union[str, Callable]) -> None:
+    """Add or replace a search backend.
 
     Args:
-        search_queries (List[str]): List of search queries or article IDs
-        load_max_docs (int, optional): Maximum number of documents to return per query. Default is 5.
-        get_full_documents (bool, optional): Whether to fetch full text of documents. Default is True.
-        load_all_available_meta (bool, optional): Whether to load all available metadata. Default is True.
+        name (str): The name selected with the search_api setting.
+        backend (Union[str, Callable]): An async function taking a list of queries and the backend's
+            search_api_config parameters and returning one response per query, or a "module:function"
+            path to one, imported when the backend is first used.
+    """
+    with _search_backends_lock:
+        SEARCH_BACKENDS[name] = backend
+
+
+def get_search_backend(name: str) -> Callable:
+    """Return a search backend's function, importing its module on first use.
+
+    Args:
+        name (str): The search API name.
 
     Returns:
-        List[dict]: List of search responses from arXiv, one per query. Each response has format:
-            {
-                'query': str,                    # The original search query
-                'follow_up_questions': None,      
-                'answer': None,
-                'images': [],
-                'results': [                     # List of search results
-                    {
-                        'title': str,            # Title of the paper
-                        'url': str,              # URL (Entry ID) of the paper
-                        'content': str,          # Formatted summary with metadata
-                        'score': float,          # Relevance score (approximated)
-                        'raw_content': str|None  # Full paper content if available
-                    },
-                    ...
-                ]
-            }
-    """
+        Callable: The backend's async search function.
 
-    async def process_single_query(query):
-        try:
-            retriever = ArxivRetriever(
-                load_max_docs=load_max_docs,
-                get_full_documents=get_full_documents,
-                load_all_available_meta=load_all_available_meta
-            )
-
-            loop = asyncio.get_event_loop()
-            docs = await loop.run_in_executor(None, lambda: retriever.invoke(query))
-
-            results = []
-            base_score = 1.0
-            score_decrement = 1.0 / (len(docs) + 1) if docs else 0
-
-            for i, doc in enumerate(docs):
-                metadata = doc.metadata
-                url = metadata.get('entry_id', '')
-
-                content_parts = []
-                if 'Summary' in metadata:
-                    content_parts.append(f"Summary: {metadata['Summary']}")
-                if 'Authors' in metadata:
-                    content_parts.append(f"Authors: {metadata['Authors']}")
-                published = metadata.get('Published')
-                published_str = published.isoformat() if hasattr(published, 'isoformat') else str(published) if published else ''
-                if published_str:
-                    content_parts.append(f"Published: {published_str}")
-                if 'primary_category' in metadata:
-                    content_parts.append(f"Primary Category: {metadata['primary_category']}")
-                if 'categories' in metadata and metadata['categories']:
-                    content_parts.append(f"Categories: {', '.join(metadata['categories'])}")
-                if 'comment' in metadata and metadata['comment']:
-                    content_parts.append(f"Comment: {metadata['comment']}")
-                if 'journal_ref' in metadata and metadata['journal_ref']:
-                    content_parts.append(f"Journal Reference: {metadata['journal_ref']}")
-                if 'doi' in metadata and metadata['doi']:
-                    content_parts.append(f"DOI: {metadata['doi']}")
-                
-                pdf_link = ""
-                if 'links' in metadata and metadata['links']:
-                    for link in metadata['links']:
-                        if 'pdf' in link:
-                            pdf_link = link
-                            content_parts.append(f"PDF: {pdf_link}")
-                            break
-
-                content = "\n".join(content_parts)
-                
-                result = {
-                    'title': metadata.get('Title', ''),
-                    'url': url,
-                    'content': content,
-                    'score': base_score - (i * score_decrement),
-                    'raw_content': doc.page_content if get_full_documents else None
-                }
-                results.append(result)
-
-            return {
-                'query': query,
-                'follow_up_questions': None,
-                'answer': None,
-                'images': [],
-                'results': results
-            }
-        except Exception as e:
-            print(f"Error processing arXiv query '{query}': {str(e)}")
-            return {
-                'query': query,
-                'follow_up_questions': None,
-                'answer': None,
-                'images': [],
-                'results': [],
-                'error': str(e)
-            }
-
-    # Process queries concurrently with a rate-limiting mechanism
-    search_docs = []
-    async def process_queries():
-        for i, query in enumerate(search_queries):
-            if i > 0:
-                await asyncio.sleep(3.0)  # Respect arXiv's rate limit
-            result = await process_single_query(query)
-            search_docs.append(result)
-
-    await process_queries()
-    return search_docs
-
-
-
-
-@traceable
-async def duckduckgo_search(search_queries):
-    """Perform searches using DuckDuckGo
+    Raises:
+        ValueError: If no backend is registered under the name.
+    """
+    with _search_backends_lock:
+        backend = SEARCH_BACKENDS.get(name)
+        if backend is None:
+            raise ValueError(f"Unsupported search API: {name}")
+        if isinstance(backend, str):
+            module_name, _, function_name = backend.partition(":")
+            backend = SEARCH_BACKENDS[name] = getattr(importlib.import_module(module_name), function_name)
+        return backend
+
+
+async def run_search_backend(search_api: str, query_list: list[str], params_to_pass: dict) -> List[dict]:
+    """Run the queries against a search API and return the raw responses.
     
     Args:
-        search_queries (List[str]): List of search queries to process
+        search_api: Name of the search API to use
+        query_list: List of search queries to execute
+        params_to_pass: Parameters to pass to the search API
         
     Returns:
-        List[dict]: List of search results
-    """
-    async def process_single_query(query):
-        loop = asyncio.get_event_loop()
+        List of search responses, one per query
         
-        def perform_search():
-            results = []
-            try:
-                with DDGS() as ddgs:
-                    ddg_results = list(ddgs.text(query, max_results=5))
-                    
-                    for i, result in enumerate(ddg_results):
-                        results.append({
-                            'title': result.get('title', ''),
-                            'url': result.get('link', ''),
-                            'content': result.get('body', ''),
-                            'score': 1.0 - (i * 0.1),  # Simple scoring mechanism
-                            'raw_content': result.get('body', '')
-                        })
-            except Exception as e:
-                print(f"Error performing DuckDuckGo search for query '{query}': {str(e)}")
-                return {
-                    'query': query,
-                    'follow_up_questions': None,
-                    'answer': None,
-                    'images': [],
-                    'results': [],
-                    'error': str(e)
-                }
-                
-            return {
-                'query': query,
-                'follow_up_questions': None,
-                'answer': None,
-                'images': [],
-                'results': results
-            }
-
-        return await loop.run_in_executor(None, perform_search)
-
-    # Execute all queries concurrently
-    tasks = [process_single_query(query) for query in search_queries]
-    search_docs = await asyncio.gather(*tasks)
+    Raises:
+        ValueError: If an unsupported search API is specified
+    """
+    start = time.perf_counter()
+    try:
+        backend = get_search_backend(search_api)
+        responses = await backend(query_list, **params_to_pass)
+    except Exception:
+        SEARCH_ERRORS.inc(len(query_list), api=search_api)
+        raise
+    finally:
+        SEARCH_SECONDS.observe(time.perf_counter() - start, api=search_api)
+
+    # Backends that answer failed queries with an error entry instead of raising
+    SEARCH_QUERIES.inc(len(query_list), api=search_api)
+    SEARCH_ERRORS.inc(sum(1 for response in responses if response.get('error')), api=search_api)
+    return responses
+
+
+@dataclass
+class SearchHedge:
+    """How to bound the latency of each search query."""
+    timeout: Optional[float] = None  # Seconds a query may take before it is given up, None for no deadline
+    search_api: Optional[str] = None  # Second backend to send a slow query to, None for no hedging
+    params: Optional[Dict[str, Any]] = None  # Parameters for the second backend
+    delay: float = 1.0  # Seconds to wait for the first backend before sending the hedge request
+
+
+def normalize_scores(response: dict) -> dict:
+    """Scale a response's result scores so its best result scores 1.0, making backends comparable."""
+    top = max((result.get('score') or 0 for result in response['results']), default=0)
+    if top <= 0:
+        return response
+    return {**response, 'results': [{**result, 'score': round((result.get('score') or 0) / top, 4)} for result in response['results']]}
+
+
+async def hedged_search_query(search_api: str, query: str, params_to_pass: dict, hedge: SearchHedge) -> dict:
+    """Run one query under a deadline, sending it to a second backend too if the first is slow.
+
+    The query goes to search_api first. If no usable response has arrived after
+    hedge.delay seconds, or the first backend fails sooner, it is also sent to
+    hedge.search_api. The first usable response wins and the other request is
+    cancelled. Result scores are normalized per response, so sources from either
+    backend rank alike, and the response records which backend answered.
     
-    return search_docs
+    Args:
+        search_api: Name of the first search API
+        query: The search query
+        params_to_pass: Parameters for the first search API
+        hedge: The deadline and hedging settings
+        
+    Returns:
+        The winning search response, or an empty response with an 'error' if the
+        deadline passed or every backend failed
+    """
+    start = time.perf_counter()
+    deadline = start + hedge.timeout if hedge.timeout else None
+    pending = {asyncio.ensure_future(run_search_backend(search_api, [query], params_to_pass)): search_api}
+    hedge_sent = not hedge.search_api
+    hedged = False
+    outcome, response = "failed", None
 
-async def select_and_execute_search(search_api: str, query_list: list[str], params_to_pass: dict) -> str:
-    """Select and execute the appropriate search API.
+    try:
+        while pending or not hedge_sent:
+            # Send the hedge once the delay has passed, or straight away if the first backend failed
+            if not hedge_sent and (not pending or time.perf_counter() - start >= hedge.delay):
+                task = asyncio.ensure_future(run_search_backend(hedge.search_api, [query], hedge.params or {}))
+                pending[task] = hedge.search_api
+                hedge_sent = hedged = True
+
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    outcome = "timeout"
+                    break
+            if not hedge_sent:
+                wait_for_hedge = start + hedge.delay - time.perf_counter()
+                timeout = wait_for_hedge if timeout is None else min(timeout, wait_for_hedge)
+
+            done, _ = await asyncio.wait(pending, timeout=max(timeout, 0) if timeout is not None else None,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                answered_by = pending.pop(task)
+                try:
+                    candidate = task.result()[0]
+                except Exception as e:
+                    logger.warning("Search for %r on %s failed: %s", query, answered_by, e)
+                    continue
+                if candidate.get('error'):
+                    continue
+                if answered_by != search_api:
+                    outcome = "hedge_won"
+                else:
+                    outcome = "primary_after_hedge" if hedged else "primary"
+                response = {**normalize_scores(candidate), 'query': query, 'backend': answered_by}
+                break
+            if response is not None:
+                break
+    finally:
+        # Cancel whichever requests lost the race or ran past the deadline
+        for task in pending:
+            task.cancel()
+
+    SEARCH_HEDGES.inc(api=search_api, outcome=outcome)
+    SEARCH_QUERY_SECONDS.observe(time.perf_counter() - start, api=search_api)
+    if response is None:
+        error = f"No response within {hedge.timeout}s" if outcome == "timeout" else "Every search backend failed"
+        return {'query': query, 'follow_up_questions': None, 'answer': None, 'images': [], 'results': [], 'error': error}
+    return response
+
+
+async def hedged_search(search_api: str, query_list: list[str], params_to_pass: dict, hedge: SearchHedge) -> List[dict]:
+    """Run queries concurrently, each under its own deadline and hedge (see hedged_search_query).
+    
+    Args:
+        search_api: Name of the first search API
+        query_list: List of search queries to execute
+        params_to_pass: Parameters for the first search API
+        hedge: The deadline and hedging settings
+        
+    Returns:
+        List of search responses, one per query
+    """
+    return list(await asyncio.gather(*(hedged_search_query(search_api, query, params_to_pass, hedge) for query in query_list)))
+
+
+async def execute_search(search_api: str, 
+                         query_list: list[str], 
+                         params_to_pass: dict,
+                         use_cache: bool = True,
+                         cache_path: Optional[str] = DEFAULT_SEARCH_CACHE_PATH,
+                         hedge: Optional[SearchHedge] = None,
+                         fetch: Optional[PageFetch] = None) -> List[dict]:
+    """Execute the queries against the appropriate search API and return the raw responses.
+
+    Responses are looked up per query in the search cache first, and queries
+    that another branch is already searching for wait on that search instead
+    of issuing a duplicate request, so only new queries reach the search API.
+    With a hedge, those queries each run under a deadline and may be answered
+    by a second backend (see hedged_search_query); only responses from
+    search_api itself are cached under its name. With fetch settings, results
+    that only carry a snippet then get the full text of their page (see
+    fetch_full_pages); fetched pages are cached per URL, not in the responses.
     
     Args:
         search_api: Name of the search API to use
         query_list: List of search queries to execute
         params_to_pass: Parameters to pass to the search API
+        use_cache: Whether to read and write the search cache
+        cache_path: SQLite file backing the search cache, empty for memory only
+        hedge: Deadline and hedging settings, None to wait for search_api however long it takes
+        fetch: Page fetch settings, None to keep the content the search API returned
         
     Returns:
-        Formatted string containing search results
+        List of search responses, one per query
         
     Raises:
         ValueError: If an unsupported search API is specified
@@ -412,24 +619,229 @@ async def select_and_execute_search(search_api: str, query_list: list[str], para
             raise ValueError("query_list must be a list of strings")
         if not isinstance(params_to_pass, dict):
             raise ValueError("params_to_pass must be a dictionary")
-        
-        # Execute the appropriate search based on search_api
-        if search_api == "tavily":
-            search_results = await tavily_search_async(query_list, **params_to_pass)
-            return deduplicate_and_format_sources(search_results, max_tokens_per_source=4000, include_raw_content=False)
-        elif search_api == "arxiv":
-            search_results = await arxiv_search_async(query_list, **params_to_pass)
-            return deduplicate_and_format_sources(search_results, max_tokens_per_source=4000)
-        elif search_api == "duckduckgo":
-            search_results = await duckduckgo_search(query_list)
-            return deduplicate_and_format_sources(search_results, max_tokens_per_source=4000)
-        else:
+        if search_api not in SEARCH_BACKENDS:
             raise ValueError(f"Unsupported search API: {search_api}")
+        if hedge and hedge.search_api and hedge.search_api not in SEARCH_BACKENDS:
+            raise ValueError(f"Unsupported hedge search API: {hedge.search_api}")
+
+        async def search(queries: List[str]) -> List[dict]:
+            if hedge and (hedge.timeout or hedge.search_api):
+                return await hedged_search(search_api, queries, params_to_pass, hedge)
+            return await run_search_backend(search_api, queries, params_to_pass)
+
+        cache = get_search_cache(cache_path) if use_cache else None
+        key_params = {k: v for k, v in params_to_pass.items() if k not in NON_KEY_SEARCH_PARAMS}
+
+        # Serve what we can from the cache, and only search for the rest
+        search_results: List[Optional[dict]] = [None] * len(query_list)
+        pending: Dict[str, List[int]] = {}
+        if cache:
+            # SQLite lookups run in worker threads, off the event loop
+            cached_responses = await asyncio.gather(*(cache.aget(search_api, query, key_params) for query in query_list))
+        else:
+            cached_responses = [None] * len(query_list)
+        for i, (query, cached) in enumerate(zip(query_list, cached_responses)):
+            if cached is not None:
+                search_results[i] = {**cached, 'query': query}
+                SEARCH_LOOKUPS.inc(api=search_api, source="cache")
+            else:
+                # Identical queries within one call are only searched once
+                pending.setdefault(make_cache_key(search_api, query, key_params), []).append(i)
+
+        # Join identical searches already in flight in other branches, and lead the rest
+        leading: Dict[str, List[int]] = {}
+        following: Dict[str, tuple] = {}
+        for key, indices in pending.items():
+            future, is_leader = search_flight.claim(key)
+            if is_leader:
+                leading[key] = indices
+                SEARCH_LOOKUPS.inc(api=search_api, source="backend")
+            else:
+                following[key] = (future, indices)
+                SEARCH_LOOKUPS.inc(api=search_api, source="coalesced")
+
+        if leading:
+            queries_to_run = [query_list[indices[0]] for indices in leading.values()]
+            try:
+                try:
+                    responses = await search(queries_to_run)
+                except Exception as e:
+                    for key in leading:
+                        search_flight.resolve(key, error=e)
+                    raise
+                # Hand the responses to the waiting branches before anything else can fail
+                for (key, indices), response in zip(leading.items(), responses):
+                    search_flight.resolve(key, response)
+                    for i in indices:
+                        search_results[i] = response
+            finally:
+                # Release waiters on any key still unresolved, e.g. because this task was cancelled
+                for key in leading:
+                    search_flight.abandon(key)
+
+            if cache:
+                for (key, indices), response in zip(leading.items(), responses):
+                    if response.get('error') or response.get('backend', search_api) != search_api:
+                        continue
+                    try:
+                        await cache.aset(search_api, query_list[indices[0]], key_params, response)
+                    except Exception as e:
+                        # The cache is an optimization; a failed write must not fail the search
+                        logger.warning("Caching the %s response for %r failed: %s", search_api, query_list[indices[0]], e)
+
+        for key, (future, indices) in following.items():
+            try:
+                response = await search_flight.wait(future)
+            except FlightAbandoned:
+                # The branch that was running this search went away; run it ourselves
+                response = (await search([query_list[indices[0]]]))[0]
+            for i in indices:
+                search_results[i] = {**response, 'query': query_list[i]}
+
+        if fetch:
+            search_results = await fetch_full_pages(search_results, fetch)
+
+        return search_results
 
     except ValueError as ve:
-        print(f"ValueError occurred: {ve}")
+        logger.error("ValueError occurred: %s", ve)
         raise  # Re-raise the ValueError to propagate it
     except Exception as e:
-        print(f"An error occurred: {e}")
+        logger.error("An error occurred: %s", e)
         raise  # Re-raise any other exception to propagate it
 
+
+def format_search_results(search_api: str, search_results: List[dict], token_budget: Optional[int] = None) -> str:
+    """Format raw search responses into prompt context the way each search API needs.
+    
+    Args:
+        search_api: Name of the search API the responses came from
+        search_results: List of search responses
+        token_budget: Total tokens the formatted results may use, None for no limit
+        
+    Returns:
+        Formatted string containing search results
+    """
+    # Tavily results are formatted from their snippets only
+    include_raw_content = search_api != "tavily"
+    formatted = duplicate_and_format_source(search_results, 
+                                            max_tokens_per_source=MAX_TOKENS_PER_SOURCE, 
+                                            include_raw_content=include_raw_content, 
+                                            token_budget=token_budget)
+    CONTEXT_CHARS.observe(len(formatted), api=search_api)
+    return formatted
+
+
+def add_to_source_store(source_store: Dict[str, dict], 
+                        search_results: List[dict], 
+                        max_tokens_per_source: int = MAX_TOKENS_PER_SOURCE,
+                        blob_store: Optional[BlobStore] = None) -> Dict[str, dict]:
+    """Merge search results into an accumulated source store.
+
+    The store maps canonical URLs to sources. A source already in the store only
+    has its score raised if the new copy scores higher, and a source whose content
+    exactly matches a stored one under another URL is skipped. Raw content is
+    truncated and tokenized once, here, and its token count is kept alongside it
+    so later formatting passes do not tokenize it again. With a blob store, the
+    raw content is written there and the source keeps only a reference to it.
+    
+    Args:
+        source_store: The current store, which is not modified
+        search_results: List of search responses to merge in
+        max_tokens_per_source: The max number of tokens kept from each source's raw content
+        blob_store: Where to keep raw content, None to keep it in the store itself
+        
+    Returns:
+        A new store containing the old and new sources
+    """
+    store = dict(source_store)
+    seen_hashes = {source.get('content_hash') for source in store.values()}
+
+    for result in chain.from_iterable(response['results'] for response in search_results):
+        key = canonicalize_url(result.get('url') or '')
+        existing = store.get(key)
+        if existing is not None:
+            if (result.get('score') or 0) > (existing.get('score') or 0):
+                store[key] = {**existing, 'score': result.get('score')}
+            continue
+
+        raw_content, raw_tokens, raw_truncated = truncate_to_tokens(result.get('raw_content') or '', max_tokens_per_source)
+        content_hash = hashlib.sha256((raw_content or result.get('content') or '').encode('utf-8')).hexdigest()
+        if content_hash in seen_hashes:
+            continue
+        seen_hashes.add(content_hash)
+
+        store[key] = {
+            **result,
+            'raw_content': store_text(raw_content, blob_store),
+            'raw_tokens': raw_tokens,
+            'raw_truncated': raw_truncated,
+            'content_hash': content_hash,
+        }
+
+    return store
+
+
+def format_source_store(search_api: str, 
+                        source_store: Dict[str, dict], 
+                        token_budget: Optional[int] = None,
+                        blob_store: Optional[BlobStore] = None) -> str:
+    """Format an accumulated source store into prompt context.
+    
+    Args:
+        search_api: Name of the search API the sources came from
+        source_store: The store built by add_to_source_store
+        token_budget: Total tokens the formatted sources may use, None for no limit
+        blob_store: The store raw content references point into
+        
+    Returns:
+        Formatted string containing the stored sources
+    """
+    sources = [{**source, 'raw_content': load_text(source.get('raw_content'), blob_store)} for source in source_store.values()]
+    return format_search_results(search_api, [{'results': sources}], token_budget)
+
+
+async def select_and_execute_search(search_api: str, 
+                                    query_list: list[str], 
+                                    params_to_pass: dict,
+                                    use_cache: bool = True,
+                                    cache_path: Optional[str] = DEFAULT_SEARCH_CACHE_PATH,
+                                    token_budget: Optional[int] = None,
+                                    hedge: Optional[SearchHedge] = None,
+                                    fetch: Optional[PageFetch] = None) -> str:
+    """Select and execute the appropriate search API.
+
+    See execute_search for how the search cache and in-flight coalescing are used.
+    
+    Args:
+        search_api: Name of the search API to use
+        query_list: List of search queries to execute
+        params_to_pass: Parameters to pass to the search API
+        use_cache: Whether to read and write the search cache
+        cache_path: SQLite file backing the search cache, empty for memory only
+        token_budget: Total tokens the formatted results may use, None for no limit
+        hedge: Deadline and hedging settings, None to wait for search_api however long it takes
+        fetch: Page fetch settings, None to keep the content the search API returned
+        
+    Returns:
+        Formatted string containing search results
+        
+    Raises:
+        ValueError: If an unsupported search API is specified
+    """
+    search_results = await execute_search(search_api, query_list, params_to_pass, use_cache, cache_path, hedge, fetch)
+    return format_search_results(search_api, search_results, token_budget)
+
+
+# Backend functions that used to live here, for callers that import them from this module
+_MOVED_BACKENDS = {
+    "tavily_search_async": "open_deep_research.search_tavily",
+    "arvix_search_async": "open_deep_research.search_arxiv",
+    "duckduckgo_search": "open_deep_research.search_duckduckgo",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _MOVED_BACKENDS:
+        return getattr(importlib.import_module(_MOVED_BACKENDS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,209 @@
+import asyncio
+
+import pytest
+
+from open_deep_research.cache import (
+    FlightAbandoned,
+    SearchCache,
+    SingleFlight,
+    make_cache_key,
+    search_flight,
+)
+from open_deep_research.utils import SEARCH_BACKENDS, execute_search
+
+
+def response(query, content="result"):
+    return {"query": query, "results": [{"url": f"https://example.com/{query}", "content": content}]}
+
+
+def test_memory_round_trip_and_key():
+    cache = SearchCache(path=None)
+    cache.set("tavily", "Deep  Research", {"depth": 1}, response("deep research"))
+
+    # Queries differing only in case and spacing share an entry; other APIs and params do not
+    assert cache.get("tavily", "deep research", {"depth": 1}) == response("deep research")
+    assert cache.get("tavily", "deep research", {"depth": 2}) is None
+    assert cache.get("arxiv", "deep research", {"depth": 1}) is None
+    assert make_cache_key("tavily", " Deep research ", {"a": 1, "b": 2}) == make_cache_key("tavily", "deep research", {"b": 2, "a": 1})
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_expired_entries_are_misses():
+    cache = SearchCache(path=None, ttls={"tavily": 0})
+    cache.set("tavily", "q", None, response("q"))
+    assert cache.get("tavily", "q") is None
+    assert cache.stats()["memory_entries"] == 0
+
+
+def test_memory_lru_is_bounded():
+    cache = SearchCache(path=None, max_memory_entries=2)
+    for query in ("a", "b"):
+        cache.set("tavily", query, None, response(query))
+    cache.get("tavily", "a")  # "b" is now the least recently used
+    cache.set("tavily", "c", None, response("c"))
+
+    assert cache.get("tavily", "b") is None
+    assert cache.get("tavily", "a") is not None
+    assert cache.get("tavily", "c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "search_cache.sqlite")
+    SearchCache(path).set("tavily", "q", None, response("q"))
+
+    reopened = SearchCache(path)
+    assert reopened.get("tavily", "q") == response("q")
+    assert reopened.stats()["disk_hits"] == 1
+    # The disk hit is promoted to memory
+    assert reopened.get("tavily", "q") == response("q")
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_disk_is_trimmed_to_its_budget(tmp_path):
+    cache = SearchCache(str(tmp_path / "search_cache.sqlite"), max_disk_bytes=2000)
+    for i in range(20):
+        cache.set("tavily", f"q{i}", None, response(f"q{i}", "x" * 200))
+
+    stats = cache.stats()
+    assert stats["disk_bytes"] <= 2000
+    assert stats["evictions"] > 0
+    cache.clear()
+    assert cache.get("tavily", "q19") is None
+
+
+def test_async_round_trip(tmp_path):
+    async def run(cache):
+        await cache.aset("tavily", "q", None, response("q"))
+        return await cache.aget("tavily", "q"), await cache.aget("tavily", "missing")
+
+    for path in (None, str(tmp_path / "search_cache.sqlite")):
+        hit, miss = asyncio.run(run(SearchCache(path)))
+        assert hit == response("q")
+        assert miss is None
+
+    # Written by the worker thread, read back from disk
+    assert SearchCache(str(tmp_path / "search_cache.sqlite")).get("tavily", "q") == response("q")
+
+
+# In-flight coalescing
+
+
+def test_identical_claims_share_the_leaders_result():
+    async def run():
+        flight = SingleFlight()
+        future, leader = flight.claim("k")
+        joined, follower = flight.claim("k")
+        assert leader and not follower and joined is future
+        waiter = asyncio.ensure_future(flight.wait(joined))
+        flight.resolve("k", response("q"))
+        return await waiter, flight.stats()
+
+    result, stats = asyncio.run(run())
+    assert result == response("q")
+    assert stats == {"searches": 1, "coalesced": 1, "in_flight": 0}
+
+
+def test_leader_errors_reach_followers():
+    async def run():
+        flight = SingleFlight()
+        flight.claim("k")
+        joined, _ = flight.claim("k")
+        flight.resolve("k", error=RuntimeError("backend down"))
+        with pytest.raises(RuntimeError, match="backend down"):
+            await flight.wait(joined)
+
+    asyncio.run(run())
+
+
+def test_abandon_releases_followers_and_is_a_no_op_once_resolved():
+    async def run():
+        flight = SingleFlight()
+        flight.claim("k")
+        joined, _ = flight.claim("k")
+        flight.abandon("k")
+        with pytest.raises(FlightAbandoned):
+            await flight.wait(joined)
+
+        future, _ = flight.claim("k")
+        flight.resolve("k", "done")
+        flight.abandon("k")
+        assert future.result() == "done"
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_follower_does_not_cancel_the_others():
+    async def run():
+        flight = SingleFlight()
+        flight.claim("k")
+        joined, _ = flight.claim("k")
+        first = asyncio.ensure_future(flight.wait(joined))
+        second = asyncio.ensure_future(flight.wait(joined))
+        await asyncio.sleep(0)
+        first.cancel()
+        flight.resolve("k", "done")
+        return await second
+
+    assert asyncio.run(run()) == "done"
+
+
+def test_track_counts_each_run_apart():
+    async def run(flight, key):
+        with flight.track() as counts:
+            flight.claim(key)
+            flight.claim(key)
+            flight.resolve(key, "done")
+        return counts
+
+    async def main():
+        flight = SingleFlight()
+        return await asyncio.gather(run(flight, "a"), run(flight, "b"))
+
+    assert asyncio.run(main()) == [{"searches": 1, "coalesced": 1}, {"searches": 1, "coalesced": 1}]
+
+
+@pytest.fixture
+def slow_backend(monkeypatch):
+    calls = []
+
+    async def backend(queries, **kwargs):
+        calls.append(list(queries))
+        await asyncio.sleep(0.05)
+        return [response(query) for query in queries]
+
+    monkeypatch.setitem(SEARCH_BACKENDS, "test_flight", backend)
+    return calls
+
+
+def test_failed_cache_write_does_not_strand_followers(slow_backend, monkeypatch, tmp_path):
+    async def failing_aset(self, *args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(SearchCache, "aset", failing_aset)
+
+    async def run():
+        path = str(tmp_path / "search_cache.sqlite")
+        searches = [execute_search("test_flight", ["same query"], {}, cache_path=path) for _ in range(3)]
+        return await asyncio.wait_for(asyncio.gather(*searches), timeout=5)
+
+    results = asyncio.run(run())
+    assert [r[0]["query"] for r in results] == ["same query"] * 3
+    assert slow_backend == [["same query"]]
+    assert search_flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_leader_hands_the_search_to_a_follower(slow_backend):
+    async def run():
+        leader = asyncio.ensure_future(execute_search("test_flight", ["q"], {}, use_cache=False))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(execute_search("test_flight", ["q"], {}, use_cache=False))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.wait_for(follower, timeout=5)
+
+    assert asyncio.run(run())[0]["query"] == "q"
+    assert slow_backend == [["q"], ["q"]]
+    assert search_flight.stats()["in_flight"] == 0
@@ -0,0 +1,123 @@
+import operator
+from typing import Annotated, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Command, interrupt
+
+from open_deep_research.checkpoint import SQLiteCheckpointer
+
+
+class StepState(TypedDict):
+    steps: Annotated[list, operator.add]
+    approved: str
+
+
+def build_counter(n_steps):
+    """A graph that appends one step per node run, n_steps times."""
+
+    def step(state):
+        return {"steps": [len(state["steps"])]}
+
+    def route(state):
+        return "step" if len(state["steps"]) < n_steps else END
+
+    builder = StateGraph(StepState)
+    builder.add_node("step", step)
+    builder.add_edge(START, "step")
+    builder.add_conditional_edges("step", route, ["step", END])
+    return builder
+
+
+def build_review():
+    """A graph that pauses for approval between two steps, like the plan review."""
+
+    def plan(state):
+        return {"steps": ["plan"]}
+
+    def review(state):
+        return {"approved": interrupt("Approve the plan?")}
+
+    def write(state):
+        return {"steps": ["write"]}
+
+    builder = StateGraph(StepState)
+    builder.add_node("plan", plan)
+    builder.add_node("review", review)
+    builder.add_node("write", write)
+    builder.add_edge(START, "plan")
+    builder.add_edge("plan", "review")
+    builder.add_edge("review", "write")
+    builder.add_edge("write", END)
+    return builder
+
+
+def test_put_get_and_list_round_trip(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    checkpointer = SQLiteCheckpointer(path, keep_checkpoints=None)
+    graph = build_counter(3).compile(checkpointer=checkpointer)
+    config = {"configurable": {"thread_id": "t1"}}
+
+    graph.invoke({"steps": []}, config)
+
+    latest = checkpointer.get_tuple(config)
+    assert latest.checkpoint["channel_values"]["steps"] == [0, 1, 2]
+    history = list(checkpointer.list(config))
+    assert history[0].config == latest.config
+    assert [t.config["configurable"]["checkpoint_id"] for t in history] == sorted(
+        (t.config["configurable"]["checkpoint_id"] for t in history), reverse=True
+    )
+    # Every checkpoint but the first points at the one before it
+    for newer, older in zip(history, history[1:]):
+        assert newer.parent_config["configurable"]["checkpoint_id"] == older.config["configurable"]["checkpoint_id"]
+    assert list(checkpointer.list(config, limit=2)) == history[:2]
+    assert checkpointer.get_tuple({"configurable": {"thread_id": "other"}}) is None
+
+    # Committed writes are read back by a new connection
+    checkpointer.close()
+    reopened = SQLiteCheckpointer(path, keep_checkpoints=None)
+    assert reopened.get_tuple(config).checkpoint["channel_values"]["steps"] == [0, 1, 2]
+    assert len(list(reopened.list(config))) == len(history)
+    reopened.close()
+
+
+def test_interrupt_and_resume(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    config = {"configurable": {"thread_id": "t1"}}
+
+    checkpointer = SQLiteCheckpointer(path)
+    graph = build_review().compile(checkpointer=checkpointer)
+    graph.invoke({"steps": []}, config)
+    state = graph.get_state(config)
+    assert state.next == ("review",)
+    assert state.tasks[0].interrupts[0].value == "Approve the plan?"
+    checkpointer.close()
+
+    # Resume from a fresh process's view of the file
+    checkpointer = SQLiteCheckpointer(path)
+    graph = build_review().compile(checkpointer=checkpointer)
+    result = graph.invoke(Command(resume="yes"), config)
+    assert result == {"steps": ["plan", "write"], "approved": "yes"}
+    assert graph.get_state(config).next == ()
+    checkpointer.close()
+
+
+def test_compaction_keeps_the_latest_checkpoints(tmp_path):
+    checkpointer = SQLiteCheckpointer(str(tmp_path / "checkpoints.sqlite"), keep_checkpoints=3)
+    graph = build_counter(10).compile(checkpointer=checkpointer)
+    config = {"configurable": {"thread_id": "t1"}}
+    graph.invoke({"steps": []}, config)
+    latest_id = checkpointer.get_tuple(config).config["configurable"]["checkpoint_id"]
+
+    # Compaction runs as checkpoints are written, so the thread never holds much more than it keeps
+    assert len(list(checkpointer.list(config))) < 2 * 3
+
+    checkpointer.compact()
+    history = list(checkpointer.list(config))
+    assert len(history) == 3
+    assert history[0].config["configurable"]["checkpoint_id"] == latest_id
+    # The retained checkpoints still load every channel value they reference
+    assert graph.get_state(config).values["steps"] == list(range(10))
+    for snapshot in history:
+        assert snapshot.checkpoint["channel_values"]["steps"]
+    assert checkpointer.stats()["compactions"] > 0
+    checkpointer.close()
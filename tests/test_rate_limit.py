@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+import pytest
+
+from open_deep_research.rate_limit import TokenBucket
+
+
+def test_rejects_non_positive_settings():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, capacity=1)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1, capacity=0)
+
+
+def test_burst_is_free_then_callers_queue_in_order():
+    bucket = TokenBucket(rate=10, capacity=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    delays = [bucket.reserve() for _ in range(3)]
+    # Each caller waits behind the debt left by the ones before it
+    assert delays == sorted(delays)
+    assert delays[0] == pytest.approx(0.1, abs=0.02)
+    assert delays[2] == pytest.approx(0.3, abs=0.02)
+
+
+def test_refills_at_rate_up_to_capacity():
+    bucket = TokenBucket(rate=100, capacity=2)
+    bucket.reserve(2)
+    time.sleep(0.05)
+    # Five tokens were earned, but the bucket only holds two
+    assert bucket.reserve(2) == 0.0
+    assert bucket.reserve() > 0
+
+
+def test_adjust_charges_and_refunds():
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket.reserve(5)
+    bucket.adjust(-5)  # Refund an overestimate
+    assert bucket.reserve(5) == 0.0
+    bucket.adjust(1)  # Charge usage beyond the reservation
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.02)
+
+
+def test_pause_delays_every_caller():
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket.pause(1.0)
+    assert bucket.reserve() == pytest.approx(1.1, abs=0.02)
+
+
+def test_acquire_sleeps_for_its_reservation():
+    bucket = TokenBucket.per_minute(600, burst=1)
+    assert bucket.rate == 10
+    assert bucket.capacity == 1
+
+    async def run():
+        start = time.monotonic()
+        waits = await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+        return waits, time.monotonic() - start
+
+    waits, elapsed = asyncio.run(run())
+    assert waits[0] == 0.0
+    assert elapsed >= 0.18
@@ -0,0 +1,137 @@
+import asyncio
+import time
+
+import pytest
+
+from open_deep_research.resilience import (
+    BackendHealth,
+    CircuitOpenError,
+    is_retryable_error,
+)
+
+
+class FlakyRequest:
+    """Fails with the given errors in turn, then succeeds."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.attempts = 0
+
+    async def __call__(self):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def call(health, request):
+    return asyncio.run(health.call(request))
+
+
+def test_retryable_errors():
+    assert is_retryable_error(TimeoutError())
+    assert is_retryable_error(ConnectionError())
+    assert not is_retryable_error(ValueError("bad query"))
+
+    class HTTPError(Exception):
+        def __init__(self, status_code):
+            self.status_code = status_code
+
+    assert is_retryable_error(HTTPError(503))
+    assert not is_retryable_error(HTTPError(400))
+
+
+def test_transient_failures_are_retried():
+    health = BackendHealth("test", max_retries=2, base_delay=0)
+    request = FlakyRequest(TimeoutError(), ConnectionError())
+    assert call(health, request) == "ok"
+    assert request.attempts == 3
+
+    stats = health.stats()
+    assert stats["retries"] == 2
+    assert stats["successes"] == 1
+    assert stats["failures"] == 0
+    assert stats["latency_ewma_seconds"] is not None
+
+
+def test_gives_up_after_max_retries_and_on_permanent_errors():
+    health = BackendHealth("test", max_retries=1, base_delay=0)
+    request = FlakyRequest(TimeoutError(), TimeoutError(), TimeoutError())
+    with pytest.raises(TimeoutError):
+        call(health, request)
+    assert request.attempts == 2
+
+    request = FlakyRequest(ValueError("bad query"))
+    with pytest.raises(ValueError):
+        call(health, request)
+    assert request.attempts == 1
+    assert health.stats()["failures"] == 2
+    assert "ValueError" in health.last_error
+
+
+def test_circuit_opens_fails_fast_and_recovers_through_a_probe():
+    health = BackendHealth("test", failure_threshold=2, cooldown=0.05, max_retries=0)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            call(health, FlakyRequest(ValueError()))
+    assert health.state == "open"
+
+    request = FlakyRequest()
+    with pytest.raises(CircuitOpenError):
+        call(health, request)
+    assert request.attempts == 0
+    assert health.stats()["rejected"] == 1
+    assert health.stats()["circuit_opens"] == 1
+
+    time.sleep(0.06)
+    assert health.state == "half_open"
+    assert call(health, FlakyRequest()) == "ok"
+    assert health.state == "closed"
+    assert health.stats()["consecutive_failures"] == 0
+
+
+def test_failed_probe_reopens_the_circuit():
+    health = BackendHealth("test", failure_threshold=1, cooldown=0.05, max_retries=0)
+    with pytest.raises(ValueError):
+        call(health, FlakyRequest(ValueError()))
+    time.sleep(0.06)
+    with pytest.raises(ValueError):
+        call(health, FlakyRequest(ValueError()))
+    assert health.state == "open"
+
+
+def test_half_open_admits_a_single_probe():
+    health = BackendHealth("test", failure_threshold=1, cooldown=0.05, max_retries=0)
+    with pytest.raises(ValueError):
+        call(health, FlakyRequest(ValueError()))
+    time.sleep(0.06)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run():
+        return await asyncio.gather(health.call(slow), health.call(slow), return_exceptions=True)
+
+    probe, rejected = asyncio.run(run())
+    assert probe == "ok"
+    assert isinstance(rejected, CircuitOpenError)
+    assert health.state == "closed"
+
+
+def test_cancelled_probe_frees_the_probe_slot():
+    health = BackendHealth("test", failure_threshold=1, cooldown=0.05, max_retries=0)
+    with pytest.raises(ValueError):
+        call(health, FlakyRequest(ValueError()))
+    time.sleep(0.06)
+
+    async def run():
+        probe = asyncio.ensure_future(health.call(lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return await health.call(FlakyRequest())
+
+    assert asyncio.run(run()) == "ok"
+    assert health.state == "closed"